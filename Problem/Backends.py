@@ -0,0 +1,31 @@
+from gurobipy import GRB
+from .ProblemCompiler import CompiledProblem, BACKENDS
+from .SciPyProblem import scipyUnsupported
+
+#Engines a problem can be solved with (BACKENDS), chosen by the "backend" key of the problem:
+#"gurobi" always uses Gurobi, "scipy" always uses the HiGHS solvers bundled in SciPy (LP and MILP only),
+#and "auto" uses Gurobi unless the problem is over the Gurobi size limit or Gurobi has no license for it.
+
+#Gurobi errors after which an "auto" solve of an LP or MILP is retried on the SciPy backend
+LICENSE_ERRORS = (GRB.Error.NO_LICENSE, GRB.Error.SIZE_LIMIT_EXCEEDED)
+
+def selectBackend(compiled: CompiledProblem, default: str = "auto", size_limit: int = 0) -> str:
+    """
+    The backend that solves the problem first: "gurobi" or "scipy". default applies when the problem names no backend.
+    With "auto", LP and MILP problems with more than size_limit variables or constraints go to SciPy (0 means no limit).
+    Raises ValueError when the problem asks for scipy and SciPy cannot solve it.
+    """
+    backend = compiled.backend or default
+    reason = scipyUnsupported(compiled)
+    if backend == "scipy":
+        if reason is not None:
+            raise ValueError(f"The scipy backend cannot solve this problem: {reason}")
+        return "scipy"
+    if backend == "auto" and reason is None and size_limit and max(compiled.num_vars, compiled.num_constrs) > size_limit:
+        return "scipy"
+    return "gurobi"
+
+def canFallBack(compiled: CompiledProblem, error: Exception, default: str = "auto") -> bool:
+    """Whether a Gurobi failure with error is retried on SciPy: the backend is auto, the error is a license error and SciPy can solve the problem."""
+    return ((compiled.backend or default) == "auto" and getattr(error, "errno", None) in LICENSE_ERRORS
+            and scipyUnsupported(compiled) is None)
@@ -0,0 +1,67 @@
+import threading
+import gurobipy as gp
+from .Backends import LICENSE_ERRORS
+
+def createQuietEnv() -> gp.Env:
+    """Start a Gurobi environment that prints nothing, not even the license banner."""
+    env = gp.Env(empty=True)
+    env.setParam("OutputFlag", 0)
+    env.setParam("LogToConsole", 0)
+    env.start()
+    return env
+
+#Started, quiet Gurobi environments shared by model builds and solves.
+#A Gurobi environment must not be used by two threads at once, so every model checks out its own environment
+#and returns it when the model is disposed. Up to size idle environments are kept for reuse, which saves the
+#environment start and license check on each request. When all are checked out a new one is started.
+class EnvPool:
+    def __init__(self, size: int = 4, prestart: bool = False):
+        self.size = max(0, size)
+        self._idle = []
+        self._lock = threading.Lock()
+        self._stats = {"created": 0, "reused": 0, "disposed": 0}
+        if prestart:
+            try:
+                for _ in range(self.size):
+                    self._idle.append(self._create())
+            except gp.GurobiError as e:
+                #Without a license the pool starts empty, so each build reports the license error and "auto" solves fall back to SciPy
+                if e.errno not in LICENSE_ERRORS:
+                    raise
+
+    def _create(self) -> gp.Env:
+        env = createQuietEnv()
+        with self._lock:
+            self._stats["created"] += 1
+        return env
+
+    def acquire(self) -> gp.Env:
+        """Check out an environment for the exclusive use of one model."""
+        with self._lock:
+            if self._idle:
+                self._stats["reused"] += 1
+                return self._idle.pop()
+        return self._create()
+
+    def release(self, env: gp.Env):
+        """Return an environment whose models have all been disposed."""
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(env)
+                return
+            self._stats["disposed"] += 1
+        env.dispose()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["idle"] = len(self._idle)
+            stats["size"] = self.size
+            return stats
+
+    def close(self):
+        with self._lock:
+            idle = self._idle
+            self._idle = []
+        for env in idle:
+            env.dispose()
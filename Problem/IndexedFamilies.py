@@ -0,0 +1,199 @@
+import itertools
+import math
+import re
+import numpy as np
+
+#Index sets, data tables and indexed variable families of the problem schema, and the expansion of linear term
+#templates over them. A family x over sets R and J owns a contiguous block of columns in row-major order, named
+#x[r,j], so terms are expanded with numpy index arithmetic instead of one dict entry per variable or coefficient.
+
+#Labels end up inside names like x[r,j], so they cannot contain the characters that delimit them
+_RESERVED_CHARACTERS = re.compile(r"[\[\],\s]")
+_FAMILY_REFERENCE = re.compile(r"^([^\[\]]+)\[([^\[\]]*)\]$")
+
+def elementName(name: str, labels) -> str:
+    return name + "[" + ",".join(labels) + "]"
+
+class IndexSet:
+    def __init__(self, name: str, labels: list):
+        self.name = name
+        self.labels = [str(label) for label in labels]
+        self.position = {label: position for position, label in enumerate(self.labels)}
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+#A table of numbers indexed by sets, used as per-element coefficients, bounds or right hand sides
+class DataTable:
+    def __init__(self, name: str, sets: list, values: np.ndarray):
+        self.name = name
+        self.sets = sets
+        self.values = values
+
+class VariableFamily:
+    def __init__(self, name: str, sets: list, offset: int):
+        self.name = name
+        self.sets = sets
+        self.offset = offset                #column of the first element
+        self.shape = tuple(len(index_set) for index_set in sets)
+
+    @property
+    def size(self) -> int:
+        return math.prod(self.shape)
+
+    def names(self) -> list:
+        return [elementName(self.name, labels) for labels in itertools.product(*(index_set.labels for index_set in self.sets))]
+
+    def column(self, labels: list):
+        if len(labels) != len(self.sets):
+            return None
+        positions = []
+        for label, index_set in zip(labels, self.sets):
+            if label not in index_set.position:
+                return None
+            positions.append(index_set.position[label])
+        return self.offset + int(np.ravel_multi_index(positions, self.shape))
+
+def resolveReference(families: dict, key: str):
+    """Column of a family element referenced by name, e.g. "x[Resource1,Job1]", or None."""
+    match = _FAMILY_REFERENCE.match(key) if isinstance(key, str) else None
+    if match is None or match.group(1) not in families:
+        return None
+    return families[match.group(1)].column(match.group(2).split(","))
+
+def compileSets(sets: dict, errors: list) -> dict:
+    """Each set is a list of labels or a count n for the labels 0 to n-1."""
+    if not isinstance(sets, dict):
+        errors.append("sets must be an object mapping set names to a list of labels or a size")
+        return {}
+    compiled = {}
+    for name, definition in sets.items():
+        if isinstance(definition, int) and not isinstance(definition, bool) and definition >= 0:
+            labels = range(definition)
+        elif isinstance(definition, list) and all(isinstance(label, (str, int)) and not isinstance(label, bool) for label in definition):
+            labels = definition
+        else:
+            errors.append(f"Set {name} must be a non-negative integer or a list of string or integer labels")
+            continue
+        index_set = IndexSet(name, labels)
+        if len(index_set.position) < len(index_set):
+            errors.append(f"Set {name} has duplicate labels")
+        elif any(_RESERVED_CHARACTERS.search(label) for label in index_set.labels):
+            errors.append(f"Labels of set {name} cannot contain commas, brackets or whitespace")
+        compiled[name] = index_set
+    return compiled
+
+def resolveSets(set_names, sets: dict, where: str, errors: list):
+    """Look up a list of set names. Returns the IndexSet list or None after reporting an error."""
+    if not isinstance(set_names, list) or not set_names:
+        errors.append(f"index of {where} must be a non-empty list of set names")
+        return None
+    unknown = [name for name in set_names if not isinstance(name, str) or name not in sets]
+    if unknown:
+        errors.append(f"Unknown set {unknown[0]} in {where}")
+        return None
+    return [sets[name] for name in set_names]
+
+def compileData(data: dict, sets: dict, errors: list) -> dict:
+    """Each table is {"index": [set names], "values": nested lists shaped like the sets}."""
+    if not isinstance(data, dict):
+        errors.append("data must be an object mapping table names to {index, values}")
+        return {}
+    compiled = {}
+    for name, table in data.items():
+        where = f"data table {name}"
+        if not isinstance(table, dict):
+            errors.append(f"{where} must be an object with index and values")
+            continue
+        table_sets = resolveSets(table.get("index"), sets, where, errors)
+        if table_sets is None:
+            continue
+        shape = tuple(len(index_set) for index_set in table_sets)
+        try:
+            values = np.asarray(table.get("values"), dtype=float)
+        except (TypeError, ValueError):
+            errors.append(f"values of {where} must be nested lists of numbers")
+            continue
+        if values.shape != shape:
+            errors.append(f"values of {where} must have shape {list(shape)}, got {list(values.shape)}")
+        elif not np.isfinite(values).all():
+            errors.append(f"values of {where} must be finite numbers")
+        else:
+            compiled[name] = DataTable(name, table_sets, values)
+    return compiled
+
+def lookupValues(value, data: dict, expected_sets: list, positions: tuple, where: str, errors: list):
+    """
+    A number, or the name of a data table over expected_sets read at positions.
+    positions may be Ellipsis to read the whole table.
+    Returns a float or an array broadcastable to the positions, or None after reporting an error.
+    """
+    if isinstance(value, str):
+        table = data.get(value)
+        if table is None:
+            errors.append(f"Unknown data table {value} in {where}")
+            return None
+        if table.sets != expected_sets:
+            errors.append(f"Data table {value} in {where} must be indexed by {[index_set.name for index_set in expected_sets]}")
+            return None
+        return table.values[positions]
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        errors.append(f"{where} must be a finite number or a data table name, got {value!r}")
+        return None
+    return float(value)
+
+def expandTerm(term: dict, over: dict, families: dict, data: dict, where: str, errors: list):
+    """
+    Expand one term template {"family", "index", "sum", "coef"} over the grid of the bound index names in over
+    ({name: IndexSet}, one row per combination) and the index names the term sums over.
+    Returns (rows, columns, coefficients) as flat arrays, with rows numbered in the row-major order of over,
+    or None after reporting an error.
+    """
+    if not isinstance(term, dict) or term.get("family") not in families:
+        errors.append(f"Term {term!r} of {where} must name a variable family in family")
+        return None
+    family = families[term["family"]]
+    index = term.get("index", [])
+    if not isinstance(index, list) or len(index) != len(family.sets):
+        errors.append(f"index of family {family.name} in {where} must list {len(family.sets)} entries")
+        return None
+    sums = term.get("sum", {})
+    if not isinstance(sums, dict):
+        errors.append(f"sum of family {family.name} in {where} must map index names to set names")
+        return None
+    sum_sets = {}
+    for name, set_name in sums.items():
+        if name in over:
+            errors.append(f"Index {name} in {where} is bound by the template and cannot be summed over")
+            return None
+        if set_name not in [index_set.name for index_set in family.sets] or name not in index:
+            errors.append(f"Summed index {name} in {where} must appear in the index of family {family.name} and run over one of its sets")
+            return None
+        sum_sets[name] = next(index_set for index_set in family.sets if index_set.name == set_name)
+
+    axes = list(over) + list(sum_sets)
+    axis_sets = list(over.values()) + list(sum_sets.values())
+    grid = tuple(len(index_set) for index_set in axis_sets)
+    positions = []
+    for position, (entry, family_set) in enumerate(zip(index, family.sets)):
+        if isinstance(entry, str) and entry in axes:
+            axis = axes.index(entry)
+            if axis_sets[axis] is not family_set:
+                errors.append(f"Index {entry} in {where} runs over set {axis_sets[axis].name} but position {position} of family {family.name} uses set {family_set.name}")
+                return None
+            shape = [1] * len(grid)
+            shape[axis] = grid[axis]
+            positions.append(np.broadcast_to(np.arange(grid[axis]).reshape(shape), grid))
+        elif str(entry) in family_set.position:
+            positions.append(np.broadcast_to(np.int64(family_set.position[str(entry)]), grid))
+        else:
+            errors.append(f"{entry!r} in {where} is neither a bound or summed index nor a label of set {family_set.name}")
+            return None
+    positions = tuple(positions)
+    coefficients = lookupValues(term.get("coef", 1), data, family.sets, positions, f"coef of family {family.name} in {where}", errors)
+    if coefficients is None:
+        return None
+    columns = family.offset + np.ravel_multi_index(positions, family.shape)
+    rows = np.arange(math.prod(grid[:len(over)])).reshape(grid[:len(over)] + (1,) * len(sum_sets))
+    rows = np.broadcast_to(rows, grid)
+    return rows.ravel(), np.ravel(columns), np.broadcast_to(coefficients, grid).astype(float).ravel()
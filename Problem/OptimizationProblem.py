@@ -1,19 +1,71 @@
 from abc import ABC,abstractmethod
+import base64
 import os
-from gurobipy import Model, GRB, quicksum
+from gurobipy import Model, GRB, LinExpr, QuadExpr, quicksum
 import tempfile
+import time
+import numpy as np
+import scipy.sparse as sp
+from .ProblemCompiler import compileProblem, VARIABLE_TYPES, CONSTRAINT_SENSES, BASE_SCENARIO, _isNumber
+from .Parameters import validateParameters
+from .ProblemWriter import writeLP, writeMPS
+from .EnvPool import EnvPool
+#Gurobi attribute that sets each change of a scenario (see ProblemCompiler.SCENARIO_CHANGES)
+SCENARIO_ATTRIBUTES = {"objective": "ScenNObj", "rhs": "ScenNRHS", "lb": "ScenNLB", "ub": "ScenNUB"}
+
+def _warmStartValues(solution, names: list):
+    """Values of an earlier solution ({name: value} or columnar) for the given variable names, NaN for names it does not list."""
+    if not isinstance(solution, dict):
+        return np.full(len(names), np.nan)
+    if set(solution) == {"names", "values", "dtype"}:
+        values = np.frombuffer(base64.b64decode(solution["values"]), dtype="<f8")
+        solution = dict(zip(solution["names"], values.tolist()))
+    return np.array([solution.get(name, np.nan) for name in names], dtype=float)
+
 class OptimizationProblem(ABC):
-    def __init__(self,problem:dict):
-        self._name = problem["problem"].get("name", "OptimizationProblem")
-        self._problem = problem
-        self._objective = problem.get("objective", {})
-        self._constraints = problem.get("constraints", [])
-        self._variables = problem.get("variables",{})
+    #Quiet Gurobi environments checked out by each model, replaced by the server with one sized from its config
+    env_pool = EnvPool()
+    #"matrix" loads variables, constraints and the objective from compiled arrays with the matrix API,
+    #"expression" adds them one at a time from LinExpr and QuadExpr expressions
+    BUILDERS = ("matrix", "expression")
+    default_builder = "matrix"
+    #Problem category (see ProblemCompiler.PROBLEM_CATEGORIES) the subclass builds
+    category = None
+
+    def __init__(self,problem:dict, builder: str = None, compiled=None, lazy_update: bool = False):
+        self._builder = builder or self.default_builder
+        if self._builder not in self.BUILDERS:
+            raise ValueError(f"Unknown model builder: {self._builder}. Use one of {self.BUILDERS}.")
+        #Validation happens here, before an environment is checked out or a model is allocated
+        self._compiled = compiled if compiled is not None else compileProblem(problem)
+        if self._compiled.category != self.category:
+            raise ValueError(f"{type(self).__name__} cannot build {self._compiled.problem_type} problems. Use createProblem to pick the model class.")
+        self._name = self._compiled.name
+        self._parameters = dict(self._compiled.parameters)
+        self._output = dict(self._compiled.output)
         self._gurobi_variables = {}
+        #Set once applyPatch changes the model, after which the problem dict no longer describes it
+        self._patched = False
         self._model = None
         self._solution = None
         self._status = None
-        self._create_model()  # Call the method to create the model
+        #Seconds spent in each build step, plus "update" for the model.update() calls within them
+        self.build_timings = {}
+        self._env = self.env_pool.acquire()
+        try:
+            self._create_model()  # Call the method to create the model
+            if self._compiled.objectives:
+                self._timed("objectives", self._addObjectives)
+            if self._compiled.scenarios:
+                self._timed("scenarios", self._addScenarios)
+            self._timed("start", self._addStart)
+            #The builders only queue additions. They are applied in one update here, or with lazy_update by whatever
+            #needs the model next (optimize and write apply pending changes themselves), e.g. a solve straight after the build.
+            if not lazy_update:
+                self._update()
+        except Exception:
+            self.dispose()
+            raise
         
     
     @abstractmethod
@@ -22,150 +74,383 @@ class OptimizationProblem(ABC):
 
     def getModel(self):
         return self._model
+
+    def dispose(self):
+        """Free the Gurobi model and return its environment to the pool. The problem cannot be used afterwards."""
+        if self._model is not None:
+            self._model.dispose()
+            self._model = None
+        if self._env is not None:
+            self.env_pool.release(self._env)
+            self._env = None
+
+    def _timed(self, step: str, function):
+        start = time.perf_counter()
+        try:
+            return function()
+        finally:
+            self.build_timings[step] = self.build_timings.get(step, 0.0) + time.perf_counter() - start
+
+    def _update(self):
+        self._timed("update", self._model.update)
+
+    def getParameters(self) -> dict:
+        """Validated Gurobi parameters requested in the "parameters" section of the problem."""
+        return dict(self._parameters)
+
+    def getOutputOptions(self) -> dict:
+        """Validated options of the "output" section of the problem, with defaults filled in."""
+        return dict(self._output)
     
     def getProblemAsLP(self) -> str:
         """
-        Write the LP problem to a file in LP format.
+        Return the problem in LP format. The text is written from the problem dict in memory,
+        a patched model and a model with objectives or scenarios are written by Gurobi.
         """
-        if self._model is not None:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".lp",mode='w+') as tmp:
-                try:
-                    self._model.write(tmp.name)
-                    tmp.seek(0)  # Move to the beginning of the file
-                    lp_string = tmp.read()
-                finally:
-                    tmp.close()
-                    os.unlink(tmp.name)
-            return lp_string
-        else:
+        if self._model is None:
+            return "Model is not created. Cannot write problem to file."
+        if self._patched or self._compiled.objectives or self._compiled.scenarios:
+            return self._writeModel(".lp")
+        return writeLP(self._compiled)
+
+    def getProblemAsMPS(self) -> str:
+        """
+        Return the problem in MPS format.
+        """
+        if self._model is None:
             return "Model is not created. Cannot write problem to file."
+        if self._patched or self._compiled.objectives or self._compiled.scenarios:
+            return self._writeModel(".mps")
+        return writeMPS(self._compiled)
+
+    def _writeModel(self, suffix: str) -> str:
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, mode='w+') as tmp:
+            try:
+                self._model.write(tmp.name)
+                tmp.seek(0)  # Move to the beginning of the file
+                return tmp.read()
+            finally:
+                tmp.close()
+                os.unlink(tmp.name)
     
+    def applyPatch(self, patch: dict) -> dict:
+        """
+        Modify the built model in place so a re-solve can warm start from the previous solve.
+        The patch may contain:
+        - "variables": {key: {"type", "name", "lb", "ub"}}. Existing keys are updated, new keys are added.
+        - "linear_constraints": [{"name", "lhs", "rhs", "sign"}]. A constraint whose name exists has the given fields
+          updated (lhs coefficients are set per variable, 0 removes a term), otherwise it is added.
+        - "remove_constraints": [name]. Linear or quadratic constraints to delete.
+        - "objective": {"type", "linear_terms"}. Sets the sense and the linear coefficient of the listed variables.
+        - "parameters": {name: value}. Updates the Gurobi parameters used by later solves.
+        Returns the number of changes applied per section. An invalid patch raises ValueError without changing the model.
+        """
+        if self._model is None:
+            raise ValueError("Model is not created. Cannot apply patch.")
+        applied = {"variables": 0, "linear_constraints": 0, "remove_constraints": 0, "objective": 0, "parameters": 0}
+        #The whole patch is checked before anything is changed, so a rejected patch leaves the model as it was
+        parameters = self._validatePatch(patch)
+        for key, var_info in patch.get("variables", {}).items():
+            self._patchVariable(key, var_info)
+            applied["variables"] += 1
+        self._model.update()
+        for constraint in patch.get("linear_constraints", []):
+            self._patchLinearConstraint(constraint)
+            applied["linear_constraints"] += 1
+        for name in patch.get("remove_constraints", []):
+            constr = self._model.getConstrByName(name)
+            if constr is None:
+                constr = next(qconstr for qconstr in self._model.getQConstrs() if qconstr.QCName == name)
+            self._model.remove(constr)
+            applied["remove_constraints"] += 1
+        objective = patch.get("objective", {})
+        if "type" in objective:
+            self._model.ModelSense = GRB.MAXIMIZE if objective["type"] == "maximize" else GRB.MINIMIZE
+            applied["objective"] += 1
+        for var, coef in objective.get("linear_terms", {}).items():
+            self._getVariable(var).Obj = coef
+            applied["objective"] += 1
+        self._parameters.update(parameters)
+        applied["parameters"] = len(parameters)
+        self._model.update()
+        self._patched = True
+        return applied
+
+    def _validatePatch(self, patch: dict) -> dict:
+        """Check every section of a patch against the model, raise ValueError on the first problem. Returns the validated parameters."""
+        if not isinstance(patch, dict):
+            raise ValueError("patch must be an object")
+        parameters = validateParameters(patch.get("parameters", {}))
+        variables = patch.get("variables", {})
+        if not isinstance(variables, dict):
+            raise ValueError("variables of a patch must be an object mapping variable keys to their changes")
+        for key, var_info in variables.items():
+            if not isinstance(var_info, dict):
+                raise ValueError(f"Variable {key} must be an object")
+            if "type" in var_info and var_info["type"] not in VARIABLE_TYPES:
+                raise ValueError(f"Unknown type {var_info['type']} of variable {key}. Use one of {list(VARIABLE_TYPES)}")
+            for bound in ("lb", "ub"):
+                if bound in var_info and not _isNumber(var_info[bound], allow_infinite=True):
+                    raise ValueError(f"{bound} of variable {key} must be a number, got {var_info[bound]!r}")
+        known_variables = set(self._gurobi_variables) | set(variables)
+        linear_names = {constr.ConstrName for constr in self._model.getConstrs()}
+        quadratic_names = {qconstr.QCName for qconstr in self._model.getQConstrs()}
+        constraints = patch.get("linear_constraints", [])
+        if not isinstance(constraints, list):
+            raise ValueError("linear_constraints of a patch must be a list")
+        for constraint in constraints:
+            if not isinstance(constraint, dict) or "name" not in constraint:
+                raise ValueError("Patched linear constraints must be objects with a name")
+            name = constraint["name"]
+            if "sign" in constraint and constraint["sign"] not in CONSTRAINT_SENSES:
+                raise ValueError(f"Unknown sign {constraint['sign']} in constraint: {name}")
+            if name not in linear_names:
+                missing = [field for field in ("lhs", "sign", "rhs") if field not in constraint]
+                if missing:
+                    raise ValueError(f"New constraint {name} needs {', '.join(missing)}")
+                linear_names.add(name)
+            if "rhs" in constraint and not _isNumber(constraint["rhs"], allow_infinite=True):
+                raise ValueError(f"rhs of constraint {name} must be a number, got {constraint['rhs']!r}")
+            self._validateTerms(constraint.get("lhs", {}), known_variables, f"lhs of constraint {name}")
+        removed = patch.get("remove_constraints", [])
+        if not isinstance(removed, list):
+            raise ValueError("remove_constraints of a patch must be a list of constraint names")
+        for name in removed:
+            if name not in linear_names and name not in quadratic_names:
+                raise ValueError(f"Unknown constraint {name} in remove_constraints")
+        objective = patch.get("objective", {})
+        if not isinstance(objective, dict):
+            raise ValueError("objective of a patch must be an object")
+        if "type" in objective and objective["type"] not in ("maximize", "minimize"):
+            raise ValueError(f"Unknown objective function type: {objective['type']}")
+        self._validateTerms(objective.get("linear_terms", {}), known_variables, "linear_terms of the objective")
+        return parameters
+
+    @staticmethod
+    def _validateTerms(terms, known_variables: set, where: str):
+        if not isinstance(terms, dict):
+            raise ValueError(f"{where} must be an object mapping variable keys to coefficients")
+        for var, coef in terms.items():
+            if var not in known_variables:
+                raise ValueError(f"Unknown variable {var}")
+            if not _isNumber(coef):
+                raise ValueError(f"Coefficient of {var} in {where} must be a number, got {coef!r}")
+
+    def storeSolutionAsStart(self):
+        """
+        Copy the current MIP incumbent into the Start attribute. Gurobi discards solution values as soon as
+        the model is modified, so this has to run right after a solve for the next solve to reuse it.
+        LP solves warm start from the retained basis without this.
+        """
+        if self._model is None or not self._model.IsMIP or self._model.SolCount == 0:
+            return
+        variables = self._model.getVars()
+        self._model.setAttr("Start", variables, self._model.getAttr("X", variables))
+
+    def _addStart(self):
+        """
+        Load the start values, hints and basis of the problem onto the model. Values come from the result named by
+        warm_start_from, overridden by the start of each variable. MIP models take them as a MIP start (Start).
+        Continuous models take the basis of the earlier result when it covers the whole model, else the values as PStart.
+        """
+        compiled = self._compiled
+        variables = self._column_variables
+        columns = np.flatnonzero(~np.isnan(compiled.hint))
+        if len(columns) > 0:
+            self._model.setAttr("VarHintVal", [variables[column] for column in columns], compiled.hint[columns].tolist())
+        start = compiled.start
+        is_mip = bool((compiled.vtype != GRB.CONTINUOUS).any())
+        if compiled.warm_start is not None:
+            if not is_mip and self._loadBasis(compiled.warm_start.get("basis")):
+                return
+            earlier = _warmStartValues(compiled.warm_start.get("solution"), compiled.var_names)
+            start = np.where(np.isnan(start), earlier, start)
+        columns = np.flatnonzero(~np.isnan(start))
+        if len(columns) > 0:
+            self._model.setAttr("Start" if is_mip else "PStart", [variables[column] for column in columns], start[columns].tolist())
+
+    def _addObjectives(self):
+        """Replace the objective by the objectives of a multi-objective problem, objective 0 being the objective section."""
+        variables = self._column_variables
+        for index, objective in enumerate(self._compiled.objectives):
+            expr = LinExpr(objective.vals.tolist(), [variables[column] for column in objective.cols])
+            expr.addConstant(objective.constant)
+            self._model.setObjectiveN(expr, index, priority=objective.priority, weight=objective.weight,
+                                      abstol=objective.abs_tol, reltol=objective.rel_tol, name=objective.name)
+
+    def _addScenarios(self):
+        """
+        Make the model a multi-scenario model solved in one optimize: scenario 0 is the problem as given,
+        and each scenario of the problem follows with its changes.
+        """
+        #ScenNRHS can only be set on constraints that are not pending, and getConstrs only lists them after an update
+        self._update()
+        constrs = self._model.getConstrs()
+        variables = self._column_variables
+        self._model.NumScenarios = len(self._compiled.scenarios) + 1
+        self._model.setParam("ScenarioNumber", 0)
+        self._model.ScenNName = BASE_SCENARIO
+        for number, scenario in enumerate(self._compiled.scenarios, start=1):
+            self._model.setParam("ScenarioNumber", number)
+            self._model.ScenNName = scenario.name
+            for change, (indices, values) in scenario.changes.items():
+                if len(indices) > 0:
+                    items = constrs if change == "rhs" else variables
+                    self._model.setAttr(SCENARIO_ATTRIBUTES[change], [items[index] for index in indices], values.tolist())
+
+    def _loadBasis(self, basis) -> bool:
+        """Set VBasis and CBasis from {"variables": {name: status}, "constraints": {name: status}} if it names every variable and linear constraint."""
+        compiled = self._compiled
+        if not isinstance(basis, dict):
+            return False
+        vbasis, cbasis = basis.get("variables") or {}, basis.get("constraints") or {}
+        if not all(name in vbasis for name in compiled.var_names) or not all(name in cbasis for name in compiled.constr_names):
+            return False
+        #Gurobi ignores a basis set on pending variables and constraints, and getConstrs only lists them after an update
+        self._update()
+        self._model.setAttr("VBasis", self._column_variables, [vbasis[name] for name in compiled.var_names])
+        if compiled.num_constrs > 0:
+            self._model.setAttr("CBasis", self._model.getConstrs(), [cbasis[name] for name in compiled.constr_names])
+        return True
+
+    def _getVariable(self, key: str):
+        if key not in self._gurobi_variables:
+            raise ValueError(f"Unknown variable {key}")
+        return self._gurobi_variables[key]
+
+    def _patchVariable(self, key: str, var_info: dict):
+        if key not in self._gurobi_variables:
+            add_var_parameters = {
+                "name": var_info.get("name", key),
+                "vtype": VARIABLE_TYPES[var_info.get("type", "continuous")]
+            }
+            if "lb" in var_info:
+                add_var_parameters["lb"] = var_info["lb"]
+            if "ub" in var_info:
+                add_var_parameters["ub"] = var_info["ub"]
+            self._gurobi_variables[key] = self._model.addVar(**add_var_parameters)
+            return
+        var = self._gurobi_variables[key]
+        if "type" in var_info:
+            var.VType = VARIABLE_TYPES[var_info["type"]]
+        if "lb" in var_info:
+            var.LB = var_info["lb"]
+        if "ub" in var_info:
+            var.UB = var_info["ub"]
+        if "name" in var_info:
+            var.VarName = var_info["name"]
+
+    def _patchLinearConstraint(self, constraint: dict):
+        if "name" not in constraint:
+            raise ValueError("Patched linear constraints must have a name")
+        if "sign" in constraint and constraint["sign"] not in CONSTRAINT_SENSES:
+            raise ValueError(f"Unknown sign {constraint['sign']} in constraint: {constraint['name']}")
+        constr = self._model.getConstrByName(constraint["name"])
+        if constr is None:
+            lhs_expr = quicksum(coef * self._getVariable(var) for var, coef in constraint["lhs"].items())
+            sense = CONSTRAINT_SENSES[constraint["sign"]]
+            self._model.addLConstr(lhs_expr, sense, constraint["rhs"], name=constraint["name"])
+            return
+        for var, coef in constraint.get("lhs", {}).items():
+            self._model.chgCoeff(constr, self._getVariable(var), coef)
+        if "rhs" in constraint:
+            constr.RHS = constraint["rhs"]
+        if "sign" in constraint:
+            constr.Sense = CONSTRAINT_SENSES[constraint["sign"]]
+
+    def _addVariablesMatrix(self):
+        compiled = self._compiled
+        mvars = self._model.addMVar(compiled.num_vars, lb=compiled.lb, ub=compiled.ub, vtype=compiled.vtype, name=compiled.var_names)
+        self._gurobi_variables = dict(zip(compiled.var_keys, mvars.tolist()))
+        self._mvars = mvars
+
+    def _addLinearConstraintsMatrix(self):
+        compiled = self._compiled
+        if compiled.num_constrs > 0:
+            self._model.addMConstr(compiled.A, self._mvars, compiled.sense, compiled.rhs, name=compiled.constr_names)
+        return True
+
+    def _addLinearObjectiveMatrix(self):
+        compiled = self._compiled
+        self._model.setMObjective(None, compiled.obj, compiled.obj_constant, xQ_L=None, xQ_R=None, xc=self._mvars, sense=compiled.obj_sense)
+
+    def _addQuadraticConstraintsMatrix(self):
+        for constraint in self._compiled.quadratic_constraints:
+            #Q over the columns the constraint uses, so each call stays the size of the constraint, not of the model
+            columns, local = np.unique(np.concatenate([constraint.q_rows, constraint.q_cols]), return_inverse=True)
+            count = len(constraint.q_rows)
+            Q = sp.csr_matrix((constraint.q_vals, (local[:count], local[count:])), shape=(len(columns), len(columns)))
+            xQ = self._mvars[columns]
+            self._model.addMQConstr(Q, constraint.lin_vals, constraint.sense, constraint.rhs,
+                                    xc=self._mvars[constraint.lin_cols], xQ_L=xQ, xQ_R=xQ, name=constraint.name)
+        return True
+
+    def _addQuadraticObjectiveMatrix(self):
+        compiled = self._compiled
+        Q = sp.csr_matrix((compiled.obj_q_vals, (compiled.obj_q_rows, compiled.obj_q_cols)), shape=(compiled.num_vars, compiled.num_vars))
+        self._model.setMObjective(Q, compiled.obj, compiled.obj_constant, xQ_L=self._mvars, xQ_R=self._mvars, xc=self._mvars, sense=compiled.obj_sense)
+
+    def _linearObjectiveExpression(self) -> LinExpr:
+        columns = self._compiled.obj.nonzero()[0]
+        expr = LinExpr(self._compiled.obj[columns].tolist(), [self._column_variables[column] for column in columns])
+        expr.addConstant(self._compiled.obj_constant)
+        return expr
+
     def _addLinearConstraints(self) -> bool:
         if self._model is None:
             raise ValueError("Model is not created. Cannot add constraints.")
-        
-        default_constr_index = 0
-        linear_constraints = self._constraints.get("linear_constraints", [])
-        
-        for constraint in linear_constraints:
-            lhs_expr = quicksum(constraint["lhs"][var] * self._gurobi_variables[var] for var in constraint["lhs"])
-            if constraint["sign"] == "<=":
-                self._model.addConstr(lhs_expr <= constraint["rhs"], name=constraint.get("name", "Constraint_" + str(default_constr_index)))
-            elif constraint["sign"] == "<":
-                self._model.addConstr(lhs_expr < constraint["rhs"], name=constraint.get("name", "Constraint_" + str(default_constr_index)))
-            elif constraint["sign"] == ">=":
-                self._model.addConstr(lhs_expr >= constraint["rhs"], name=constraint.get("name", "Constraint_" + str(default_constr_index)))
-            elif constraint["sign"] == ">":
-                self._model.addConstr(lhs_expr >= constraint["rhs"], name=constraint.get("name", "Constraint_" + str(default_constr_index)))
-            elif constraint["sign"] == "=":
-                self._model.addConstr(lhs_expr == constraint["rhs"], name=constraint.get("name", "Constraint_" + str(default_constr_index)))
-            else:
-                raise ValueError(f"Unknown sign {constraint['sign']} in constraint: {constraint.get('name', '')}")
-        
-            default_constr_index += 1
-        self._model.update()
+        if self._builder == "matrix":
+            return self._addLinearConstraintsMatrix()
+        compiled = self._compiled
+        A = compiled.A
+        for row, name in enumerate(compiled.constr_names):
+            start, end = A.indptr[row], A.indptr[row + 1]
+            lhs_expr = LinExpr(A.data[start:end].tolist(), [self._column_variables[column] for column in A.indices[start:end]])
+            self._model.addLConstr(lhs_expr, compiled.sense[row], compiled.rhs[row], name=name)
         return True
     
     def _addQuadraticConstraints(self):
         if self._model is None:
             raise ValueError("Model is not created. Cannot add quadratic constraints.")
-        counter=0
-        quadratic_constraints = self._constraints.get("quadratic_constraints", [])
-        for constraint in quadratic_constraints:
-            quad_terms = constraint.get("quadratic_terms", [])
-            linear_terms = constraint.get("linear_terms", {})
-            constant = constraint.get("constant", 0)
-            lhs_expr = quicksum(term["coef"] * self._gurobi_variables[term["var1"]] * self._gurobi_variables[term["var2"]] for term in quad_terms)
-            lhs_expr += quicksum(linear_terms[var] * self._gurobi_variables[var] for var in linear_terms)
-            lhs_expr += constant
-            if constraint["sign"] == "<=":
-                self._model.addQConstr(lhs_expr <= 0, name=constraint.get("name", "QuadraticConstraint_" + str(counter)))
-            elif constraint["sign"] == "<":
-                self._model.addQConstr(lhs_expr < 0, name=constraint.get("name", "QuadraticConstraint_" + str(counter)))
-            elif constraint["sign"] == ">=":
-                self._model.addQConstr(lhs_expr >= 0, name=constraint.get("name", "QuadraticConstraint_" + str(counter)))
-            elif constraint["sign"] == ">":
-                self._model.addQConstr(lhs_expr > 0, name=constraint.get("name", "QuadraticConstraint_" + str(counter)))
-            elif constraint["sign"] == "=":
-                self._model.addQConstr(lhs_expr == 0, name=constraint.get("name", "QuadraticConstraint_" + str(counter)))
-            else:
-                raise ValueError(f"Unknown sign {constraint['sign']} in quadratic constraint: {constraint.get('name', '')}")
-            counter += 1
-        self._model.update()
+        if self._builder == "matrix":
+            return self._addQuadraticConstraintsMatrix()
+        variables = self._column_variables
+        for constraint in self._compiled.quadratic_constraints:
+            lhs_expr = QuadExpr()
+            lhs_expr.addTerms(constraint.q_vals.tolist(), [variables[i] for i in constraint.q_rows], [variables[j] for j in constraint.q_cols])
+            lhs_expr.add(LinExpr(constraint.lin_vals.tolist(), [variables[column] for column in constraint.lin_cols]))
+            self._model.addQConstr(lhs_expr, constraint.sense, constraint.rhs, name=constraint.name)
         return True
     
     def _addVariables(self):
         if self._model is None:
             raise ValueError("Model is not created. Cannot add variables.")
-        for var in self._variables:
-            """
-            Define all the variables in the model.
-            Each variable is defined with its type, name, lower bound (lb), upper bound (ub).
-            Objective coefficient is not included in the variable definition.
-            The type, name, lb, and ub parameters are optional.
-            """
-            var_info = self._variables[var]
-            var_type = GRB.CONTINUOUS
-            #Check if var type is in info
-            if var_info.get("type")=="binary":
-                var_type = GRB.BINARY
-            elif var_info.get("type")=="integer":
-                var_type = GRB.INTEGER
-            elif var_info.get("type")=="semicontinuous":
-                var_type = GRB.SEMICONTINUOUS
-            elif var_info.get("type")=="semidefinite":
-                var_type = GRB.SEMIDEFINITE
-            add_var_parameters = {
-                "name": var_info.get("name", var),
-                "vtype": var_type
-            }
-            if "lb" in var_info:
-                add_var_parameters["lb"] = var_info["lb"]
-            if "ub" in var_info:
-                add_var_parameters["ub"] = var_info["ub"]
-
-            self._gurobi_variables[var] = self._model.addVar(**add_var_parameters)
-        
-        self._model.update() 
+        if self._builder == "matrix":
+            self._addVariablesMatrix()
+        else:
+            compiled = self._compiled
+            #One pre-sized addVars call instead of an addVar call per variable
+            variables = self._model.addVars(compiled.num_vars, lb=compiled.lb.tolist(), ub=compiled.ub.tolist(),
+                                            vtype=compiled.vtype.tolist(), name=compiled.var_names)
+            self._gurobi_variables = dict(zip(compiled.var_keys, variables.values()))
+        #Variables in column order, for the builders that work on compiled column indices
+        self._column_variables = list(self._gurobi_variables.values())
     
     def _addLinearObjective(self):
         if self._model is None:
             raise ValueError("Model is not created. Cannot add objective.")
-        
-        # Set the objective function
-        objective = self._objective
-        if objective["function_type"] != "linear":
-            raise ValueError("Objective function type must be linear for LP problems. Use QP or QCP for quadratic objectives.")
-        
-        if objective["type"]=="maximize":
-            obj_expr = quicksum(objective["linear_terms"][var] * self._gurobi_variables[var] for var in objective["linear_terms"])
-            self._model.setObjective(obj_expr, GRB.MAXIMIZE)
-        elif objective["type"]=="minimize":
-            obj_expr = quicksum(objective["linear_terms"][var] * self._gurobi_variables[var] for var in objective["linear_terms"])
-            self._model.setObjective(obj_expr, GRB.MINIMIZE)
-        else:
-            raise ValueError(f"Unknown objective function type: {objective['type']}")
+        if self._builder == "matrix":
+            return self._addLinearObjectiveMatrix()
+        self._model.setObjective(self._linearObjectiveExpression(), self._compiled.obj_sense)
 
-        self._model.update() 
     def _addQuadraticObjective(self):
         if self._model is None:
             raise ValueError("Model is not created. Cannot add objective.")
-        
-        # Set the objective function
-        objective = self._objective
-        if objective["function_type"] != "quadratic":
-            raise ValueError("Objective function type must be quadratic for QP problems. Use LP for linear objectives.")
-        
-        if objective["type"]=="maximize":
-            obj_expr = quicksum(term["coef"] * self._gurobi_variables[term["var1"]] * self._gurobi_variables[term["var2"]] for term in objective["quadratic_terms"])
-            obj_expr += quicksum(objective["linear_terms"][var] * self._gurobi_variables[var] for var in objective["linear_terms"])
-            self._model.setObjective(obj_expr, GRB.MAXIMIZE)
-        elif objective["type"]=="minimize":
-            obj_expr = quicksum(term["coef"] * self._gurobi_variables[term["var1"]] * self._gurobi_variables[term["var2"]] for term in objective["quadratic_terms"])
-            obj_expr += quicksum(objective["linear_terms"][var] * self._gurobi_variables[var] for var in objective["linear_terms"])
-            self._model.setObjective(obj_expr, GRB.MINIMIZE)
-        else:
-            raise ValueError(f"Unknown objective function type: {objective['type']}")
-
-        self._model.update()
-    
\ No newline at end of file
+        if self._builder == "matrix":
+            return self._addQuadraticObjectiveMatrix()
+        compiled = self._compiled
+        variables = self._column_variables
+        obj_expr = QuadExpr()
+        obj_expr.addTerms(compiled.obj_q_vals.tolist(), [variables[i] for i in compiled.obj_q_rows], [variables[j] for j in compiled.obj_q_cols])
+        obj_expr.add(self._linearObjectiveExpression())
+        self._model.setObjective(obj_expr, compiled.obj_sense)
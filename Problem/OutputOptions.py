@@ -0,0 +1,48 @@
+#Options of the "output" section of a problem, with their type and default.
+#They shape the result payload only and never change the model or the solve.
+OUTPUT_OPTIONS = {
+    "sparse": (bool, False),            #report only values whose magnitude exceeds tolerance
+    "tolerance": (float, 1e-9),
+    "variables": (list, None),          #glob patterns (fnmatch) on variable names, e.g. ["x_*", "flow[1,*]"]
+    "constraints": (list, None),        #glob patterns on constraint names for duals and slacks
+    "top_k": (int, None),               #keep the k entries of largest magnitude per vector
+    "encoding": (str, "object"),        #"object" {name: value} or "columnar" {"names", "values" base64 float64}
+    "duals": (bool, False),
+    "reduced_costs": (bool, False),
+    "slacks": (bool, False),
+    "basis": (bool, False),             #VBasis and CBasis of continuous models, for warm_start_from
+}
+
+ENCODINGS = ("object", "columnar")
+
+def validateOutputOptions(output: dict) -> dict:
+    """
+    Check the output section and fill in defaults.
+    Returns the complete options, raises ValueError listing every problem.
+    """
+    if output is None:
+        output = {}
+    if not isinstance(output, dict):
+        raise ValueError("output must be an object of output options")
+    options = {name: default for name, (_, default) in OUTPUT_OPTIONS.items()}
+    errors = []
+    for name, value in output.items():
+        if name not in OUTPUT_OPTIONS:
+            errors.append(f"unsupported output option {name}, supported options are {sorted(OUTPUT_OPTIONS)}")
+            continue
+        kind, _ = OUTPUT_OPTIONS[name]
+        if kind is bool and not isinstance(value, bool):
+            errors.append(f"output option {name} must be true or false, got {value!r}")
+        elif kind is float and (isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0):
+            errors.append(f"output option {name} must be a non-negative number, got {value!r}")
+        elif kind is int and (isinstance(value, bool) or not isinstance(value, int) or value < 1):
+            errors.append(f"output option {name} must be a positive integer, got {value!r}")
+        elif kind is list and (not isinstance(value, list) or not all(isinstance(pattern, str) for pattern in value)):
+            errors.append(f"output option {name} must be a list of name patterns, got {value!r}")
+        elif name == "encoding" and value not in ENCODINGS:
+            errors.append(f"output option encoding must be one of {list(ENCODINGS)}, got {value!r}")
+        else:
+            options[name] = float(value) if kind is float else value
+    if errors:
+        raise ValueError("Invalid output options: " + "; ".join(errors))
+    return options
@@ -0,0 +1,60 @@
+import math
+
+#Gurobi parameters that may be set through the "parameters" section of a problem, with their type and allowed range
+PARAMETER_SPECS = {
+    "TimeLimit": (float, 0, math.inf),
+    "MIPGap": (float, 0, math.inf),
+    "MIPGapAbs": (float, 0, math.inf),
+    "NodeLimit": (float, 0, math.inf),
+    "SolutionLimit": (int, 1, 2000000000),
+    "Threads": (int, 0, 1024),
+    "Method": (int, -1, 5),
+    "Presolve": (int, -1, 2),
+    "MIPFocus": (int, 0, 3),
+    "NumericFocus": (int, 0, 3),
+    "Cuts": (int, -1, 3),
+    "Heuristics": (float, 0, 1),
+    "NonConvex": (int, -1, 2),
+    "Seed": (int, 0, 2000000000),
+}
+
+def validateParameters(parameters: dict) -> dict:
+    """
+    Check parameter names against the whitelist and values against their type and range.
+    Returns the parameters converted to their declared type, raises ValueError listing every problem.
+    """
+    if parameters is None:
+        return {}
+    if not isinstance(parameters, dict):
+        raise ValueError("parameters must be an object mapping Gurobi parameter names to values")
+    validated = {}
+    errors = []
+    for name, value in parameters.items():
+        if name not in PARAMETER_SPECS:
+            errors.append(f"unsupported parameter {name}, supported parameters are {sorted(PARAMETER_SPECS)}")
+            continue
+        kind, low, high = PARAMETER_SPECS[name]
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            errors.append(f"parameter {name} must be a number, got {value!r}")
+            continue
+        if kind is int and (not math.isfinite(value) or value != int(value)):
+            errors.append(f"parameter {name} must be an integer, got {value!r}")
+            continue
+        if not low <= value <= high:
+            errors.append(f"parameter {name} must be between {low} and {high}, got {value!r}")
+            continue
+        validated[name] = kind(value)
+    if errors:
+        raise ValueError("Invalid parameters: " + "; ".join(errors))
+    return validated
+
+def resolveParameters(requested: dict, defaults: dict = None, caps: dict = None) -> dict:
+    """
+    Combine server defaults with the parameters requested by a problem, then clamp every value to its cap.
+    Caps also apply to parameters that neither the defaults nor the request set (e.g. a TimeLimit cap always applies).
+    """
+    resolved = dict(defaults or {})
+    resolved.update(requested or {})
+    for name, cap in (caps or {}).items():
+        resolved[name] = min(resolved.get(name, cap), cap)
+    return resolved
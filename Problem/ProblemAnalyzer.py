@@ -0,0 +1,101 @@
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+from gurobipy import GRB
+
+#Connected blocks of a quadratic form with more columns than this are not checked for convexity,
+#the check is a dense eigenvalue decomposition of the block
+PSD_CHECK_MAX_COLUMNS = 500
+#Eigenvalues within this fraction of the largest magnitude of a block count as zero
+PSD_TOLERANCE = 1e-9
+
+#Curvature of a quadratic form x'Qx: "zero", "psd", "nsd", "indefinite", or "unknown" when a block was too large to check
+CURVATURES = ("zero", "psd", "nsd", "indefinite", "unknown")
+
+def _blockCurvature(Q) -> str:
+    eigenvalues = np.linalg.eigvalsh(Q)
+    tolerance = PSD_TOLERANCE * max(1.0, float(np.abs(eigenvalues).max()))
+    psd = eigenvalues.min() >= -tolerance
+    nsd = eigenvalues.max() <= tolerance
+    if psd and nsd:
+        return "zero"
+    return "psd" if psd else "nsd" if nsd else "indefinite"
+
+def quadraticCurvature(rows, cols, vals) -> str:
+    """
+    Curvature of the quadratic form given by merged triplets (see mergeQuadraticTerms), checked block by block:
+    the columns are split into the connected components of the terms, and each component is checked on its own.
+    """
+    if len(vals) == 0:
+        return "zero"
+    columns, local = np.unique(np.concatenate([rows, cols]), return_inverse=True)
+    count = len(rows)
+    n = len(columns)
+    #Symmetric matrix of the form: x'Qx with Q upper triangular equals x'(Q + Q')/2 x
+    Q = sp.coo_matrix((vals, (local[:count], local[count:])), shape=(n, n))
+    Q = ((Q + Q.T) * 0.5).tocsr()
+    num_blocks, labels = connected_components(Q, directed=False)
+    curvatures = set()
+    for block in range(num_blocks):
+        members = np.flatnonzero(labels == block)
+        if len(members) > PSD_CHECK_MAX_COLUMNS:
+            curvatures.add("unknown")
+        else:
+            curvatures.add(_blockCurvature(Q[members][:, members].toarray()))
+        if "indefinite" in curvatures or {"psd", "nsd"} <= curvatures:
+            return "indefinite"
+    curvatures.discard("zero")
+    if not curvatures:
+        return "zero"
+    return curvatures.pop() if len(curvatures) == 1 else "unknown"
+
+def _convex(curvature: str, convex_curvature: str):
+    """True, False, or None when the curvature is unknown."""
+    if curvature == "unknown":
+        return None
+    return curvature in ("zero", convex_curvature)
+
+#What analyzeProblem found: the class the compiled problem actually belongs to, next to the one the problem declared
+class ProblemAnalysis:
+    def __init__(self, declared: str, integer: bool, category: str, convex):
+        self.declared = declared
+        self.integer = integer
+        self.category = category
+        self.convex = convex        #True, False, or None when a Q block was too large to check
+
+    @property
+    def detected(self) -> str:
+        return "MI" + self.category if self.integer else self.category
+
+    def report(self) -> dict:
+        return {"declared": self.declared, "detected": self.detected, "convex": self.convex}
+
+def analyzeProblem(compiled) -> ProblemAnalysis:
+    """
+    Classify a compiled problem from its content rather than its declared type: integrality, whether the objective
+    and constraints have quadratic terms, and whether they are convex. Sets compiled.category to the leanest model class
+    that can build the problem, compiled.analysis to the result, and NonConvex to 2 for a problem known to be nonconvex
+    unless the problem sets NonConvex itself.
+    """
+    integer = bool(np.any(compiled.vtype != GRB.CONTINUOUS))
+    if compiled.num_qconstrs > 0:
+        category = "QCP"
+    elif len(compiled.obj_q_vals) > 0:
+        category = "QP"
+    else:
+        category = "LP"
+    objective = quadraticCurvature(compiled.obj_q_rows, compiled.obj_q_cols, compiled.obj_q_vals)
+    convex = [_convex(objective, "nsd" if compiled.obj_sense == GRB.MAXIMIZE else "psd")]
+    for constraint in compiled.quadratic_constraints:
+        curvature = quadraticCurvature(constraint.q_rows, constraint.q_cols, constraint.q_vals)
+        if constraint.sense == GRB.EQUAL:
+            convex.append(curvature == "zero" if curvature != "unknown" else None)
+        else:
+            convex.append(_convex(curvature, "psd" if constraint.sense == GRB.LESS_EQUAL else "nsd"))
+    convex = False if False in convex else None if None in convex else True
+    analysis = ProblemAnalysis(compiled.problem_type, integer, category, convex)
+    compiled.category = category
+    compiled.analysis = analysis
+    if convex is False and "NonConvex" not in compiled.parameters:
+        compiled.parameters["NonConvex"] = 2
+    return analysis
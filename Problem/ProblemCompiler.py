@@ -0,0 +1,673 @@
+import itertools
+import math
+from array import array
+import numpy as np
+import scipy.sparse as sp
+from gurobipy import GRB
+from .Parameters import validateParameters
+from .OutputOptions import validateOutputOptions
+from .ProblemAnalyzer import analyzeProblem
+from .IndexedFamilies import (VariableFamily, compileSets, compileData, resolveSets, resolveReference,
+                              lookupValues, expandTerm, elementName)
+
+#Map the variable types of the problem schema to Gurobi variable types
+VARIABLE_TYPES = {
+    "continuous": GRB.CONTINUOUS,
+    "binary": GRB.BINARY,
+    "integer": GRB.INTEGER,
+    "semicontinuous": GRB.SEMICONT,
+}
+
+#Map the constraint signs of the problem schema to the senses used by the Gurobi matrix API
+CONSTRAINT_SENSES = {
+    "<=": GRB.LESS_EQUAL,
+    "<": GRB.LESS_EQUAL,
+    ">=": GRB.GREATER_EQUAL,
+    ">": GRB.GREATER_EQUAL,
+    "=": GRB.EQUAL,
+}
+
+#Problem types of the schema and the model class category they belong to
+PROBLEM_CATEGORIES = {
+    "LP": "LP", "MILP": "LP",
+    "QP": "QP", "MIQP": "QP",
+    "QCP": "QCP", "MIQCP": "QCP",
+}
+
+#Values of objective.function_type. Informational only, the quadratic_terms decide whether the objective is quadratic.
+OBJECTIVE_FUNCTION_TYPES = ("linear", "quadratic")
+
+#Engines a problem can name in its "backend" key, see Backends.selectBackend
+BACKENDS = ("auto", "gurobi", "scipy")
+
+#Modes of the "decomposition" key: solve as one model, solve independent blocks in parallel, or relax coupling
+#constraints in a Lagrangian loop over the blocks they link
+DECOMPOSITION_MODES = ("off", "blocks", "lagrangian")
+
+#Changes a scenario can make to the problem: objective coefficients and bounds by variable key, rhs by linear constraint name
+SCENARIO_CHANGES = ("objective", "rhs", "lb", "ub")
+#Name of scenario 0, the problem as given, which the scenarios of a multi-scenario problem follow
+BASE_SCENARIO = "base"
+
+#At most this many problems are listed in the message of a ProblemValidationError
+MAX_REPORTED_ERRORS = 20
+
+class ProblemValidationError(ValueError):
+    def __init__(self, errors: list):
+        self.errors = list(errors)
+        shown = "; ".join(self.errors[:MAX_REPORTED_ERRORS])
+        if len(self.errors) > MAX_REPORTED_ERRORS:
+            shown += f"; and {len(self.errors) - MAX_REPORTED_ERRORS} more"
+        super().__init__("Invalid problem: " + shown)
+
+#The linear part of a problem (variables, linear constraints and linear objective) compiled into flat arrays
+#that can be loaded in one call each with addMVar, addMConstr and setMObjective.
+class LinearArrays:
+    def __init__(self):
+        self.var_keys = []      #variable keys of the problem dict, in column order
+        self.var_index = {}     #variable key -> column index, for the variables section only
+        self.families = {}      #family name -> VariableFamily, whose elements follow the scalar variables
+        self.var_names = []
+        self.lb = None
+        self.ub = None
+        self.vtype = None
+        self.start = None       #MIP start (PStart for continuous models) per column, NaN where none was given
+        self.hint = None        #VarHintVal per column, NaN where none was given
+        self.A = None           #scipy.sparse CSR matrix with one row per linear constraint
+        self.sense = None
+        self.rhs = None
+        self.constr_names = []
+        self.obj = None         #dense objective coefficient vector
+        self.obj_constant = 0.0 #objective constant, only set for models read from an MPS or LP file
+        self.obj_sense = GRB.MINIMIZE
+
+    @property
+    def num_vars(self) -> int:
+        return len(self.var_keys)
+
+    @property
+    def num_constrs(self) -> int:
+        return len(self.constr_names)
+
+#One quadratic constraint: linear part, merged quadratic triplets (see mergeQuadraticTerms), sense and right hand side (minus the constant)
+class QuadraticConstraintArrays:
+    def __init__(self, name: str, lin_cols, lin_vals, q_rows, q_cols, q_vals, sense: str, rhs: float):
+        self.name = name
+        self.lin_cols = lin_cols
+        self.lin_vals = lin_vals
+        self.q_rows = q_rows
+        self.q_cols = q_cols
+        self.q_vals = q_vals
+        self.sense = sense
+        self.rhs = rhs
+
+#One objective of a multi-objective problem: linear terms, constant, and how Gurobi combines it with the others.
+#Objectives of equal priority are blended by weight, higher priorities are optimized first within abs_tol and rel_tol.
+class ObjectiveArrays:
+    def __init__(self, name: str, cols, vals, constant: float = 0.0, priority: int = 0, weight: float = 1.0,
+                 abs_tol: float = 1e-6, rel_tol: float = 0.0):
+        self.name = name
+        self.cols = cols
+        self.vals = vals
+        self.constant = constant
+        self.priority = priority
+        self.weight = weight
+        self.abs_tol = abs_tol
+        self.rel_tol = rel_tol
+
+#One scenario of a multi-scenario problem: change -> (indices, values) for each of SCENARIO_CHANGES
+class ScenarioArrays:
+    def __init__(self, name: str, changes: dict):
+        self.name = name
+        self.changes = changes
+
+#Intermediate representation of a validated problem that the model builders and the LP/MPS writers consume.
+#Every variable reference is resolved to a column index, so nothing downstream looks at the problem dict again.
+class CompiledProblem(LinearArrays):
+    def __init__(self):
+        super().__init__()
+        self.name = "OptimizationProblem"
+        self.problem_type = None
+        self.category = None            #"LP", "QP" or "QCP", the model class that builds the problem, set by analyzeProblem
+        self.obj_q_rows = None          #quadratic objective triplets, merged by mergeQuadraticTerms
+        self.obj_q_cols = None
+        self.obj_q_vals = None
+        self.quadratic_constraints = []
+        self.objectives = []            #ObjectiveArrays of a multi-objective problem, the objective section first, else empty
+        self.scenarios = []             #ScenarioArrays of a multi-scenario problem, solved after the base scenario
+        self.warm_start_from = None     #result_id of an earlier result to start from, resolved by the server
+        self.backend = None             #"auto", "gurobi" or "scipy", None for the server default
+        self.decomposition = None       #validated "decomposition" settings, None for the server default
+        self.analysis = None            #ProblemAnalysis of the content, set by analyzeProblem
+        self.warm_start = None          #that earlier result, set by the server before the build
+        self.parameters = {}
+        self.output = validateOutputOptions(None)
+
+    @property
+    def num_qconstrs(self) -> int:
+        return len(self.quadratic_constraints)
+
+def _isNumber(value, allow_infinite: bool = False) -> bool:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return False
+    if allow_infinite:
+        return not math.isnan(value)
+    return math.isfinite(value)
+
+def _checkName(name, kind: str, seen: set, errors: list):
+    if not isinstance(name, str) or not name:
+        errors.append(f"{kind} name must be a non-empty string, got {name!r}")
+    elif name in seen:
+        errors.append(f"Duplicate {kind} name {name}")
+    else:
+        seen.add(name)
+
+def compileVariables(variables: dict, arrays: LinearArrays, errors: list):
+    if not isinstance(variables, dict):
+        errors.append("variables must be an object mapping variable keys to their definition")
+        variables = {}
+    n = len(variables)
+    arrays.lb = np.zeros(n)
+    arrays.ub = np.full(n, np.inf)
+    arrays.vtype = np.full(n, GRB.CONTINUOUS)
+    arrays.start = np.full(n, np.nan)
+    arrays.hint = np.full(n, np.nan)
+    names = set()
+    for col, (key, var_info) in enumerate(variables.items()):
+        arrays.var_keys.append(key)
+        arrays.var_index[key] = col
+        if not isinstance(var_info, dict):
+            errors.append(f"Variable {key} must be an object")
+            arrays.var_names.append(key)
+            continue
+        name = var_info.get("name", key)
+        _checkName(name, "variable", names, errors)
+        arrays.var_names.append(name)
+        var_type = var_info.get("type", "continuous")
+        if var_type not in VARIABLE_TYPES:
+            errors.append(f"Unknown type {var_type} of variable {key}. Use one of {list(VARIABLE_TYPES)}")
+        else:
+            arrays.vtype[col] = VARIABLE_TYPES[var_type]
+        for bound in ("lb", "ub"):
+            if bound not in var_info:
+                continue
+            if not _isNumber(var_info[bound], allow_infinite=True):
+                errors.append(f"Bound {bound} of variable {key} must be a number, got {var_info[bound]!r}")
+            else:
+                getattr(arrays, bound)[col] = var_info[bound]
+        for value in ("start", "hint"):
+            if value not in var_info:
+                continue
+            if not _isNumber(var_info[value]):
+                errors.append(f"{value} of variable {key} must be a finite number, got {var_info[value]!r}")
+            else:
+                getattr(arrays, value)[col] = var_info[value]
+
+def _column(arrays: LinearArrays, key):
+    """Column of a variable key or of a family element such as x[Resource1,Job1], or None."""
+    column = arrays.var_index.get(key) if isinstance(key, str) else None
+    if column is None and arrays.families:
+        column = resolveReference(arrays.families, key)
+    return column
+
+def compileVariableFamilies(families: dict, sets: dict, data: dict, arrays: LinearArrays, errors: list):
+    """Append the columns of each family {"index": [set names], "type", "lb", "ub", "start", "hint"}; all but type may name data tables."""
+    if not isinstance(families, dict):
+        errors.append("variable_families must be an object mapping family names to their definition")
+        return
+    lbs, ubs, vtypes, starts, hints = [arrays.lb], [arrays.ub], [arrays.vtype], [arrays.start], [arrays.hint]
+    for name, family_info in families.items():
+        where = f"variable family {name}"
+        if not isinstance(family_info, dict):
+            errors.append(f"{where} must be an object")
+            continue
+        if not isinstance(name, str) or not name or "[" in name or "]" in name:
+            errors.append(f"Variable family name must be a non-empty string without brackets, got {name!r}")
+            continue
+        if name in arrays.var_index:
+            errors.append(f"Variable family {name} has the same name as a variable")
+            continue
+        family_sets = resolveSets(family_info.get("index"), sets, where, errors)
+        if family_sets is None:
+            continue
+        family = VariableFamily(name, family_sets, arrays.num_vars)
+        var_type = family_info.get("type", "continuous")
+        if var_type not in VARIABLE_TYPES:
+            errors.append(f"Unknown type {var_type} of {where}. Use one of {list(VARIABLE_TYPES)}")
+        bounds = []
+        for bound, default in (("lb", 0.0), ("ub", np.inf)):
+            value = family_info.get(bound, default)
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isinf(value):
+                bounds.append(float(value))
+            else:
+                bounds.append(lookupValues(value, data, family_sets, Ellipsis, f"{bound} of {where}", errors))
+        for value, values in (("start", starts), ("hint", hints)):
+            given = lookupValues(family_info[value], data, family_sets, Ellipsis, f"{value} of {where}", errors) if value in family_info else None
+            values.append(np.broadcast_to(given if given is not None else np.nan, family.shape).ravel())
+        names = family.names()
+        arrays.var_keys.extend(names)
+        arrays.var_names.extend(names)
+        lbs.append(np.broadcast_to(bounds[0] if bounds[0] is not None else 0.0, family.shape).ravel())
+        ubs.append(np.broadcast_to(bounds[1] if bounds[1] is not None else np.inf, family.shape).ravel())
+        vtypes.append(np.full(family.size, VARIABLE_TYPES.get(var_type, GRB.CONTINUOUS)))
+        arrays.families[name] = family
+    arrays.lb = np.concatenate(lbs).astype(float)
+    arrays.ub = np.concatenate(ubs).astype(float)
+    arrays.vtype = np.concatenate(vtypes)
+    arrays.start = np.concatenate(starts).astype(float)
+    arrays.hint = np.concatenate(hints).astype(float)
+
+def _compileLinearTerms(terms, where: str, arrays: LinearArrays, errors: list):
+    """Resolve {variable key: coefficient} to column and value lists."""
+    cols, vals = [], []
+    if not isinstance(terms, dict):
+        errors.append(f"Linear terms of {where} must be an object mapping variable keys to coefficients")
+        return cols, vals
+    for var, coef in terms.items():
+        column = _column(arrays, var)
+        if column is None:
+            errors.append(f"Unknown variable {var} in {where}")
+        elif not _isNumber(coef):
+            errors.append(f"Coefficient of {var} in {where} must be a finite number, got {coef!r}")
+        else:
+            cols.append(column)
+            vals.append(coef)
+    return cols, vals
+
+def _compileQuadraticTerms(terms, where: str, arrays: LinearArrays, errors: list):
+    """Resolve [{"var1", "var2", "coef"}] to row, column and value lists."""
+    rows, cols, vals = [], [], []
+    if not isinstance(terms, list):
+        errors.append(f"Quadratic terms of {where} must be a list")
+        return rows, cols, vals
+    for term in terms:
+        if not isinstance(term, dict) or not {"var1", "var2", "coef"} <= term.keys():
+            errors.append(f"Quadratic term {term!r} of {where} must have var1, var2 and coef")
+            continue
+        row, col = _column(arrays, term["var1"]), _column(arrays, term["var2"])
+        if row is None or col is None:
+            unknown = [term["var1"], term["var2"]] if row is None else [term["var2"]]
+            errors.append(f"Unknown variable {unknown[0]} in quadratic terms of {where}")
+        elif not _isNumber(term["coef"]):
+            errors.append(f"Coefficient of {term['var1']} * {term['var2']} in {where} must be a finite number, got {term['coef']!r}")
+        else:
+            rows.append(row)
+            cols.append(col)
+            vals.append(term["coef"])
+    return rows, cols, vals
+
+def mergeQuadraticTerms(rows, cols, vals, num_vars: int):
+    """
+    Canonicalize quadratic triplets to row <= col and sum duplicates, so x*y and y*x become one term.
+    Returns row, column and value arrays sorted by (row, col) without the terms that cancel out.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    width = max(num_vars, 1)
+    keys = np.minimum(rows, cols) * width + np.maximum(rows, cols)
+    keys, inverse = np.unique(keys, return_inverse=True)
+    sums = np.bincount(inverse, weights=np.asarray(vals, dtype=float), minlength=len(keys))
+    keep = sums != 0
+    keys = keys[keep]
+    return keys // width, keys % width, sums[keep]
+
+def _compileSense(constraint: dict, name: str, errors: list):
+    sign = constraint.get("sign")
+    if sign not in CONSTRAINT_SENSES:
+        errors.append(f"Unknown sign {sign} in constraint: {name}. Use one of {list(CONSTRAINT_SENSES)}")
+        return GRB.EQUAL
+    return CONSTRAINT_SENSES[sign]
+
+def _compileLinearConstraint(constraint, index: int, arrays: LinearArrays, names: set, errors: list):
+    """Validate linear constraint number index, append its name and return its columns, coefficients, sense and rhs."""
+    if not isinstance(constraint, dict):
+        errors.append(f"Linear constraint {index} must be an object")
+        arrays.constr_names.append("Constraint_" + str(index))
+        return [], [], GRB.EQUAL, 0.0
+    name = constraint.get("name", "Constraint_" + str(index))
+    _checkName(name, "constraint", names, errors)
+    arrays.constr_names.append(name)
+    if "lhs" not in constraint:
+        errors.append(f"Constraint {name} has no lhs")
+    cols, vals = _compileLinearTerms(constraint.get("lhs", {}), f"constraint {name}", arrays, errors)
+    sense = _compileSense(constraint, name, errors)
+    if not _isNumber(constraint.get("rhs")):
+        errors.append(f"rhs of constraint {name} must be a finite number, got {constraint.get('rhs')!r}")
+        return cols, vals, sense, 0.0
+    return cols, vals, sense, constraint["rhs"]
+
+def compileLinearConstraints(linear_constraints: list, arrays: LinearArrays, names: set, errors: list):
+    if not isinstance(linear_constraints, list):
+        errors.append("linear_constraints must be a list")
+        linear_constraints = []
+    m = len(linear_constraints)
+    rows, cols, vals = [], [], []
+    arrays.sense = np.full(m, GRB.EQUAL)
+    arrays.rhs = np.zeros(m)
+    for row, constraint in enumerate(linear_constraints):
+        row_cols, row_vals, arrays.sense[row], arrays.rhs[row] = _compileLinearConstraint(constraint, row, arrays, names, errors)
+        rows.extend([row] * len(row_cols))
+        cols.extend(row_cols)
+        vals.extend(row_vals)
+    arrays.A = sp.csr_matrix((np.asarray(vals, dtype=float), (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64))),
+                             shape=(m, arrays.num_vars))
+
+def compileLinearTemplates(templates: list, compiled: CompiledProblem, sets: dict, data: dict, names: set, errors: list):
+    """
+    Append the rows of each constraint template {"name", "over", "lhs", "sign", "rhs"}: one constraint per combination
+    of the index names in over ({index name: set name}), named name[labels], with lhs a list of term templates.
+    """
+    if not isinstance(templates, list):
+        errors.append("linear_templates must be a list")
+        return
+    rows, cols, vals, senses, rhss = [], [], [], [], []
+    added = 0
+    for index, template in enumerate(templates):
+        if not isinstance(template, dict):
+            errors.append(f"Linear constraint template {index} must be an object")
+            continue
+        name = template.get("name", "Template_" + str(index))
+        _checkName(name, "constraint", names, errors)
+        where = f"constraint template {name}"
+        over = template.get("over", {})
+        if not isinstance(over, dict) or any(set_name not in sets for set_name in over.values()):
+            errors.append(f"over of {where} must map index names to known sets")
+            continue
+        over = {index_name: sets[set_name] for index_name, set_name in over.items()}
+        over_sets = list(over.values())
+        shape = tuple(len(index_set) for index_set in over_sets)
+        count = math.prod(shape)
+        lhs = template.get("lhs")
+        if not isinstance(lhs, list):
+            errors.append(f"lhs of {where} must be a list of term templates")
+            continue
+        for term in lhs:
+            expanded = expandTerm(term, over, compiled.families, data, where, errors)
+            if expanded is not None:
+                rows.append(expanded[0] + added)
+                cols.append(expanded[1])
+                vals.append(expanded[2])
+        senses.append(np.full(count, _compileSense(template, name, errors)))
+        rhs = lookupValues(template.get("rhs"), data, over_sets, Ellipsis, f"rhs of {where}", errors)
+        rhss.append(np.broadcast_to(rhs if rhs is not None else 0.0, shape).astype(float).ravel())
+        if over:
+            compiled.constr_names.extend(elementName(name, labels) for labels in itertools.product(*(index_set.labels for index_set in over_sets)))
+        else:
+            compiled.constr_names.append(name)
+        added += count
+    if not senses:
+        return
+    block = sp.csr_matrix((np.concatenate(vals) if vals else np.zeros(0),
+                           (np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64),
+                            np.concatenate(cols) if cols else np.zeros(0, dtype=np.int64))),
+                          shape=(added, compiled.num_vars))
+    compiled.A = sp.vstack([compiled.A, block], format="csr")
+    compiled.sense = np.concatenate([compiled.sense] + senses)
+    compiled.rhs = np.concatenate([compiled.rhs] + rhss)
+
+def _compileQuadraticConstraint(constraint, index: int, compiled: CompiledProblem, names: set, errors: list):
+    if not isinstance(constraint, dict):
+        errors.append(f"Quadratic constraint {index} must be an object")
+        return
+    name = constraint.get("name", "QuadraticConstraint_" + str(index))
+    _checkName(name, "constraint", names, errors)
+    where = f"quadratic constraint {name}"
+    lin_cols, lin_vals = _compileLinearTerms(constraint.get("linear_terms", {}), where, compiled, errors)
+    q_rows, q_cols, q_vals = _compileQuadraticTerms(constraint.get("quadratic_terms", []), where, compiled, errors)
+    sense = _compileSense(constraint, name, errors)
+    constant = constraint.get("constant", 0)
+    if not _isNumber(constant):
+        errors.append(f"constant of {where} must be a finite number, got {constant!r}")
+        constant = 0
+    q_rows, q_cols, q_vals = mergeQuadraticTerms(q_rows, q_cols, q_vals, compiled.num_vars)
+    compiled.quadratic_constraints.append(QuadraticConstraintArrays(
+        name, np.asarray(lin_cols, dtype=np.int64), np.asarray(lin_vals, dtype=float),
+        q_rows, q_cols, q_vals, sense, -float(constant)))
+
+def compileQuadraticConstraints(quadratic_constraints: list, compiled: CompiledProblem, names: set, errors: list):
+    if not isinstance(quadratic_constraints, list):
+        errors.append("quadratic_constraints must be a list")
+        return
+    for index, constraint in enumerate(quadratic_constraints):
+        _compileQuadraticConstraint(constraint, index, compiled, names, errors)
+
+def compileConstraintStream(constraints, compiled: CompiledProblem, names: set, errors: list):
+    """
+    Compile an iterable of (section, constraint) pairs, section being "linear_constraints" or "quadratic_constraints",
+    one constraint at a time. The linear rows are collected in typed arrays and appended to A as one block,
+    so only the compiled form of the constraints is kept, never a list of the constraint dicts.
+    """
+    rows, cols, vals, rhs = array("q"), array("q"), array("d"), array("d")
+    senses = bytearray()
+    first = compiled.num_constrs
+    for section, constraint in constraints:
+        if section == "quadratic_constraints":
+            _compileQuadraticConstraint(constraint, compiled.num_qconstrs, compiled, names, errors)
+            continue
+        row = len(rhs)
+        row_cols, row_vals, sense, row_rhs = _compileLinearConstraint(constraint, first + row, compiled, names, errors)
+        rows.extend(itertools.repeat(row, len(row_cols)))
+        cols.extend(row_cols)
+        vals.extend(row_vals)
+        senses.append(ord(sense))
+        rhs.append(row_rhs)
+    if not rhs:
+        return
+    block = sp.csr_matrix((np.frombuffer(vals, dtype=float), (np.frombuffer(rows, dtype=np.int64), np.frombuffer(cols, dtype=np.int64))),
+                          shape=(len(rhs), compiled.num_vars))
+    compiled.A = sp.vstack([compiled.A, block], format="csr")
+    compiled.sense = np.concatenate([compiled.sense, np.frombuffer(bytes(senses), dtype="S1").astype(compiled.sense.dtype)])
+    compiled.rhs = np.concatenate([compiled.rhs, np.frombuffer(rhs, dtype=float)])
+
+def compileObjective(objective: dict, compiled: CompiledProblem, errors: list):
+    if not isinstance(objective, dict):
+        errors.append("objective must be an object")
+        objective = {}
+    if objective.get("type") == "maximize":
+        compiled.obj_sense = GRB.MAXIMIZE
+    elif objective.get("type") == "minimize":
+        compiled.obj_sense = GRB.MINIMIZE
+    else:
+        errors.append(f"Unknown objective function type: {objective.get('type')}")
+    compiled.obj = np.zeros(compiled.num_vars)
+    cols, vals = _compileLinearTerms(objective.get("linear_terms", {}), "the objective", compiled, errors)
+    np.add.at(compiled.obj, np.asarray(cols, dtype=np.int64), np.asarray(vals, dtype=float))
+    if objective.get("function_type", "linear") not in OBJECTIVE_FUNCTION_TYPES:
+        errors.append(f"Unknown objective function_type {objective.get('function_type')}. Use one of {list(OBJECTIVE_FUNCTION_TYPES)}")
+    #Quadratic terms are compiled whatever the declared types say, analyzeProblem classifies the problem by its content
+    rows, cols, vals = _compileQuadraticTerms(objective.get("quadratic_terms", []), "the objective", compiled, errors)
+    compiled.obj_q_rows, compiled.obj_q_cols, compiled.obj_q_vals = mergeQuadraticTerms(rows, cols, vals, compiled.num_vars)
+
+def compileObjectiveTemplates(templates: list, compiled: CompiledProblem, data: dict, errors: list):
+    """Add term templates that sum over every index, e.g. the cost of all assignments, to the linear objective."""
+    if not isinstance(templates, list):
+        errors.append("linear_templates of the objective must be a list")
+        return
+    for term in templates:
+        expanded = expandTerm(term, {}, compiled.families, data, "the objective", errors)
+        if expanded is not None:
+            np.add.at(compiled.obj, expanded[1], expanded[2])
+
+def _compileObjectiveSettings(settings: dict, where: str, errors: list) -> dict:
+    """priority, weight, abs_tol and rel_tol of one objective, Gurobi's defaults where they are not given."""
+    values = {"priority": 0, "weight": 1.0, "abs_tol": 1e-6, "rel_tol": 0.0}
+    for key in values:
+        if key not in settings:
+            continue
+        value = settings[key]
+        if key == "priority" and (isinstance(value, bool) or not isinstance(value, int)):
+            errors.append(f"priority of {where} must be an integer, got {value!r}")
+        elif key != "priority" and (not _isNumber(value) or (key != "weight" and value < 0)):
+            errors.append(f"{key} of {where} must be a {'finite' if key == 'weight' else 'nonnegative'} number, got {value!r}")
+        else:
+            values[key] = value
+    return values
+
+def compileObjectives(objectives: list, objective: dict, compiled: CompiledProblem, errors: list):
+    """
+    Compile the objectives of a multi-objective problem: the objective section (with its name, priority, weight,
+    abs_tol and rel_tol) becomes objective 0 and each entry {"name", "linear_terms", "constant", ...} follows.
+    """
+    if not isinstance(objectives, list):
+        errors.append("objectives must be a list")
+        return
+    if not objectives:
+        return
+    if len(compiled.obj_q_vals) > 0:
+        errors.append("objectives cannot be combined with quadratic terms in the objective, multi-objective problems are linear")
+    objective = objective if isinstance(objective, dict) else {}
+    names = set()
+    name = objective.get("name", "Objective_0")
+    _checkName(name, "objective", names, errors)
+    columns = np.flatnonzero(compiled.obj)
+    compiled.objectives.append(ObjectiveArrays(name, columns, compiled.obj[columns], compiled.obj_constant,
+                                               **_compileObjectiveSettings(objective, "the objective", errors)))
+    for index, entry in enumerate(objectives, start=1):
+        if not isinstance(entry, dict):
+            errors.append(f"Objective {index} must be an object")
+            continue
+        name = entry.get("name", "Objective_" + str(index))
+        _checkName(name, "objective", names, errors)
+        where = f"objective {name}"
+        cols, vals = _compileLinearTerms(entry.get("linear_terms", {}), where, compiled, errors)
+        constant = entry.get("constant", 0)
+        if not _isNumber(constant):
+            errors.append(f"constant of {where} must be a finite number, got {constant!r}")
+            constant = 0
+        compiled.objectives.append(ObjectiveArrays(name, np.asarray(cols, dtype=np.int64), np.asarray(vals, dtype=float), float(constant),
+                                                   **_compileObjectiveSettings(entry, where, errors)))
+
+def _compileScenarioChange(values, change: str, where: str, compiled: CompiledProblem, rows: dict, errors: list):
+    """Resolve {variable key or constraint name: value} of one change of a scenario to index and value arrays."""
+    kind = "linear constraint" if change == "rhs" else "variable"
+    indices, changed = [], []
+    if not isinstance(values, dict):
+        errors.append(f"{change} of {where} must be an object mapping {kind} names to values")
+        values = {}
+    for key, value in values.items():
+        index = rows.get(key) if change == "rhs" else _column(compiled, key)
+        if index is None:
+            errors.append(f"Unknown {kind} {key} in {change} of {where}")
+        elif not _isNumber(value, allow_infinite=change in ("lb", "ub")):
+            errors.append(f"{change} of {key} in {where} must be a number, got {value!r}")
+        else:
+            indices.append(index)
+            changed.append(value)
+    return np.asarray(indices, dtype=np.int64), np.asarray(changed, dtype=float)
+
+def compileScenarios(scenarios: list, compiled: CompiledProblem, errors: list):
+    """
+    Compile scenarios {"name", "objective": {variable: coef}, "rhs": {linear constraint: rhs}, "lb": {variable: lb},
+    "ub": {variable: ub}}, each a set of changes to the problem as given. Compiled after every constraint, rhs names any of them.
+    """
+    if not isinstance(scenarios, list):
+        errors.append("scenarios must be a list")
+        return
+    rows = {name: row for row, name in enumerate(compiled.constr_names)} if scenarios else {}
+    names = {BASE_SCENARIO}
+    for index, scenario in enumerate(scenarios, start=1):
+        if not isinstance(scenario, dict):
+            errors.append(f"Scenario {index} must be an object")
+            continue
+        name = scenario.get("name", "Scenario_" + str(index))
+        _checkName(name, "scenario", names, errors)
+        where = f"scenario {name}"
+        unknown = sorted(str(key) for key in scenario if key != "name" and key not in SCENARIO_CHANGES)
+        if unknown:
+            errors.append(f"Unknown keys {unknown} in {where}. Use name and {list(SCENARIO_CHANGES)}")
+        changes = {change: _compileScenarioChange(scenario.get(change, {}), change, where, compiled, rows, errors) for change in SCENARIO_CHANGES}
+        compiled.scenarios.append(ScenarioArrays(name, changes))
+
+def compileDecomposition(decomposition: dict, errors: list):
+    """
+    Validate {"mode", "coupling": [glob patterns on constraint names], "max_iterations", "time_limit"}, None if not given.
+    Keys left out take the server defaults.
+    """
+    if decomposition is None:
+        return None
+    if not isinstance(decomposition, dict):
+        errors.append("decomposition must be an object")
+        return None
+    unknown = sorted(str(key) for key in decomposition if key not in ("mode", "coupling", "max_iterations", "time_limit"))
+    if unknown:
+        errors.append(f"Unknown keys {unknown} in decomposition. Use mode, coupling, max_iterations and time_limit")
+    if decomposition.get("mode", "off") not in DECOMPOSITION_MODES:
+        errors.append(f"Unknown decomposition mode {decomposition.get('mode')!r}. Use one of {list(DECOMPOSITION_MODES)}")
+    coupling = decomposition.get("coupling", [])
+    if not isinstance(coupling, list) or not all(isinstance(pattern, str) for pattern in coupling):
+        errors.append("coupling of decomposition must be a list of constraint name patterns")
+    max_iterations = decomposition.get("max_iterations", 1)
+    if isinstance(max_iterations, bool) or not isinstance(max_iterations, int) or max_iterations < 1:
+        errors.append(f"max_iterations of decomposition must be a positive integer, got {max_iterations!r}")
+    time_limit = decomposition.get("time_limit", 1)
+    if not _isNumber(time_limit) or time_limit <= 0:
+        errors.append(f"time_limit of decomposition must be a positive number, got {time_limit!r}")
+    return dict(decomposition)
+
+def compileProblem(problem: dict, constraint_stream=None) -> CompiledProblem:
+    """
+    Validate a problem dict and compile it into a CompiledProblem in one pass over the problem.
+    constraint_stream optionally adds (section, constraint) pairs after the constraints of the dict, see compileConstraintStream.
+    Raises ProblemValidationError listing every problem found. No Gurobi model is created.
+    """
+    compiled = CompiledProblem()
+    errors = []
+    if not isinstance(problem, dict):
+        raise ProblemValidationError(["the problem must be an object"])
+    header = problem.get("problem")
+    if not isinstance(header, dict) or "type" not in header:
+        errors.append(f"Problem type is not specified. Set problem.type to one of {list(PROBLEM_CATEGORIES)}")
+    elif header["type"] not in PROBLEM_CATEGORIES:
+        errors.append(f"Unsupported problem type: {header['type']}. Use one of {list(PROBLEM_CATEGORIES)}")
+    else:
+        compiled.problem_type = header["type"]
+        compiled.name = header.get("name", "OptimizationProblem")
+
+    objective = problem.get("objective", {})
+    constraints = problem.get("constraints", {})
+    if not isinstance(constraints, dict):
+        errors.append("constraints must be an object with linear_constraints and quadratic_constraints lists")
+        constraints = {}
+
+    compileVariables(problem.get("variables", {}), compiled, errors)
+    sets = compileSets(problem.get("sets", {}), errors)
+    data = compileData(problem.get("data", {}), sets, errors)
+    compileVariableFamilies(problem.get("variable_families", {}), sets, data, compiled, errors)
+    constraint_names = set()
+    compileLinearConstraints(constraints.get("linear_constraints", []), compiled, constraint_names, errors)
+    compileLinearTemplates(constraints.get("linear_templates", []), compiled, sets, data, constraint_names, errors)
+    compileQuadraticConstraints(constraints.get("quadratic_constraints", []), compiled, constraint_names, errors)
+    if constraint_stream is not None:
+        compileConstraintStream(constraint_stream, compiled, constraint_names, errors)
+    compileObjective(objective, compiled, errors)
+    if isinstance(objective, dict):
+        compileObjectiveTemplates(objective.get("linear_templates", []), compiled, data, errors)
+    compileObjectives(problem.get("objectives", []), objective, compiled, errors)
+    compileScenarios(problem.get("scenarios", []), compiled, errors)
+    if compiled.objectives and compiled.scenarios:
+        errors.append("A problem cannot have both objectives and scenarios, Gurobi does not solve multi-scenario multi-objective models")
+    warm_start_from = problem.get("warm_start_from")
+    if warm_start_from is not None and (not isinstance(warm_start_from, str) or not warm_start_from):
+        errors.append(f"warm_start_from must be the result_id of an earlier result, got {warm_start_from!r}")
+    else:
+        compiled.warm_start_from = warm_start_from
+    backend = problem.get("backend")
+    if backend is not None and backend not in BACKENDS:
+        errors.append(f"Unknown backend {backend!r}. Use one of {list(BACKENDS)}")
+    else:
+        compiled.backend = backend
+    compiled.decomposition = compileDecomposition(problem.get("decomposition"), errors)
+    if compiled.decomposition is not None and compiled.decomposition.get("mode", "off") != "off" and (compiled.objectives or compiled.scenarios):
+        errors.append("A problem with objectives or scenarios cannot be decomposed, set decomposition mode to off")
+    try:
+        compiled.parameters = validateParameters(problem.get("parameters", {}))
+    except ValueError as e:
+        errors.append(str(e))
+    try:
+        compiled.output = validateOutputOptions(problem.get("output"))
+    except ValueError as e:
+        errors.append(str(e))
+    if errors:
+        raise ProblemValidationError(errors)
+    analyzeProblem(compiled)
+    return compiled
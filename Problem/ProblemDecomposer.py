@@ -0,0 +1,161 @@
+import copy
+import fnmatch
+import heapq
+import re
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+from .ProblemCompiler import CompiledProblem, QuadraticConstraintArrays
+from .ProblemAnalyzer import analyzeProblem
+
+#Splitting of block-structured problems into subproblems that can be solved on their own. The graph has a node per
+#variable, linear constraint and quadratic constraint, and an edge for every coefficient and quadratic objective term,
+#so each connected component is independent of the others. Components are packed into at most max_blocks blocks of
+#about equal size, so a problem with thousands of tiny components is not solved as thousands of models.
+
+#Coupling constraints detectCoupling may leave out of the graph to split a problem, as a fraction of the linear constraints
+MAX_COUPLING_FRACTION = 0.05
+
+#One subproblem of a decomposed problem and the columns, linear constraints and quadratic constraints it took from it
+class Block:
+    def __init__(self, problem: CompiledProblem, columns, rows, qrows):
+        self.problem = problem
+        self.columns = columns
+        self.rows = rows
+        self.qrows = qrows
+
+#The blocks of a decomposed problem and the linear constraints (coupling) left out of all of them
+class Decomposition:
+    def __init__(self, original: CompiledProblem, blocks: list, components: int, coupling):
+        self.original = original
+        self.blocks = blocks
+        self.components = components
+        self.coupling = coupling    #row indices of the coupling constraints, empty when the blocks are independent
+
+def variableComponents(compiled: CompiledProblem, coupling=None):
+    """
+    Connected component of every column, with the linear constraints in the boolean mask coupling left out of the graph.
+    Returns the number of components and the component label of each column.
+    """
+    n, m, q = compiled.num_vars, compiled.num_constrs, compiled.num_qconstrs
+    A = compiled.A.tocoo()
+    keep = np.ones(len(A.row), dtype=bool) if coupling is None else ~coupling[A.row]
+    heads = [A.col[keep], compiled.obj_q_rows]
+    tails = [n + A.row[keep], compiled.obj_q_cols]
+    for index, constraint in enumerate(compiled.quadratic_constraints):
+        columns = np.concatenate([constraint.lin_cols, constraint.q_rows, constraint.q_cols])
+        heads.append(columns)
+        tails.append(np.full(len(columns), n + m + index))
+    heads, tails = np.concatenate(heads).astype(np.int64), np.concatenate(tails).astype(np.int64)
+    graph = sp.coo_matrix((np.ones(len(heads)), (heads, tails)), shape=(n + m + q, n + m + q))
+    _, labels = connected_components(graph, directed=False)
+    components, labels = np.unique(labels[:n], return_inverse=True)
+    return len(components), labels
+
+def _couplingMask(compiled: CompiledProblem, patterns: list):
+    regex = re.compile("|".join(fnmatch.translate(pattern) for pattern in patterns))
+    return np.fromiter((regex.match(name) is not None for name in compiled.constr_names), dtype=bool, count=compiled.num_constrs)
+
+def _splits(compiled: CompiledProblem, coupling) -> bool:
+    """Whether at least two components are left with a constraint each once the coupling rows are left out."""
+    _, labels = variableComponents(compiled, coupling)
+    A = compiled.A[~coupling] if coupling is not None else compiled.A
+    constrained = np.unique(labels[np.unique(A.indices)])
+    return len(constrained) > 1
+
+def detectCoupling(compiled: CompiledProblem, max_rows: int = None):
+    """
+    Linear constraints that link otherwise independent blocks: the 1, 2, 4, ... densest rows, up to max_rows
+    (MAX_COUPLING_FRACTION of the rows by default), until leaving them out splits the problem. Returns a mask, empty
+    when the problem splits as it is, or None.
+    """
+    if _splits(compiled, None):
+        return np.zeros(compiled.num_constrs, dtype=bool)
+    if max_rows is None:
+        max_rows = max(1, int(MAX_COUPLING_FRACTION * compiled.num_constrs))
+    order = np.argsort(-np.diff(compiled.A.indptr), kind="stable")
+    count = 1
+    while count <= min(max_rows, compiled.num_constrs):
+        coupling = np.zeros(compiled.num_constrs, dtype=bool)
+        coupling[order[:count]] = True
+        if _splits(compiled, coupling):
+            return coupling
+        count *= 2
+    return None
+
+def _packComponents(labels, count: int, weights, max_blocks: int):
+    """Block of each component: the largest components first, each into the lightest block (longest processing time first)."""
+    sizes = np.bincount(labels, weights=weights, minlength=count)
+    blocks = [(0.0, block) for block in range(min(max_blocks, count))]
+    assignment = np.zeros(count, dtype=np.int64)
+    for component in np.argsort(-sizes, kind="stable"):
+        load, block = heapq.heappop(blocks)
+        assignment[component] = block
+        heapq.heappush(blocks, (load + sizes[component], block))
+    return assignment
+
+def _blockProblem(compiled: CompiledProblem, number: int, columns, rows, qrows) -> CompiledProblem:
+    block = copy.copy(compiled)
+    new_index = np.full(compiled.num_vars, -1, dtype=np.int64)
+    new_index[columns] = np.arange(len(columns))
+    block.name = f"{compiled.name}_block{number}"
+    block.var_keys = [compiled.var_keys[column] for column in columns]
+    block.var_index = {key: col for col, key in enumerate(block.var_keys)}
+    block.families = {}
+    block.var_names = [compiled.var_names[column] for column in columns]
+    block.lb, block.ub, block.vtype = compiled.lb[columns], compiled.ub[columns], compiled.vtype[columns]
+    block.start, block.hint = compiled.start[columns], compiled.hint[columns]
+    block.A = compiled.A[rows][:, columns].tocsr()
+    block.sense, block.rhs = compiled.sense[rows], compiled.rhs[rows]
+    block.constr_names = [compiled.constr_names[row] for row in rows]
+    block.obj = compiled.obj[columns]
+    #The objective constant is added once when the blocks are merged
+    block.obj_constant = 0.0
+    inside = np.isin(compiled.obj_q_rows, columns)
+    block.obj_q_rows, block.obj_q_cols = new_index[compiled.obj_q_rows[inside]], new_index[compiled.obj_q_cols[inside]]
+    block.obj_q_vals = compiled.obj_q_vals[inside]
+    block.quadratic_constraints = [
+        QuadraticConstraintArrays(constraint.name, new_index[constraint.lin_cols], constraint.lin_vals, new_index[constraint.q_rows],
+                                  new_index[constraint.q_cols], constraint.q_vals, constraint.sense, constraint.rhs)
+        for constraint in (compiled.quadratic_constraints[index] for index in qrows)]
+    #Warm starts name the columns and rows of the whole problem
+    block.decomposition, block.warm_start, block.warm_start_from = None, None, None
+    block.parameters = dict(compiled.parameters)
+    analyzeProblem(block)
+    return block
+
+def decomposeProblem(compiled: CompiledProblem, max_blocks: int, coupling=None):
+    """
+    Split a problem into at most max_blocks blocks of whole components, leaving out the linear constraints in the mask
+    coupling. Returns a Decomposition, or None when the problem is one component. Explicit zeros are dropped from A, in place.
+    """
+    compiled.A.eliminate_zeros()
+    if coupling is None:
+        coupling = np.zeros(compiled.num_constrs, dtype=bool)
+    count, labels = variableComponents(compiled, coupling)
+    if count < 2 or max_blocks < 2:
+        return None
+    #Components are weighed by their columns plus their coefficients
+    A = compiled.A
+    weights = 1.0 + np.bincount(A.indices, minlength=compiled.num_vars)
+    column_blocks = _packComponents(labels, count, weights, max_blocks)[labels]
+    #A row belongs to the block of its columns; empty rows go to block 0, which reports them if they are violated
+    nonempty = np.diff(A.indptr) > 0
+    row_blocks = np.zeros(compiled.num_constrs, dtype=np.int64)
+    row_blocks[nonempty] = column_blocks[A.indices[A.indptr[:-1][nonempty]]]
+    qrow_blocks = np.array([column_blocks[np.concatenate([constraint.lin_cols, constraint.q_rows])[0]]
+                            if len(constraint.lin_cols) + len(constraint.q_rows) > 0 else 0
+                            for constraint in compiled.quadratic_constraints], dtype=np.int64)
+    blocks = []
+    for number in range(column_blocks.max() + 1):
+        columns = np.flatnonzero(column_blocks == number)
+        rows = np.flatnonzero((row_blocks == number) & ~coupling)
+        qrows = np.flatnonzero(qrow_blocks == number)
+        blocks.append(Block(_blockProblem(compiled, number, columns, rows, qrows), columns, rows, qrows))
+    return Decomposition(compiled, blocks, count, np.flatnonzero(coupling))
+
+def couplingConstraints(compiled: CompiledProblem, patterns: list = None):
+    """The mask of the linear constraints named by the glob patterns, or detectCoupling when there are none."""
+    if patterns:
+        return _couplingMask(compiled, patterns)
+    return detectCoupling(compiled)
@@ -0,0 +1,19 @@
+from .OptimizationProblem import OptimizationProblem
+from .LP import LP
+from .QP import QP
+from .QCP import QCP
+from .ProblemCompiler import CompiledProblem, compileProblem
+
+def createProblem(problem, builder: str = None, lazy_update: bool = False) -> OptimizationProblem:
+    """
+    Validate and build a problem. problem is a problem dict or a CompiledProblem returned by compileProblem.
+    Raises ProblemValidationError before any Gurobi model is allocated if the problem is invalid.
+    The model class follows the content of the problem (see analyzeProblem), not its declared type,
+    so a QCP without quadratic constraints is built as a QP or LP.
+    With lazy_update the model is left with its additions pending, for callers that optimize or write it right away.
+    """
+    compiled = problem if isinstance(problem, CompiledProblem) else compileProblem(problem)
+    classes = {"LP": LP, "QP": QP, "QCP": QCP}
+    if compiled.category not in classes:
+        raise ValueError(f"Unsupported problem type: {compiled.problem_type}")
+    return classes[compiled.category](problem, builder, compiled, lazy_update)
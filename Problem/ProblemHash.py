@@ -0,0 +1,56 @@
+import hashlib
+import json
+
+#Canonical form and content hash of a problem dict.
+#Two problem dicts that describe the same model (key order, int vs float, omitted defaults) hash to the same key.
+
+def _normalize(value):
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    return value
+
+def _canonicalQuadraticTerms(terms: list) -> list:
+    terms = [{"var1": term["var1"], "var2": term["var2"], "coef": float(term["coef"])} for term in terms]
+    return sorted(terms, key=lambda term: (term["var1"], term["var2"], term["coef"]))
+
+def canonicalizeProblem(problem: dict) -> dict:
+    """
+    Return a normalized copy of the problem with all numbers as floats and default names and bounds filled in.
+    Sections that are not part of the base schema are kept, normalized, so they still distinguish problems.
+    """
+    canonical = _normalize(problem)
+    canonical["problem"]["name"] = problem["problem"].get("name", "OptimizationProblem")
+
+    objective = canonical.get("objective", {})
+    if "quadratic_terms" in objective:
+        objective["quadratic_terms"] = _canonicalQuadraticTerms(problem["objective"]["quadratic_terms"])
+
+    variables = canonical.get("variables", {})
+    for key, var_info in variables.items():
+        var_info.setdefault("type", "continuous")
+        var_info.setdefault("name", key)
+        var_info.setdefault("lb", 0.0)
+        var_info.setdefault("ub", float("inf"))
+
+    constraints = canonical.get("constraints", {})
+    if isinstance(constraints, dict):
+        for index, constraint in enumerate(constraints.get("linear_constraints", [])):
+            constraint.setdefault("name", "Constraint_" + str(index))
+            constraint["sign"] = {"<": "<=", ">": ">="}.get(constraint.get("sign"), constraint.get("sign"))
+        for index, constraint in enumerate(constraints.get("quadratic_constraints", [])):
+            constraint.setdefault("name", "QuadraticConstraint_" + str(index))
+            constraint.setdefault("constant", 0.0)
+            constraint.setdefault("linear_terms", {})
+            constraint["quadratic_terms"] = _canonicalQuadraticTerms(constraint.get("quadratic_terms", []))
+    return canonical
+
+def problemHash(problem: dict) -> str:
+    """SHA-256 hex digest of the canonical JSON form of the problem."""
+    canonical = json.dumps(canonicalizeProblem(problem), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
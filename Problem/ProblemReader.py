@@ -0,0 +1,340 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import gurobipy as gp
+from .OptimizationProblem import OptimizationProblem, SCENARIO_ATTRIBUTES
+from .ProblemCompiler import (CompiledProblem, QuadraticConstraintArrays, ObjectiveArrays, ScenarioArrays, ProblemValidationError,
+                              compileProblem, mergeQuadraticTerms)
+from .ProblemAnalyzer import analyzeProblem
+
+#Formats of problem files and the extensions they are recognized by. Any of them may be gzip compressed (.gz).
+FILE_FORMATS = {
+    "json": (".json",),
+    "jsonl": (".jsonl", ".ndjson"),
+    "mps": (".mps",),
+    "lp": (".lp",),
+}
+
+#The constraint arrays of a problem JSON document that are streamed instead of loaded
+STREAMED_SECTIONS = ("linear_constraints", "quadratic_constraints")
+
+_WHITESPACE = " \t\n\r"
+
+def fileFormat(path: str, file_format: str = None) -> str:
+    """The given file_format, or the format named by the extension of path."""
+    if file_format is not None:
+        if file_format not in FILE_FORMATS:
+            raise ValueError(f"Unsupported file format {file_format}. Use one of {list(FILE_FORMATS)}")
+        return file_format
+    name = path[:-3] if path.endswith(".gz") else path
+    for candidate, extensions in FILE_FORMATS.items():
+        if name.lower().endswith(extensions):
+            return candidate
+    raise ValueError(f"Cannot tell the format of {path} from its extension. Set file_format to one of {list(FILE_FORMATS)}")
+
+def _openText(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+#Incremental reader of one JSON document. Values are decoded one at a time with json's raw_decode from a buffer
+#that is refilled from the file, so an array of constraints can be walked element by element without loading the array.
+class JsonStream:
+    def __init__(self, file, chunk_size: int = 1 << 20):
+        self._file = file
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._consumed = 0      #characters dropped from the front of the buffer
+        self._eof = False
+
+    @property
+    def position(self) -> int:
+        """Characters read from the start of the document."""
+        return self._consumed + self._pos
+
+    def _fill(self, size: int = None) -> bool:
+        """Drop the part of the buffer already read and read at least size more characters. False at the end of the file."""
+        if self._eof:
+            return False
+        chunk = self._file.read(max(size or 0, self._chunk_size))
+        self._consumed += self._pos
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        self._eof = not chunk
+        return not self._eof
+
+    def skip(self, count: int):
+        """Move count characters forward, e.g. back to a position recorded on an earlier stream over the same file."""
+        while count > len(self._buffer) - self._pos:
+            count -= len(self._buffer) - self._pos
+            self._pos = len(self._buffer)
+            if not self._fill():
+                raise ValueError("Unexpected end of the JSON document")
+        self._pos += count
+
+    def peek(self) -> str:
+        """The next character that is not whitespace, without reading it, or "" at the end of the document."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer) or not self._fill():
+                return self._buffer[self._pos:self._pos + 1]
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} at character {self.position} of the JSON document, found {found or 'the end'!r}")
+        self._pos += 1
+
+    def value(self):
+        """Decode the next JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as e:
+                #Most likely the value continues past the buffer; read as much again so long values are decoded in linear time
+                if self._fill(len(self._buffer) - self._pos):
+                    continue
+                raise ValueError(f"Invalid JSON at character {self._consumed + e.pos} of the document: {e.msg}")
+            #A number at the end of the buffer may have more digits in the next chunk
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def _separator(self, first: bool, close: str) -> bool:
+        """Read the , before the next member or element, returning False at the closing bracket."""
+        if self.peek() == close:
+            self._pos += 1
+            return False
+        if not first:
+            self.expect(",")
+        return True
+
+    def members(self):
+        """Iterate the keys of the next object. The caller reads or skips the value of each key before the next one."""
+        self.expect("{")
+        first = True
+        while self._separator(first, "}"):
+            first = False
+            key = self.value()
+            if not isinstance(key, str):
+                raise ValueError(f"Expected an object key at character {self.position} of the JSON document")
+            self.expect(":")
+            yield key
+
+    def elements(self):
+        """Iterate the next array, yielding before each element. The caller reads or skips each element."""
+        self.expect("[")
+        first = True
+        while self._separator(first, "]"):
+            first = False
+            yield
+
+    def skipValue(self):
+        """Read past the next value. Arrays are read one element at a time, so a long array is never held at once."""
+        if self.peek() == "[":
+            for _ in self.elements():
+                self.value()
+        else:
+            self.value()
+
+def _readJsonHeader(path: str):
+    """
+    First pass over a problem JSON document: decode everything but the streamed constraint arrays,
+    and record the position of each of those arrays in the document.
+    """
+    header, positions = {}, {}
+    with _openText(path) as file:
+        stream = JsonStream(file)
+        for key in stream.members():
+            if key != "constraints" or stream.peek() != "{":
+                header[key] = stream.value()
+                continue
+            constraints = header["constraints"] = {}
+            for section in stream.members():
+                if section in STREAMED_SECTIONS and stream.peek() == "[":
+                    positions[section] = stream.position
+                    stream.skipValue()
+                else:
+                    constraints[section] = stream.value()
+        if stream.peek() != "":
+            raise ValueError(f"Unexpected content after the JSON document at character {stream.position}")
+    return header, positions
+
+def _streamJsonConstraints(path: str, positions: dict):
+    """Second pass: yield (section, constraint) for each element of the recorded constraint arrays."""
+    for section, position in positions.items():
+        with _openText(path) as file:
+            stream = JsonStream(file)
+            stream.skip(position)
+            for _ in stream.elements():
+                yield section, stream.value()
+
+def _streamJsonLines(file):
+    """Yield (section, constraint) for the constraint lines of a JSON Lines file, whose header line has been read."""
+    for number, line in enumerate(file, start=2):
+        if not line.strip():
+            continue
+        try:
+            constraint = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON on line {number}: {e.msg}")
+        section = "quadratic_constraints" if isinstance(constraint, dict) and "quadratic_terms" in constraint else "linear_constraints"
+        yield section, constraint
+
+def readJsonProblem(path: str) -> CompiledProblem:
+    """
+    Compile a problem JSON document, streaming its linear_constraints and quadratic_constraints arrays
+    into the compiler one constraint at a time. Everything else in the document is read as a whole.
+    """
+    header, positions = _readJsonHeader(path)
+    return compileProblem(header, _streamJsonConstraints(path, positions))
+
+def readJsonLinesProblem(path: str) -> CompiledProblem:
+    """
+    Compile a JSON Lines problem: the first line is a problem without its constraint lists, every further line is
+    one constraint, quadratic if it has quadratic_terms and linear otherwise. The lines are compiled as they are read.
+    """
+    with _openText(path) as file:
+        first = file.readline()
+        try:
+            header = json.loads(first)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON on line 1: {e.msg}")
+        return compileProblem(header, _streamJsonLines(file))
+
+def _problemType(model: gp.Model) -> str:
+    if model.NumQConstrs > 0:
+        problem_type = "QCP"
+    elif model.NumQNZs > 0:
+        problem_type = "QP"
+    else:
+        problem_type = "LP"
+    return "MI" + problem_type if model.IsMIP else problem_type
+
+def _modelObjectives(model: gp.Model, variables: list) -> list:
+    """ObjectiveArrays of each objective of a multi-objective model, none for a model with one objective."""
+    objectives = []
+    for index in range(model.NumObj if model.NumObj > 1 else 0):
+        model.setParam("ObjNumber", index)
+        obj = np.array(model.getAttr("ObjN", variables), dtype=float)
+        columns = np.flatnonzero(obj)
+        objectives.append(ObjectiveArrays(model.ObjNName or "Objective_" + str(index), columns, obj[columns], model.ObjNCon,
+                                          model.ObjNPriority, model.ObjNWeight, model.ObjNAbsTol, model.ObjNRelTol))
+    return objectives
+
+def _modelScenarios(model: gp.Model, variables: list, constraints: list) -> list:
+    """
+    ScenarioArrays of each scenario of a multi-scenario model, from the values a scenario sets (not GRB.UNDEFINED).
+    A scenario 0 without changes is the model itself, which is solved as the base scenario anyway.
+    """
+    scenarios = []
+    for number in range(model.NumScenarios):
+        model.setParam("ScenarioNumber", number)
+        changes = {}
+        for change, attribute in SCENARIO_ATTRIBUTES.items():
+            items = constraints if change == "rhs" else variables
+            values = np.array(model.getAttr(attribute, items), dtype=float) if items else np.zeros(0)
+            indices = np.flatnonzero(values != gp.GRB.UNDEFINED)
+            changes[change] = (indices, values[indices])
+        if number > 0 or any(len(indices) > 0 for indices, _ in changes.values()):
+            scenarios.append(ScenarioArrays(model.ScenNName or "Scenario_" + str(number + 1), changes))
+    return scenarios
+
+def compileModel(model: gp.Model) -> CompiledProblem:
+    """Copy the variables, constraints and objective of a Gurobi model into a CompiledProblem, keyed by variable name."""
+    unsupported = {"SOS constraints": model.NumSOS, "general constraints": model.NumGenConstrs}
+    unsupported = [kind for kind, count in unsupported.items() if count > 0]
+    if unsupported:
+        raise ProblemValidationError([f"The model has {kind}, which the problem format does not support" for kind in unsupported])
+    compiled = CompiledProblem()
+    compiled.name = model.ModelName or compiled.name
+    compiled.problem_type = _problemType(model)
+    variables = model.getVars()
+    constraints = model.getConstrs()
+    compiled.var_names = model.getAttr("VarName", variables)
+    compiled.var_keys = list(compiled.var_names)
+    compiled.var_index = {key: col for col, key in enumerate(compiled.var_keys)}
+    compiled.lb = np.array(model.getAttr("LB", variables), dtype=float)
+    compiled.ub = np.array(model.getAttr("UB", variables), dtype=float)
+    compiled.vtype = np.array(model.getAttr("VType", variables))
+    compiled.start = np.full(model.NumVars, np.nan)
+    compiled.hint = np.full(model.NumVars, np.nan)
+    compiled.A = model.getA().tocsr()
+    compiled.sense = np.array(model.getAttr("Sense", constraints))
+    compiled.rhs = np.array(model.getAttr("RHS", constraints), dtype=float)
+    compiled.constr_names = model.getAttr("ConstrName", constraints)
+    compiled.obj = np.array(model.getAttr("Obj", variables), dtype=float)
+    compiled.obj_constant = model.ObjCon
+    compiled.obj_sense = model.ModelSense
+    Q = model.getQ().tocoo()
+    compiled.obj_q_rows, compiled.obj_q_cols, compiled.obj_q_vals = mergeQuadraticTerms(Q.row, Q.col, Q.data, model.NumVars)
+    for qconstr in model.getQConstrs():
+        row = model.getQCRow(qconstr)
+        linear = row.getLinExpr()
+        q_rows, q_cols, q_vals = mergeQuadraticTerms([row.getVar1(i).index for i in range(row.size())],
+                                                     [row.getVar2(i).index for i in range(row.size())],
+                                                     [row.getCoeff(i) for i in range(row.size())], model.NumVars)
+        compiled.quadratic_constraints.append(QuadraticConstraintArrays(
+            qconstr.QCName,
+            np.array([linear.getVar(i).index for i in range(linear.size())], dtype=np.int64),
+            np.array([linear.getCoeff(i) for i in range(linear.size())], dtype=float),
+            q_rows, q_cols, q_vals, qconstr.QCSense, qconstr.QCRHS - linear.getConstant()))
+    compiled.objectives = _modelObjectives(model, variables)
+    compiled.scenarios = _modelScenarios(model, variables, constraints)
+    analyzeProblem(compiled)
+    return compiled
+
+def readModelProblem(path: str, file_format: str = None) -> CompiledProblem:
+    """
+    Read an MPS or LP file with Gurobi's reader and compile the model it describes.
+    Gurobi picks the format from the extension, so a file_format that the extension does not name is read
+    through a link with the right extension.
+    """
+    file_format = fileFormat(path, file_format)
+    compressed = path.endswith(".gz")
+    name = path[:-3] if compressed else path
+    if name.lower().endswith(FILE_FORMATS[file_format]):
+        return _readModelFile(path, path)
+    with tempfile.TemporaryDirectory() as directory:
+        link = os.path.join(directory, "model" + FILE_FORMATS[file_format][0] + (".gz" if compressed else ""))
+        try:
+            os.symlink(os.path.abspath(path), link)
+        except OSError:
+            shutil.copyfile(path, link)
+        return _readModelFile(link, path)
+
+def _readModelFile(path: str, shown_path: str) -> CompiledProblem:
+    env = OptimizationProblem.env_pool.acquire()
+    try:
+        try:
+            model = gp.read(path, env=env)
+        except gp.GurobiError as e:
+            raise ValueError(f"Cannot read {shown_path}: {e}")
+        try:
+            return compileModel(model)
+        finally:
+            model.dispose()
+    finally:
+        OptimizationProblem.env_pool.release(env)
+
+def readProblemFile(path: str, file_format: str = None) -> CompiledProblem:
+    """
+    Compile the problem in a local file: a problem JSON document, JSON Lines of constraints after a header line,
+    or an MPS or LP model. The format is taken from the extension unless file_format is given.
+    Raises ValueError, or ProblemValidationError for an invalid problem. No Gurobi model is built.
+    """
+    if not os.path.isfile(path):
+        raise ValueError(f"No such file: {path}")
+    file_format = fileFormat(path, file_format)
+    if file_format in ("mps", "lp"):
+        return readModelProblem(path, file_format)
+    readers = {"json": readJsonProblem, "jsonl": readJsonLinesProblem}
+    return readers[file_format](path)
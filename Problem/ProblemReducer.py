@@ -0,0 +1,123 @@
+import copy
+import numpy as np
+from gurobipy import GRB
+from .ProblemCompiler import CompiledProblem
+
+#Presolve-style reductions of a compiled problem before its model is built, aimed at the clutter of generated problems:
+#explicit zero coefficients, singleton rows that are really bounds, fixed variables (lb == ub), and variables that appear
+#in no constraint. The reduced problem is built and solved instead, and Reduction.expand maps its solution back
+#onto the columns of the original problem. Duplicate terms of one lhs are already summed by the compiler.
+
+#Violation below which an empty row counts as satisfied and is dropped
+REDUCTION_TOLERANCE = 1e-9
+
+#Mapping from a reduced problem back to the problem it came from
+class Reduction:
+    def __init__(self, original: CompiledProblem, reduced: CompiledProblem, columns, rows, values):
+        self.original = original
+        self.reduced = reduced
+        self.columns = columns      #original column of each column of the reduced problem
+        self.rows = rows            #original row of each linear constraint of the reduced problem
+        self.values = values        #values of the removed columns, NaN for the columns that were kept
+        self.stats = {"columns": original.num_vars - len(columns), "rows": original.num_constrs - len(rows), "bounds": 0}
+
+    def expand(self, x) -> np.ndarray:
+        """The values of all original columns, from the values x of the reduced columns."""
+        full = self.values.copy()
+        full[self.columns] = x
+        return full
+
+def _shapeReducible(compiled: CompiledProblem) -> bool:
+    """
+    Rows and columns are only removed when nothing asks for values the reduced model cannot give back:
+    duals, reduced costs and the basis, a basis to warm start from, or quadratic constraints, whose slacks Gurobi computes.
+    Objectives and scenarios refer to the columns and rows as given, so their problems are kept whole too.
+    """
+    output = compiled.output
+    if compiled.category not in ("LP", "QP") or output["duals"] or output["reduced_costs"] or output["basis"]:
+        return False
+    if compiled.objectives or compiled.scenarios:
+        return False
+    return not (compiled.warm_start is not None and compiled.warm_start.get("basis"))
+
+def _tightenSingletons(compiled: CompiledProblem, protected, lb, ub, keep_rows) -> int:
+    """Turn rows with one coefficient on an unprotected column into bounds on that column. Returns how many rows were turned."""
+    A = compiled.A
+    singletons = np.flatnonzero(np.diff(A.indptr) == 1)
+    cols = A.indices[A.indptr[singletons]]
+    singletons, cols = singletons[~protected[cols]], cols[~protected[cols]]
+    coefs = A.data[A.indptr[singletons]]
+    bounds = compiled.rhs[singletons] / coefs
+    sense = compiled.sense[singletons]
+    #a * x <= b is an upper bound for a > 0 and a lower bound for a < 0, and the other way round for >=
+    upper = (sense == GRB.EQUAL) | ((sense == GRB.LESS_EQUAL) == (coefs > 0))
+    lower = (sense == GRB.EQUAL) | ((sense == GRB.GREATER_EQUAL) == (coefs > 0))
+    np.minimum.at(ub, cols[upper], bounds[upper])
+    np.maximum.at(lb, cols[lower], bounds[lower])
+    keep_rows[singletons] = False
+    return len(singletons)
+
+def _removedValues(compiled: CompiledProblem, protected, lb, ub, used):
+    """Values of the columns that can be removed: fixed columns, and unused columns at the bound their objective prefers."""
+    fixed = (lb == ub) & np.isfinite(lb)
+    direction = compiled.obj * (-1.0 if compiled.obj_sense == GRB.MAXIMIZE else 1.0)
+    best = np.where(direction > 0, lb, np.where(direction < 0, ub, np.clip(0.0, lb, ub)))
+    unused = ~used & (lb <= ub) & np.isfinite(best)
+    removed = (fixed | unused) & ~protected
+    values = np.full(compiled.num_vars, np.nan)
+    values[removed] = np.where(fixed, lb, best)[removed]
+    return values
+
+def reduceProblem(compiled: CompiledProblem):
+    """
+    Return the problem to build and the Reduction that maps its solution back, or the problem itself and None
+    when no row or column could be removed. Explicit zeros are always dropped from A, in place.
+    """
+    compiled.A.eliminate_zeros()
+    if not _shapeReducible(compiled):
+        return compiled, None
+    integer = (compiled.vtype == GRB.BINARY) | (compiled.vtype == GRB.INTEGER)
+    #Columns in quadratic terms and semicontinuous columns keep their rows and bounds as they are
+    protected = compiled.vtype == GRB.SEMICONT
+    protected[compiled.obj_q_rows] = True
+    protected[compiled.obj_q_cols] = True
+    lb, ub = compiled.lb.copy(), compiled.ub.copy()
+    keep_rows = np.ones(compiled.num_constrs, dtype=bool)
+    bounds = _tightenSingletons(compiled, protected, lb, ub, keep_rows)
+    lb[integer] = np.ceil(lb[integer] - REDUCTION_TOLERANCE)
+    ub[integer] = np.floor(ub[integer] + REDUCTION_TOLERANCE)
+    used = np.bincount(compiled.A[keep_rows].indices, minlength=compiled.num_vars) > 0
+    values = _removedValues(compiled, protected, lb, ub, used)
+    keep_cols = np.isnan(values)
+    removed = np.flatnonzero(~keep_cols)
+    rhs = compiled.rhs - compiled.A[:, removed] @ values[removed]
+    A = compiled.A[keep_rows][:, keep_cols]
+    rhs, sense = rhs[keep_rows], compiled.sense[keep_rows]
+    #Rows left without coefficients are dropped when 0 <sense> rhs holds, a violated one stays for Gurobi to report
+    empty = np.diff(A.indptr) == 0
+    satisfied = np.where(sense == GRB.LESS_EQUAL, rhs >= -REDUCTION_TOLERANCE,
+                         np.where(sense == GRB.GREATER_EQUAL, rhs <= REDUCTION_TOLERANCE, np.abs(rhs) <= REDUCTION_TOLERANCE))
+    rows = np.flatnonzero(keep_rows)
+    keep = ~(empty & satisfied)
+    rows, A, rhs, sense = rows[keep], A[keep], rhs[keep], sense[keep]
+    columns = np.flatnonzero(keep_cols)
+    if len(columns) == compiled.num_vars and len(rows) == compiled.num_constrs:
+        return compiled, None
+
+    reduced = copy.copy(compiled)
+    reduced.var_keys = [compiled.var_keys[column] for column in columns]
+    reduced.var_index = {key: col for col, key in enumerate(reduced.var_keys)}
+    reduced.families = {}
+    reduced.var_names = [compiled.var_names[column] for column in columns]
+    reduced.lb, reduced.ub, reduced.vtype = lb[columns], ub[columns], compiled.vtype[columns]
+    reduced.start, reduced.hint = compiled.start[columns], compiled.hint[columns]
+    reduced.A, reduced.sense, reduced.rhs = A.tocsr(), sense, rhs
+    reduced.constr_names = [compiled.constr_names[row] for row in rows]
+    reduced.obj = compiled.obj[columns]
+    reduced.obj_constant = compiled.obj_constant + float(compiled.obj[removed] @ values[removed])
+    new_index = np.full(compiled.num_vars, -1, dtype=np.int64)
+    new_index[columns] = np.arange(len(columns))
+    reduced.obj_q_rows, reduced.obj_q_cols = new_index[compiled.obj_q_rows], new_index[compiled.obj_q_cols]
+    reduction = Reduction(compiled, reduced, columns, rows, values)
+    reduction.stats["bounds"] = bounds
+    return reduced, reduction
@@ -0,0 +1,324 @@
+import math
+from .ProblemCompiler import CompiledProblem, compileProblem
+from gurobipy import GRB
+
+#Writes a problem dict (or its CompiledProblem) as LP or MPS text without building a Gurobi model.
+#The LP output follows the layout of Gurobi's own LP writer (term order, number format and line wrapping)
+#so it matches Model.write() for the same problem.
+
+LINE_WIDTH = 75
+LP_SENSES = {GRB.LESS_EQUAL: "<=", GRB.GREATER_EQUAL: ">=", GRB.EQUAL: "="}
+MPS_SENSES = {GRB.LESS_EQUAL: "L", GRB.GREATER_EQUAL: "G", GRB.EQUAL: "E"}
+
+#Gurobi drops constraint and quadratic coefficients smaller than this
+DROP_TOLERANCE = 1e-13
+
+def _isInfinite(value: float) -> bool:
+    #Gurobi treats bounds of 1e30 and beyond as infinite
+    return abs(value) >= 1e30
+
+def formatNumber(value: float) -> str:
+    """Format a number the way Gurobi's LP writer does."""
+    value = float(value)
+    if value == 0:
+        return "0"
+    #Six significant digits when that is within 1e-10 of the value, full precision otherwise
+    short = "%g" % value
+    if abs(float(short) - value) <= 1e-10:
+        return short
+    magnitude = abs(value)
+    if magnitude >= 1e6 or magnitude < 1e-3:
+        mantissa, exponent = ("%.16e" % value).split("e")
+        return mantissa.rstrip("0").rstrip(".") + "e" + exponent
+    if magnitude < 0.1:
+        return "%.15g" % value
+    return "%.16g" % value
+
+def _formatMPSNumber(value: float) -> str:
+    value = float(value)
+    if _isInfinite(value):
+        return "1e+100" if value > 0 else "-1e+100"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+#Compiled problem arranged the way the LP and MPS writers need it
+class _ProblemView:
+    def __init__(self, compiled: CompiledProblem):
+        self.name = compiled.name
+        self.maximize = compiled.obj_sense == GRB.MAXIMIZE
+        self.var_keys = compiled.var_keys
+        self.var_names = compiled.var_names
+        self.vtypes = compiled.vtype.tolist()
+        self.lb = compiled.lb.tolist()
+        self.ub = compiled.ub.tolist()
+        for column, vtype in enumerate(self.vtypes):
+            lb, ub = self.lb[column], self.ub[column]
+            if vtype in (GRB.BINARY, GRB.INTEGER) and lb != ub:
+                #Gurobi rounds the bounds of integer variables inward unless the variable is fixed
+                self.lb[column] = lb if _isInfinite(lb) else float(math.ceil(lb))
+                self.ub[column] = ub if _isInfinite(ub) else float(math.floor(ub))
+
+        columns = compiled.obj.nonzero()[0]
+        self.obj = self._linear(columns, compiled.obj[columns], tolerance=0.0)
+        self.obj_q = self._quadratic(compiled.obj_q_rows, compiled.obj_q_cols, compiled.obj_q_vals)
+
+        A = compiled.A
+        self.rows = []
+        for row, name in enumerate(compiled.constr_names):
+            start, end = A.indptr[row], A.indptr[row + 1]
+            self.rows.append((name, self._linear(A.indices[start:end], A.data[start:end]), compiled.sense[row], float(compiled.rhs[row])))
+        self.qrows = []
+        for constraint in compiled.quadratic_constraints:
+            self.qrows.append((constraint.name,
+                               self._linear(constraint.lin_cols, constraint.lin_vals),
+                               self._quadratic(constraint.q_rows, constraint.q_cols, constraint.q_vals, grouped=False),
+                               constraint.sense, constraint.rhs))
+
+    def unusedColumns(self) -> set:
+        """Columns that appear in no constraint and have no objective term."""
+        used = {column for column, _ in self.obj}
+        used.update(index for i, j, _ in self.obj_q for index in (i, j))
+        for _, terms, _, _ in self.rows:
+            used.update(column for column, _ in terms)
+        for _, terms, qterms, _, _ in self.qrows:
+            used.update(column for column, _ in terms)
+            used.update(index for i, j, _ in qterms for index in (i, j))
+        return set(range(len(self.var_keys))) - used
+
+    def _linear(self, columns, values, tolerance: float = DROP_TOLERANCE) -> list:
+        """Merge linear terms into (column, coefficient) pairs sorted by column, dropping coefficients within tolerance of zero."""
+        merged = {}
+        for column, coef in zip(columns.tolist(), values.tolist()):
+            merged[column] = merged.get(column, 0.0) + coef
+        return [(column, coef) for column, coef in sorted(merged.items()) if coef != 0 and abs(coef) >= tolerance]
+
+    def _quadratic(self, rows, columns, values, grouped: bool = True) -> list:
+        """
+        Merge quadratic terms into (i, j, coefficient) with i <= j, dropping coefficients below DROP_TOLERANCE.
+        Objective terms are grouped by their lower column and keep their first appearance order within a group,
+        constraint terms are sorted by (i, j).
+        """
+        merged = {}
+        for i, j, coef in zip(rows.tolist(), columns.tolist(), values.tolist()):
+            pair = (min(i, j), max(i, j))
+            merged[pair] = merged.get(pair, 0.0) + coef
+        pairs = sorted(merged, key=lambda pair: pair[0]) if grouped else sorted(merged)
+        return [(i, j, merged[(i, j)]) for i, j in pairs if abs(merged[(i, j)]) >= DROP_TOLERANCE]
+
+def _compile(problem) -> CompiledProblem:
+    compiled = problem if isinstance(problem, CompiledProblem) else compileProblem(problem)
+    if compiled.objectives or compiled.scenarios:
+        raise ValueError("Problems with objectives or scenarios cannot be written without building their model")
+    return compiled
+
+class _LineWrapper:
+    def __init__(self, lines: list, start: str, first_width: int = LINE_WIDTH, continuation: str = "  "):
+        self._lines = lines
+        self._line = start
+        self._extra = first_width - LINE_WIDTH
+        self._continuation = continuation
+
+    def add(self, token: str, width: int = LINE_WIDTH):
+        if len(self._line) + len(token) > width + self._extra and self._line.strip():
+            self._lines.append(self._line)
+            self._line = self._continuation
+            self._extra = 0
+        self._line += token
+
+    def finish(self, suffix: str = ""):
+        self._lines.append(self._line + suffix)
+
+def _linearTokens(view: _ProblemView, terms: list) -> list:
+    tokens = []
+    for column, coef in terms:
+        sign = "-" if coef < 0 else "+"
+        magnitude = abs(coef)
+        body = view.var_names[column] if magnitude == 1 else formatNumber(magnitude) + " " + view.var_names[column]
+        if not tokens and sign == "+":
+            tokens.append(" " + body)
+        else:
+            tokens.append(f" {sign} {body}")
+    return tokens
+
+def _quadraticTokens(view: _ProblemView, terms: list, scale: float, after_linear: bool) -> list:
+    tokens = [" + [" if after_linear else " ["]
+    for index, (i, j, coef) in enumerate(terms):
+        coef *= scale
+        sign = "-" if coef < 0 else "+"
+        magnitude = abs(coef)
+        product = f"{view.var_names[i]} ^2" if i == j else f"{view.var_names[i]} * {view.var_names[j]}"
+        body = product if magnitude == 1 else formatNumber(magnitude) + " " + product
+        if index == 0 and sign == "+":
+            tokens.append(" " + body)
+        else:
+            tokens.append(f" {sign} {body}")
+    return tokens
+
+def _binaryBounds(lb: float, ub: float):
+    """The bounds Gurobi keeps for a binary column: rounded inwards to integers and clipped to [0, 1], possibly crossed."""
+    return max(math.ceil(lb), 0) if math.isfinite(lb) else 0, min(math.floor(ub), 1) if math.isfinite(ub) else 1
+
+def _boundLine(name: str, vtype: str, lb: float, ub: float):
+    if vtype == GRB.BINARY:
+        lb, ub = _binaryBounds(lb, ub)
+        if lb == 0 and ub == 1:
+            return None
+    if lb == ub:
+        return f" {name} = {formatNumber(lb)}"
+    if _isInfinite(lb) and _isInfinite(ub):
+        return f" {name} free"
+    if _isInfinite(lb):
+        return f" -infinity <= {name} <= {formatNumber(ub)}"
+    if _isInfinite(ub):
+        return None if lb == 0 else f" {name} >= {formatNumber(lb)}"
+    if lb == 0:
+        return f" {name} <= {formatNumber(ub)}"
+    return f" {formatNumber(lb)} <= {name} <= {formatNumber(ub)}"
+
+def _nameList(lines: list, header: str, names: list):
+    if not names:
+        return
+    lines.append(header)
+    wrapper = _LineWrapper(lines, "", continuation="")
+    for name in names:
+        wrapper.add(" " + name)
+    wrapper.finish()
+
+def writeLP(problem) -> str:
+    """Return the problem in LP format."""
+    view = _ProblemView(_compile(problem))
+    lines = []
+    if view.name:
+        lines.append(f"\\ Model {view.name}")
+    lines.append("\\ LP format - for model browsing. Use MPS format to capture full model detail.")
+    lines.append("Maximize" if view.maximize else "Minimize")
+    #Variables used nowhere else are written with a zero objective coefficient so the LP file still declares them
+    unused = [(column, 0.0) for column in view.unusedColumns()]
+    tokens = _linearTokens(view, sorted(view.obj + unused))
+    #The objective has no row name, its first line may be one character longer
+    objective = _LineWrapper(lines, " " if tokens or not view.obj_q else "", LINE_WIDTH + 1)
+    for token in tokens:
+        objective.add(token)
+    if view.obj_q:
+        for token in _quadraticTokens(view, view.obj_q, 2.0, bool(tokens)):
+            objective.add(token)
+        objective.add(" ] / 2 ")
+    objective.finish()
+
+    lines.append("Subject To")
+    for name, terms, sense, rhs in view.rows:
+        row = _LineWrapper(lines, f" {name}:")
+        for token in _linearTokens(view, terms):
+            row.add(token)
+        row.add(f" {LP_SENSES[sense]} {formatNumber(rhs)}", LINE_WIDTH - 1)
+        row.finish()
+    for name, terms, qterms, sense, rhs in view.qrows:
+        row = _LineWrapper(lines, f" {name}:")
+        tokens = _linearTokens(view, terms)
+        for token in tokens:
+            row.add(token)
+        #A quadratic constraint keeps its brackets even when all its quadratic terms cancel
+        for token in _quadraticTokens(view, qterms, 1.0, bool(tokens)):
+            row.add(token)
+        row.add(" ]")
+        row.add(f" {LP_SENSES[sense]} {formatNumber(rhs)}", LINE_WIDTH - 1)
+        row.finish()
+
+    lines.append("Bounds")
+    for column, name in enumerate(view.var_names):
+        line = _boundLine(name, view.vtypes[column], view.lb[column], view.ub[column])
+        if line is not None:
+            lines.append(line)
+    _nameList(lines, "Binaries", [name for name, vtype in zip(view.var_names, view.vtypes) if vtype == GRB.BINARY])
+    _nameList(lines, "Generals", [name for name, vtype in zip(view.var_names, view.vtypes) if vtype == GRB.INTEGER])
+    _nameList(lines, "Semi-continuous", [name for name, vtype in zip(view.var_names, view.vtypes) if vtype == GRB.SEMICONT])
+    lines.append("End")
+    return "\n".join(lines) + "\n"
+
+def writeMPS(problem) -> str:
+    """Return the problem in (fixed field) MPS format, in the section layout Gurobi uses."""
+    view = _ProblemView(_compile(problem))
+    lines = [f"NAME {view.name}"]
+    if view.maximize:
+        lines.append("OBJSENSE MAX")
+    lines.append("ROWS")
+    lines.append(" N  OBJ")
+    all_rows = [(name, terms, sense, rhs) for name, terms, sense, rhs in view.rows]
+    all_rows += [(name, terms, sense, rhs) for name, terms, _, sense, rhs in view.qrows]
+    for name, _, sense, _ in all_rows:
+        lines.append(f" {MPS_SENSES[sense]}  {name:<8}")
+
+    columns = [[] for _ in view.var_keys]
+    for column, coef in view.obj:
+        columns[column].append(("OBJ", coef))
+    for name, terms, _, _ in all_rows:
+        for column, coef in terms:
+            columns[column].append((name, coef))
+    lines.append("COLUMNS")
+    in_integer_block = False
+    for column, entries in enumerate(columns):
+        integer = view.vtypes[column] in (GRB.BINARY, GRB.INTEGER)
+        if integer != in_integer_block:
+            lines.append("    MARKER    'MARKER'                 " + ("'INTORG'" if integer else "'INTEND'"))
+            in_integer_block = integer
+        name = view.var_names[column]
+        if not entries:
+            #Every column must appear once, even without nonzeros
+            entries = [("OBJ", 0.0)]
+        for row, coef in entries:
+            lines.append(f"    {name:<8}  {row:<8}  {_formatMPSNumber(coef)}")
+    if in_integer_block:
+        lines.append("    MARKER    'MARKER'                 'INTEND'")
+
+    lines.append("RHS")
+    for name, _, _, rhs in all_rows:
+        if rhs != 0:
+            lines.append(f"    RHS1      {name:<8}  {_formatMPSNumber(rhs)}")
+
+    lines.append("BOUNDS")
+    for column, name in enumerate(view.var_names):
+        vtype, lb, ub = view.vtypes[column], view.lb[column], view.ub[column]
+        if vtype == GRB.BINARY:
+            lb, ub = _binaryBounds(lb, ub)
+            if lb == ub:
+                lines.append(f" FX BND1      {name:<8}  {_formatMPSNumber(lb)}")
+            lines.append(f" BV BND1      {name:<8}")
+            if lb > ub:
+                #Crossed bounds are written as they are, so the file is as infeasible as the model
+                lines.append(f" LO BND1      {name:<8}  {_formatMPSNumber(lb)}")
+                lines.append(f" UP BND1      {name:<8}  {_formatMPSNumber(ub)}")
+            continue
+        if lb == ub and vtype != GRB.SEMICONT:
+            lines.append(f" FX BND1      {name:<8}  {_formatMPSNumber(lb)}")
+            continue
+        if _isInfinite(lb) and _isInfinite(ub) and vtype != GRB.SEMICONT:
+            lines.append(f" FR BND1      {name:<8}")
+            continue
+        if _isInfinite(lb):
+            lines.append(f" MI BND1      {name:<8}")
+        elif lb != 0:
+            lines.append(f" LO BND1      {name:<8}  {_formatMPSNumber(lb)}")
+        if vtype == GRB.SEMICONT:
+            lines.append(f" SC BND1      {name:<8}  {_formatMPSNumber(ub)}")
+        elif not _isInfinite(ub):
+            lines.append(f" UP BND1      {name:<8}  {_formatMPSNumber(ub)}")
+        elif vtype == GRB.INTEGER and lb == 0:
+            #Integer columns without an upper bound would default to 1 in some readers
+            lines.append(f" LI BND1      {name:<8}  0")
+
+    if view.obj_q:
+        lines.append("QUADOBJ")
+        for i, j, coef in view.obj_q:
+            lines.append(f"    {view.var_names[i]:<8}  {view.var_names[j]:<8}  {_formatMPSNumber(coef * 2 if i == j else coef)}")
+    for name, _, qterms, _, _ in view.qrows:
+        lines.append(f"QCMATRIX   {name:<8}")
+        for i, j, coef in qterms:
+            if i == j:
+                lines.append(f"    {view.var_names[i]:<8}  {view.var_names[j]:<8}  {_formatMPSNumber(coef)}")
+            else:
+                half = _formatMPSNumber(coef / 2)
+                lines.append(f"    {view.var_names[i]:<8}  {view.var_names[j]:<8}  {half}")
+                lines.append(f"    {view.var_names[j]:<8}  {view.var_names[i]:<8}  {half}")
+    lines.append("ENDATA")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,140 @@
+import time
+import numpy as np
+from gurobipy import GRB
+from scipy.optimize import linprog, milp, LinearConstraint, Bounds
+from .ProblemCompiler import CompiledProblem
+
+#Gurobi parameters the SciPy backend understands and the HiGHS option of linprog or milp each one sets.
+#Threads is left to HiGHS. Any other parameter is ignored and reported in the notes of the result.
+SCIPY_PARAMETERS = {
+    "TimeLimit": "time_limit",
+    "MIPGap": "mip_rel_gap",
+    "NodeLimit": "node_limit",
+    "Presolve": "presolve",
+}
+
+#Largest node_limit HiGHS accepts
+HIGHS_MAX_NODES = 2**31 - 1
+
+#scipy.optimize result status -> Gurobi status code. Status 1 is a time or iteration limit, told apart by the message.
+_STATUSES = {0: GRB.OPTIMAL, 2: GRB.INFEASIBLE, 3: GRB.UNBOUNDED, 4: GRB.NUMERIC}
+
+def scipyUnsupported(compiled: CompiledProblem):
+    """Why the SciPy backend cannot solve the problem, or None if it can."""
+    if compiled.category != "LP":
+        return f"it solves LP and MILP problems only, not {compiled.problem_type}"
+    if np.any(compiled.vtype == GRB.SEMICONT):
+        return "it does not support semicontinuous variables"
+    if compiled.objectives or compiled.scenarios:
+        return "it does not support multiple objectives or scenarios"
+    return None
+
+#The outcome of a SciPy solve, with the vectors the result report reads. Duals and reduced costs are None for MIP models.
+class SciPySolution:
+    def __init__(self, status: int, objective: float = None, x=None, duals=None, reduced_costs=None, runtime: float = 0.0, notes: list = None):
+        self.status = status
+        self.objective = objective
+        self.x = x
+        self.duals = duals
+        self.reduced_costs = reduced_costs
+        self.runtime = runtime
+        self.notes = notes or []
+
+#LP and MILP problems of a CompiledProblem solved with the HiGHS solvers bundled in SciPy, linprog for LP and milp for MILP.
+#Used when no Gurobi license is available. Statuses are reported as Gurobi status codes, so results read the same as Gurobi results.
+class SciPyProblem:
+    def __init__(self, compiled: CompiledProblem):
+        reason = scipyUnsupported(compiled)
+        if reason is not None:
+            raise ValueError(f"The scipy backend cannot solve this problem: {reason}")
+        self._compiled = compiled
+
+    def getParameters(self) -> dict:
+        return self._compiled.parameters
+
+    def getOutputOptions(self) -> dict:
+        return self._compiled.output
+
+    def _bounds(self):
+        compiled = self._compiled
+        lb, ub = compiled.lb.copy(), compiled.ub.copy()
+        binary = compiled.vtype == GRB.BINARY
+        lb[binary] = np.maximum(lb[binary], 0.0)
+        ub[binary] = np.minimum(ub[binary], 1.0)
+        return lb, ub
+
+    def _options(self, parameters: dict, mip: bool):
+        options, ignored = {}, []
+        for name, value in parameters.items():
+            option = SCIPY_PARAMETERS.get(name)
+            if option is None or (option in ("mip_rel_gap", "node_limit") and not mip):
+                if name != "Threads":
+                    ignored.append(name)
+            elif option == "presolve":
+                options[option] = value != 0
+            elif option == "node_limit":
+                #HiGHS takes a 32-bit integer node limit, larger values (Gurobi's default is 1e100) leave the limit off
+                if value < HIGHS_MAX_NODES:
+                    options[option] = int(value)
+            else:
+                options[option] = value
+        notes = [f"Parameters not supported by the scipy backend were ignored: {', '.join(sorted(ignored))}"] if ignored else []
+        return options, notes
+
+    def _status(self, result) -> int:
+        if result.status == 1:
+            return GRB.TIME_LIMIT if "time" in result.message.lower() else GRB.ITERATION_LIMIT
+        return _STATUSES.get(result.status, GRB.NUMERIC)
+
+    def solve(self, parameters: dict = None) -> SciPySolution:
+        compiled = self._compiled
+        mip = bool(np.any(compiled.vtype != GRB.CONTINUOUS))
+        options, notes = self._options(parameters or {}, mip)
+        #Both solvers minimize, so a maximization is solved on the negated objective
+        sign = -1.0 if compiled.obj_sense == GRB.MAXIMIZE else 1.0
+        c = sign * compiled.obj
+        lb, ub = self._bounds()
+        start = time.perf_counter()
+        if mip:
+            result = self._solveMIP(c, lb, ub, options)
+        else:
+            result = self._solveLP(c, lb, ub, options)
+        runtime = time.perf_counter() - start
+        x = getattr(result, "x", None)
+        if x is None:
+            return SciPySolution(self._status(result), runtime=runtime, notes=notes)
+        solution = SciPySolution(self._status(result), float(compiled.obj @ x) + compiled.obj_constant, x, runtime=runtime, notes=notes)
+        if not mip:
+            solution.duals, solution.reduced_costs = self._sensitivities(result, sign)
+        return solution
+
+    def _solveMIP(self, c, lb, ub, options):
+        compiled = self._compiled
+        row_lb = np.where(compiled.sense == GRB.LESS_EQUAL, -np.inf, compiled.rhs)
+        row_ub = np.where(compiled.sense == GRB.GREATER_EQUAL, np.inf, compiled.rhs)
+        constraints = [LinearConstraint(compiled.A, row_lb, row_ub)] if compiled.num_constrs > 0 else []
+        return milp(c, integrality=(compiled.vtype != GRB.CONTINUOUS).astype(int), bounds=Bounds(lb, ub),
+                    constraints=constraints, options=options)
+
+    def _solveLP(self, c, lb, ub, options):
+        #linprog takes <= rows and = rows separately, >= rows are negated into <= rows
+        compiled = self._compiled
+        self._upper = np.flatnonzero(compiled.sense != GRB.EQUAL)
+        self._equal = np.flatnonzero(compiled.sense == GRB.EQUAL)
+        self._flip = np.where(compiled.sense[self._upper] == GRB.GREATER_EQUAL, -1.0, 1.0)
+        A_ub = compiled.A[self._upper].multiply(self._flip[:, None]).tocsr() if len(self._upper) else None
+        b_ub = self._flip * compiled.rhs[self._upper] if len(self._upper) else None
+        A_eq = compiled.A[self._equal] if len(self._equal) else None
+        b_eq = compiled.rhs[self._equal] if len(self._equal) else None
+        return linprog(c, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=b_eq, bounds=np.column_stack([lb, ub]),
+                       method="highs", options=options)
+
+    def _sensitivities(self, result, sign: float):
+        """Duals and reduced costs in Gurobi's convention (Pi and RC) from the marginals of linprog."""
+        duals = np.zeros(self._compiled.num_constrs)
+        if len(self._upper):
+            duals[self._upper] = sign * self._flip * result.ineqlin.marginals
+        if len(self._equal):
+            duals[self._equal] = sign * result.eqlin.marginals
+        reduced_costs = sign * (result.lower.marginals + result.upper.marginals)
+        return duals, reduced_costs
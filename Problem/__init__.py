@@ -3,3 +3,16 @@ from .OptimizationProblem import OptimizationProblem
 from .LP import LP
 from .QP import QP
 from .QCP import QCP
+from .ProblemFactory import createProblem
+from .ProblemCompiler import compileProblem, CompiledProblem, ProblemValidationError
+from .ProblemHash import canonicalizeProblem, problemHash
+from .Parameters import validateParameters, resolveParameters, PARAMETER_SPECS
+from .OutputOptions import validateOutputOptions, OUTPUT_OPTIONS
+from .ProblemWriter import writeLP, writeMPS
+from .EnvPool import EnvPool, createQuietEnv
+from .ProblemReader import readProblemFile, FILE_FORMATS
+from .SciPyProblem import SciPyProblem, SciPySolution, scipyUnsupported
+from .Backends import BACKENDS, LICENSE_ERRORS, selectBackend, canFallBack
+from .ProblemAnalyzer import analyzeProblem, quadraticCurvature, ProblemAnalysis
+from .ProblemReducer import reduceProblem, Reduction
+from .ProblemDecomposer import decomposeProblem, couplingConstraints, detectCoupling, variableComponents, Decomposition, Block
@@ -0,0 +1,130 @@
+import asyncio
+import copy
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from gurobipy import GRB
+from Problem import CompiledProblem
+from .SolverPool import SolveTask
+from .Solve import solveProblem
+
+def mergeProblem(base: dict, override: dict) -> dict:
+    """
+    Return a copy of base with override applied. Dicts are merged recursively and other values are replaced,
+    except that a dict given for a list of named items (e.g. linear_constraints) updates the items by name:
+    {"constraints": {"linear_constraints": {"c1": {"rhs": 12}}}}
+    """
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        current = merged.get(key)
+        if isinstance(current, dict) and isinstance(value, dict):
+            merged[key] = mergeProblem(current, value)
+        elif isinstance(current, list) and isinstance(value, dict):
+            by_name = {item.get("name"): index for index, item in enumerate(current) if isinstance(item, dict)}
+            for name, item_override in value.items():
+                if name not in by_name:
+                    raise ValueError(f"Override refers to unknown item {name} in {key}")
+                current[by_name[name]] = mergeProblem(current[by_name[name]], item_override)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+def expandBatch(problems: list = None, base_problem: dict = None, overrides: list = None) -> list:
+    """Turn the GurobiBatchSolver arguments into the list of problems to solve."""
+    if problems and base_problem is not None:
+        raise ValueError("Pass either problems or base_problem with overrides, not both.")
+    if base_problem is not None:
+        return [mergeProblem(base_problem, override) for override in (overrides or [{}])]
+    if not problems:
+        raise ValueError("No problems given.")
+    return list(problems)
+
+def solveInstance(problem: dict, threads: int):
+    """Entry point of a batch worker process."""
+    return solveProblem(SolveTask(threads), problem)
+
+#Solves many problems across a pool of worker processes. Each instance gets an even share of the
+#Gurobi threads so the workers together use about total_threads cores.
+class BatchSolver:
+    def __init__(self, max_workers: int = 0, total_threads: int = 0):
+        cpu_count = os.cpu_count() or 1
+        self.max_workers = max_workers if max_workers > 0 else cpu_count
+        self.total_threads = total_threads if total_threads > 0 else cpu_count
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _getExecutor(self) -> ProcessPoolExecutor:
+        #Started on first use and reused by later batches. Spawned rather than forked so workers
+        #do not inherit the Gurobi state of the server process.
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def threadsPerInstance(self, num_problems: int) -> int:
+        return max(1, self.total_threads // max(1, min(self.max_workers, num_problems)))
+
+    async def solve(self, problems: list, on_result=None) -> dict:
+        """
+        Solve all problems and return the per-instance results in input order plus a summary.
+        on_result(index, result, completed) is awaited as each instance finishes, in completion order.
+        If the call is cancelled, instances that have not started are dropped.
+        """
+        start = time.perf_counter()
+        executor = self._getExecutor()
+        threads = self.threadsPerInstance(len(problems))
+        loop = asyncio.get_running_loop()
+        futures = [loop.run_in_executor(executor, solveInstance, problem, threads) for problem in problems]
+
+        async def indexed(index, future):
+            try:
+                return index, await future
+            except Exception as e:
+                return index, f"Error: {str(e)}"
+
+        results = [None] * len(problems)
+        try:
+            completed = 0
+            for next_done in asyncio.as_completed([indexed(index, future) for index, future in enumerate(futures)]):
+                index, result = await next_done
+                results[index] = result
+                completed += 1
+                if on_result is not None:
+                    await on_result(index, result, completed)
+        except asyncio.CancelledError:
+            for future in futures:
+                future.cancel()
+            raise
+        return {"results": results, "summary": summarizeBatch(problems, results, time.perf_counter() - start)}
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+def _objectiveType(problem) -> str:
+    """"maximize" or "minimize" of a problem dict, or of a CompiledProblem resolved before the batch was sent."""
+    if isinstance(problem, CompiledProblem):
+        return "maximize" if problem.obj_sense == GRB.MAXIMIZE else "minimize"
+    return problem.get("objective", {}).get("type")
+
+def summarizeBatch(problems: list, results: list, elapsed: float) -> dict:
+    solved = [index for index, result in enumerate(results) if isinstance(result, dict)]
+    summary = {
+        "total": len(results),
+        "solved": len(solved),
+        "failed": len(results) - len(solved),
+        "elapsed_seconds": round(elapsed, 3),
+    }
+    if solved:
+        objectives = {index: results[index]["objective_value"] for index in solved}
+        summary["objective_min"] = min(objectives.values())
+        summary["objective_max"] = max(objectives.values())
+        senses = {_objectiveType(problems[index]) for index in solved}
+        if len(senses) == 1:
+            pick = max if senses == {"maximize"} else min
+            summary["best_index"] = pick(objectives, key=objectives.get)
+    return summary
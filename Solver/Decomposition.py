@@ -0,0 +1,288 @@
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+from gurobipy import GRB
+from Problem import createProblem, decomposeProblem, couplingConstraints
+from .SolutionReport import arraySolutionReport
+
+#Solves of problems split by decomposeProblem. "blocks" solves the independent blocks of a problem in parallel worker
+#processes and merges their solutions. "lagrangian" also leaves out the constraints that couple the blocks, moves them
+#into the block objectives with a multiplier each, and updates the multipliers by subgradient steps until the blocks
+#agree on a solution that satisfies the coupling constraints, or the iteration or time budget runs out.
+
+#Relative gap between the best solution and the Lagrangian bound at which the loop stops
+LAGRANGIAN_GAP = 1e-4
+#Violation of a coupling constraint, relative to its rhs, below which it counts as satisfied
+FEASIBILITY_TOLERANCE = 1e-6
+#Iterations without a better bound after which the subgradient step is halved
+STALL_ITERATIONS = 5
+#Seconds between two checks of the stop flag while blocks are being solved
+STOP_POLL_INTERVAL = 0.1
+
+#Stands in for the model attached to a SolveTask while a decomposed problem is solved: StopSolve, CancelJob and
+#client cancellation call terminate(), and the block solves check stopped between futures and iterations.
+#Blocks that already run in a worker process finish there, their results are dropped.
+class StopFlag:
+    def __init__(self):
+        self.stopped = False
+
+    def terminate(self):
+        self.stopped = True
+
+def solveBlock(block, parameters: dict, sensitivities: bool = False) -> dict:
+    """
+    Entry point of a decomposition worker process: build and optimize one block. Returns its status and, when it has
+    a solution, its objective, bound and values, plus reduced costs and duals of continuous blocks with sensitivities.
+    """
+    try:
+        problem = createProblem(block, lazy_update=True)
+    except Exception as e:
+        return {"error": f"Model creation failed. {str(e)}"}
+    try:
+        model = problem.getModel()
+        for name, value in parameters.items():
+            model.setParam(name, value)
+        if sensitivities and block.num_qconstrs > 0:
+            model.setParam("QCPDual", 1)
+        model.optimize()
+        solved = {"status": model.status}
+        if model.SolCount > 0:
+            variables = model.getVars()
+            solved["objective"] = model.ObjVal
+            #An LP stopped on a limit has no bound
+            solved["bound"] = model.ObjBound if model.IsMIP else model.ObjVal if model.status == GRB.OPTIMAL else None
+            solved["x"] = np.array(model.getAttr("X", variables))
+            if sensitivities and not model.IsMIP:
+                solved["reduced_costs"] = np.array(model.getAttr("RC", variables))
+                constrs, qconstrs = model.getConstrs(), model.getQConstrs()
+                solved["duals"] = np.array(model.getAttr("Pi", constrs) if constrs else [])
+                solved["qduals"] = np.array(model.getAttr("QCPi", qconstrs) if qconstrs else [])
+        return solved
+    except Exception as e:
+        return {"error": f"Optimization failed. {str(e)}"}
+    finally:
+        problem.dispose()
+
+#Solves the blocks of decomposed problems across a pool of worker processes, started on first use.
+#Spawned rather than forked, like the BatchSolver workers, so they do not inherit the Gurobi state of the server.
+class BlockSolver:
+    def __init__(self, max_workers: int = 0):
+        self.max_workers = max_workers if max_workers > 0 else (os.cpu_count() or 1)
+        #Smaller models pay off even when they are solved one after another
+        self.max_blocks = max(2, self.max_workers)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _getExecutor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def solve(self, blocks: list, parameters: dict, sensitivities: bool = False, stop: StopFlag = None) -> list:
+        """
+        What solveBlock returns for each block, in block order. Blocks the calling (worker) thread until all are done,
+        or until stop is set: blocks that have not finished then get status INTERRUPTED and pending ones are cancelled.
+        """
+        executor = self._getExecutor()
+        try:
+            futures = [executor.submit(solveBlock, block, parameters, sensitivities) for block in blocks]
+            pending = futures
+            while pending:
+                if stop is not None and stop.stopped:
+                    for future in pending:
+                        future.cancel()
+                    break
+                _, pending = wait(pending, timeout=STOP_POLL_INTERVAL)
+            return [future.result() if future.done() and not future.cancelled() else {"status": GRB.INTERRUPTED} for future in futures]
+        except BrokenProcessPool as e:
+            #A worker died, the next call starts a new pool
+            self.shutdown()
+            return [{"error": str(e)}] * len(blocks)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+def blockParameters(parameters: dict, num_blocks: int, max_workers: int) -> dict:
+    """The solve parameters with Threads split across the blocks that run at the same time."""
+    parameters = dict(parameters)
+    threads = parameters.get("Threads") or os.cpu_count() or 1
+    parameters["Threads"] = max(1, threads // max(1, min(num_blocks, max_workers)))
+    return parameters
+
+def _blockError(number: int, solved: dict):
+    """The error string for a block without a solution, in the format of optimizeModel, or None if it has one."""
+    if "error" in solved:
+        return f"Error: Block {number}: {solved['error']}"
+    if "x" in solved:
+        return None
+    if solved["status"] in (GRB.TIME_LIMIT, GRB.NODE_LIMIT, GRB.SOLUTION_LIMIT, GRB.ITERATION_LIMIT, GRB.WORK_LIMIT, GRB.MEM_LIMIT):
+        return f"Error: Optimization of block {number} stopped with status {solved['status']} before a solution was found. Consider raising the limit in parameters."
+    return f"Error: Optimization of block {number} failed with status {solved['status']}. Please check the problem definition."
+
+def _slacks(compiled, x):
+    """Slacks of the linear and then the quadratic constraints at x, as Gurobi reports them (rhs - lhs)."""
+    slacks = [compiled.rhs - compiled.A @ x]
+    for constraint in compiled.quadratic_constraints:
+        lhs = constraint.lin_vals @ x[constraint.lin_cols] + constraint.q_vals @ (x[constraint.q_rows] * x[constraint.q_cols])
+        slacks.append(np.array([constraint.rhs - lhs]))
+    return np.concatenate(slacks)
+
+def decompositionReport(compiled, x, notes: list, reduced_costs=None, duals=None) -> dict:
+    """The solution part of a result for the whole problem from the merged values x of its blocks."""
+    names = compiled.constr_names + [constraint.name for constraint in compiled.quadratic_constraints]
+    slacks = _slacks(compiled, x) if compiled.output["slacks"] else None
+    if compiled.output["basis"]:
+        notes = notes + ["The basis is not available for decomposed problems."]
+    options = dict(compiled.output, basis=False)
+    return arraySolutionReport(compiled.var_names, x, names, slacks, options, reduced_costs, duals, notes)
+
+def solveBlocks(block_solver: BlockSolver, compiled, parameters: dict, stop: StopFlag = None):
+    """
+    Solve the independent blocks of a problem in parallel and merge them into one result. Returns None when the problem
+    is a single component, so the caller solves it as one model. A stopped solve has no result for the whole problem.
+    """
+    decomposition = decomposeProblem(compiled, block_solver.max_blocks)
+    if decomposition is None:
+        return None
+    sensitivities = compiled.output["duals"] or compiled.output["reduced_costs"]
+    blocks = decomposition.blocks
+    solved = block_solver.solve([block.problem for block in blocks], blockParameters(parameters, len(blocks), block_solver.max_workers),
+                                sensitivities, stop)
+    if stop is not None and stop.stopped and any("x" not in block_solved for block_solved in solved):
+        return "Error: Optimization was cancelled."
+    for number, block_solved in enumerate(solved):
+        error = _blockError(number, block_solved)
+        if error is not None:
+            return error
+    x = np.zeros(compiled.num_vars)
+    reduced_costs = np.zeros(compiled.num_vars) if all("reduced_costs" in block_solved for block_solved in solved) else None
+    duals = np.zeros(compiled.num_constrs + compiled.num_qconstrs) if reduced_costs is not None else None
+    for block, block_solved in zip(blocks, solved):
+        x[block.columns] = block_solved["x"]
+        if reduced_costs is not None:
+            reduced_costs[block.columns] = block_solved["reduced_costs"]
+            duals[block.rows] = block_solved["duals"]
+            duals[compiled.num_constrs + block.qrows] = block_solved["qduals"]
+    statuses = [block_solved["status"] for block_solved in solved]
+    result = {
+        "status": GRB.OPTIMAL if all(status == GRB.OPTIMAL for status in statuses) else next(status for status in statuses if status != GRB.OPTIMAL),
+        "objective_value": float(sum(block_solved["objective"] for block_solved in solved) + compiled.obj_constant),
+        "decomposition": {"mode": "blocks", "components": decomposition.components, "blocks": len(blocks)},
+    }
+    result.update(decompositionReport(compiled, x, [], reduced_costs, duals))
+    return result
+
+def _violation(sense, lhs, rhs):
+    """How far each coupling constraint is from holding, 0 where it holds."""
+    return np.where(sense == GRB.LESS_EQUAL, np.maximum(lhs - rhs, 0.0),
+                    np.where(sense == GRB.GREATER_EQUAL, np.maximum(rhs - lhs, 0.0), np.abs(lhs - rhs)))
+
+def solveLagrangian(block_solver: BlockSolver, compiled, parameters: dict, patterns: list, max_iterations: int,
+                    time_limit: float, stop: StopFlag = None):
+    """
+    Relax the coupling constraints (named by patterns, else detected) into the block objectives and run subgradient steps
+    on their multipliers, within max_iterations and time_limit seconds. Returns (result, values, report): the result of
+    the best solution that satisfies the coupling constraints, or None with the values of the last iteration (None if
+    there was none) for the caller to start a solve of the whole problem from. report describes the loop and, when
+    result is None, why it gave up under "fallback". A stopped loop returns its best solution with status INTERRUPTED.
+    """
+    coupling = couplingConstraints(compiled, patterns)
+    if coupling is not None and not coupling.any() and not patterns:
+        #Nothing to relax, the blocks are independent as they are
+        return solveBlocks(block_solver, compiled, parameters, stop), None, None
+    decomposition = decomposeProblem(compiled, block_solver.max_blocks, coupling) if coupling is not None and coupling.any() else None
+    if decomposition is None:
+        return None, None, {"mode": "lagrangian", "coupling_constraints": 0 if coupling is None else int(coupling.sum()),
+                            "fallback": "No coupling constraints split the problem into blocks."}
+    blocks = decomposition.blocks
+    rows = decomposition.coupling
+    R, rhs, sense = compiled.A[rows], compiled.rhs[rows], compiled.sense[rows]
+    #The loop works on the minimization form: min sign * c'x + multipliers'(Rx - rhs)
+    sign = -1.0 if compiled.obj_sense == GRB.MAXIMIZE else 1.0
+    multipliers = np.zeros(len(rows))
+    base_objectives = [block.problem.obj.copy() for block in blocks]
+    best_bound, best_value, best_x, x = -math.inf, math.inf, None, None
+    step, stalled, iteration, fallback = 2.0, 0, 0, None
+    start = time.monotonic()
+    block_parameters = blockParameters(parameters, len(blocks), block_solver.max_workers)
+    stop = stop or StopFlag()
+    while iteration < max_iterations and not stop.stopped:
+        remaining = time_limit - (time.monotonic() - start)
+        if remaining <= 0:
+            break
+        iteration += 1
+        penalties = R.T @ multipliers
+        for block, base in zip(blocks, base_objectives):
+            #A penalty added to a minimization is subtracted from a maximization
+            block.problem.obj = base + sign * penalties[block.columns]
+        block_parameters["TimeLimit"] = min(parameters.get("TimeLimit", math.inf), remaining)
+        solved = block_solver.solve([block.problem for block in blocks], block_parameters, stop=stop)
+        if stop.stopped:
+            break
+        #A block without a solution, e.g. one left unbounded without the coupling constraints, ends the loop
+        failed = [_blockError(number, block_solved) for number, block_solved in enumerate(solved)]
+        failed = [error for error in failed if error is not None]
+        if failed:
+            fallback = failed[0][len("Error: "):]
+            break
+        x = np.zeros(compiled.num_vars)
+        for block, block_solved in zip(blocks, solved):
+            x[block.columns] = block_solved["x"]
+        if all(block_solved["bound"] is not None for block_solved in solved):
+            bound = sum(sign * block_solved["bound"] for block_solved in solved) - multipliers @ rhs + sign * compiled.obj_constant
+        else:
+            bound = -math.inf
+        if bound > best_bound + LAGRANGIAN_GAP * max(1.0, abs(best_bound) if math.isfinite(best_bound) else 1.0):
+            best_bound, stalled = bound, 0
+        else:
+            stalled += 1
+            if stalled >= STALL_ITERATIONS:
+                step, stalled = step / 2, 0
+        lhs = R @ x
+        if np.all(_violation(sense, lhs, rhs) <= FEASIBILITY_TOLERANCE * (1.0 + np.abs(rhs))):
+            value = sign * (compiled.obj @ x + compiled.obj_constant)
+            if value < best_value:
+                best_value, best_x = value, x
+        if math.isfinite(best_value) and best_value - best_bound <= LAGRANGIAN_GAP * max(1.0, abs(best_value)):
+            break
+        #Polyak step towards the best solution, or towards a bound a little above the current one before there is one
+        subgradient = lhs - rhs
+        norm = subgradient @ subgradient
+        if norm == 0 or not math.isfinite(bound):
+            break
+        target = best_value if math.isfinite(best_value) else bound + 0.05 * max(1.0, abs(bound))
+        multipliers = multipliers + step * max(target - bound, 0.0) / norm * subgradient
+        multipliers = np.where(sense == GRB.LESS_EQUAL, np.maximum(multipliers, 0.0),
+                               np.where(sense == GRB.GREATER_EQUAL, np.minimum(multipliers, 0.0), multipliers))
+    for block, base in zip(blocks, base_objectives):
+        block.problem.obj = base
+    gap = (best_value - best_bound) / max(1.0, abs(best_value)) if best_x is not None else None
+    report = {
+        "mode": "lagrangian",
+        "components": decomposition.components,
+        "blocks": len(blocks),
+        "coupling_constraints": len(rows),
+        "iterations": iteration,
+        "bound": float(sign * best_bound) if math.isfinite(best_bound) else None,
+        "gap": float(gap) if gap is not None else None,
+    }
+    if best_x is None:
+        report["fallback"] = fallback or "No iteration satisfied the coupling constraints."
+        return None, x, report
+    result = {
+        "status": GRB.OPTIMAL if gap <= LAGRANGIAN_GAP else GRB.INTERRUPTED if stop.stopped else GRB.SUBOPTIMAL,
+        "objective_value": float(sign * best_value),
+        "decomposition": report,
+    }
+    result.update(decompositionReport(compiled, best_x, ["Duals and reduced costs are not available from the Lagrangian decomposition."]
+                                      if compiled.output["duals"] or compiled.output["reduced_costs"] else []))
+    return result, best_x, report
@@ -0,0 +1,163 @@
+import threading
+import time
+import uuid
+
+class JobNotFoundError(LookupError):
+    pass
+
+class JobLimitError(RuntimeError):
+    pass
+
+#Lifecycle of a job: queued -> running -> completed, failed or cancelled
+JOB_STATES = ("queued", "running", "completed", "failed", "cancelled")
+FINISHED_STATES = ("completed", "failed", "cancelled")
+
+#A solve submitted through SubmitSolve. The solve runs on a SolverPool worker while the tool call that submitted it has returned.
+class Job:
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.state = "queued"
+        self.task = None        #SolveTask of the solve, set once it is queued on the pool
+        self.future = None
+        self.result = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self._finished_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def markRunning(self):
+        with self._lock:
+            if self.state == "queued":
+                self.state = "running"
+                self.started = time.time()
+
+    def finish(self, state: str, result):
+        with self._lock:
+            if self.state in FINISHED_STATES:
+                return
+            self.state = state
+            self.result = result
+            self.finished = time.time()
+        self._finished_event.set()
+
+    @property
+    def done(self) -> bool:
+        return self.state in FINISHED_STATES
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until the job finishes or timeout seconds pass. Returns whether it finished."""
+        return self._finished_event.wait(timeout)
+
+    def status(self) -> dict:
+        with self._lock:
+            now = time.time()
+            status = {
+                "job_id": self.id,
+                "state": self.state,
+                "solve_id": self.task.id if self.task is not None else None,
+                "submitted_at": self.submitted,
+                "queued_seconds": (self.started or self.finished or now) - self.submitted,
+                "running_seconds": None if self.started is None else (self.finished or now) - self.started,
+            }
+        if self.task is not None and not self.done:
+            objective, _ = self.task.getIncumbent()
+            status["progress"] = self.task.progress
+            status["incumbent_objective"] = objective
+        return status
+
+#In-process job table on top of a SolverPool. At most max_jobs jobs may be queued or running at once,
+#and finished jobs keep their result for result_ttl seconds after they finish, then they are dropped on the next access.
+class JobManager:
+    def __init__(self, pool, max_jobs: int = 64, result_ttl: float = 3600):
+        self.pool = pool
+        self.max_jobs = max_jobs
+        self.result_ttl = result_ttl
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._jobs)
+
+    @property
+    def active(self) -> int:
+        """Number of jobs that are queued or running."""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.done)
+
+    def expireFinished(self) -> int:
+        """Drop finished jobs whose result is older than result_ttl and return how many were dropped."""
+        now = time.time()
+        with self._lock:
+            expired = [job.id for job in self._jobs.values() if job.done and now - job.finished > self.result_ttl]
+            for job_id in expired:
+                del self._jobs[job_id]
+        return len(expired)
+
+    def _runJob(self, task, job: Job, fn, *args):
+        job.markRunning()
+        return fn(task, *args)
+
+    def _jobDone(self, job: Job, future, on_result):
+        if future.cancelled():
+            job.finish("cancelled", "Error: Job was cancelled before it started.")
+        elif future.exception() is not None:
+            job.finish("failed", f"Error: {str(future.exception())}")
+        elif job.task.cancelled:
+            job.finish("cancelled", future.result())
+        else:
+            result = future.result()
+            job.finish("failed" if isinstance(result, str) else "completed", result)
+        if on_result is not None:
+            on_result(job.result)
+
+    def submit(self, fn, *args, on_result=None, trace=None) -> Job:
+        """
+        Queue fn(task, *args) on the pool as a new job and return it without waiting for the solve.
+        on_result is called with the result when the job finishes, from the worker thread or from the thread that cancels a queued job.
+        Raises JobLimitError when max_jobs jobs are unfinished, and SolverQueueFullError when the pool queue is full.
+        """
+        self.expireFinished()
+        job = Job()
+        with self._lock:
+            if sum(1 for other in self._jobs.values() if not other.done) >= self.max_jobs:
+                raise JobLimitError(f"Too many unfinished jobs ({self.max_jobs}). Wait for a job to finish or cancel one.")
+            job.task, job.future = self.pool.submit(self._runJob, job, fn, *args, trace=trace)
+            self._jobs[job.id] = job
+        job.future.add_done_callback(lambda future: self._jobDone(job, future, on_result))
+        return job
+
+    def completed(self, result) -> Job:
+        """Register a job that is already finished, e.g. one answered from the result cache."""
+        self.expireFinished()
+        job = Job()
+        job.finish("completed", result)
+        with self._lock:
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Job:
+        self.expireFinished()
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise JobNotFoundError(f"Unknown or expired job {job_id}")
+        return job
+
+    def cancel(self, job_id: str) -> Job:
+        """Drop a queued job or terminate a running one. Finished jobs are left as they are."""
+        job = self.get(job_id)
+        if not job.done:
+            if job.future.cancel():
+                job.finish("cancelled", "Error: Job was cancelled before it started.")
+            else:
+                #model.terminate() on the running solve, which then finishes the job as cancelled
+                job.task.cancel()
+        return job
+
+    def cancelAll(self):
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if not job.done]
+        for job in jobs:
+            self.cancel(job.id)
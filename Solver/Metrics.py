@@ -0,0 +1,154 @@
+import bisect
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+#Per-request traces and the server-wide metrics they are aggregated into.
+#Metrics are rendered in the Prometheus text format, each finished request is also logged as one JSON line.
+
+logger = logging.getLogger("gurobi_mcp.metrics")
+
+#Histogram buckets for durations in seconds and for model sizes in rows, columns or nonzeros
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 60, 300)
+SIZE_BUCKETS = (10, 100, 1000, 10000, 100000, 1000000, 10000000)
+
+#Model attributes recorded after a build and solver attributes recorded after a solve
+MODEL_ATTRIBUTES = {"rows": "NumConstrs", "cols": "NumVars", "nonzeros": "NumNZs", "q_nonzeros": "NumQNZs",
+                    "qconstrs": "NumQConstrs", "qc_nonzeros": "NumQCNZs"}
+SOLVER_ATTRIBUTES = {"runtime": "Runtime", "node_count": "NodeCount", "iter_count": "IterCount", "bar_iter_count": "BarIterCount"}
+
+class RequestTrace:
+    """Phase durations, model size and solver statistics of one tool call."""
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.phases = {}
+        self.model = {}
+        self.solver = {}
+        self.profile = None
+        self._started = time.perf_counter()
+
+    def record(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def recordAttributes(self, target: dict, model, attributes: dict):
+        """Copy model attributes, skipping those the model does not have (e.g. NodeCount of an LP)."""
+        for key, attribute in attributes.items():
+            try:
+                target[key] = getattr(model, attribute)
+            except Exception:
+                continue
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def toDict(self) -> dict:
+        trace = {"tool": self.tool, "seconds": self.elapsed, "phases": self.phases}
+        if self.model:
+            trace["model"] = self.model
+        if self.solver:
+            trace["solver"] = self.solver
+        if self.profile is not None:
+            trace["profile"] = self.profile
+        return trace
+
+def tracePhase(trace: RequestTrace, name: str):
+    """trace.phase(name), or a no-op when the call is not traced."""
+    return trace.phase(name) if trace is not None else nullcontext()
+
+def _labelText(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+class MetricsRegistry:
+    """Thread-safe counters, histograms and gauges in the Prometheus text exposition format."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._descriptions = {}
+        self._counters = {}
+        self._histograms = {}
+        self._gauges = {}
+
+    def _describe(self, name: str, kind: str, description: str):
+        self._descriptions.setdefault(name, (kind, description))
+
+    def inc(self, name: str, description: str, labels: dict = None, amount: float = 1):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            self._describe(name, "counter", description)
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name: str, description: str, value: float, labels: dict = None, buckets: tuple = SECONDS_BUCKETS):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            self._describe(name, "histogram", description)
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {"buckets": buckets, "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+            index = bisect.bisect_left(histogram["buckets"], value)
+            if index < len(buckets):
+                histogram["counts"][index] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def gauge(self, name: str, description: str, function):
+        """Register a gauge whose value is read from function() when the metrics are rendered."""
+        with self._lock:
+            self._describe(name, "gauge", description)
+            self._gauges[name] = function
+
+    def recordRequest(self, trace: RequestTrace, outcome: str):
+        """Aggregate a finished request and write it to the structured log."""
+        labels = {"tool": trace.tool}
+        self.inc("gurobi_mcp_requests_total", "Tool calls by outcome.", dict(labels, outcome=outcome))
+        self.observe("gurobi_mcp_request_seconds", "Wall time of tool calls.", trace.elapsed, labels)
+        for phase, seconds in trace.phases.items():
+            self.observe("gurobi_mcp_phase_seconds", "Wall time of each phase of a tool call.", seconds, dict(labels, phase=phase))
+        for dimension, value in trace.model.items():
+            self.observe("gurobi_mcp_model_size", "Rows, columns and nonzeros of built models.", value, {"dimension": dimension}, SIZE_BUCKETS)
+        if "runtime" in trace.solver:
+            self.observe("gurobi_mcp_solver_runtime_seconds", "Gurobi Runtime of solves.", trace.solver["runtime"])
+        for key in ("node_count", "iter_count", "bar_iter_count"):
+            if key in trace.solver:
+                self.inc(f"gurobi_mcp_solver_{key}_total", f"Sum of the Gurobi {SOLVER_ATTRIBUTES[key]} of all solves.", amount=trace.solver[key])
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(dict(trace.toDict(), outcome=outcome)))
+
+    def render(self) -> str:
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: dict(value, counts=list(value["counts"])) for key, value in self._histograms.items()}
+            gauges = dict(self._gauges)
+            descriptions = dict(self._descriptions)
+        lines = []
+        for name in sorted(descriptions):
+            kind, text = descriptions[name]
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "gauge":
+                lines.append(f"{name} {gauges[name]()}")
+            for (counter, labels), value in sorted(counters.items()):
+                if counter == name:
+                    lines.append(f"{name}{_labelText(labels)} {value}")
+            for (histogram, labels), value in sorted(histograms.items()):
+                if histogram != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(value["buckets"], value["counts"]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labelText(labels + (('le', bound),))} {cumulative}")
+                lines.append(f"{name}_bucket{_labelText(labels + (('le', '+Inf'),))} {value['count']}")
+                lines.append(f"{name}_sum{_labelText(labels)} {value['sum']}")
+                lines.append(f"{name}_count{_labelText(labels)} {value['count']}")
+        return "\n".join(lines) + "\n"
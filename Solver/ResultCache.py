@@ -0,0 +1,90 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+#Solve results keyed by the canonical problem hash.
+#Results are stored as JSON text: an in-memory LRU bounded by total text size, and an optional SQLite file
+#that survives restarts. A memory miss that hits on disk is promoted back into memory.
+class ResultCache:
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, db_path: str = None):
+        self.max_bytes = max_bytes
+        self.db_path = db_path or None
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self._db = None
+        if self.db_path is not None:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)")
+            self._db.commit()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 or self._db is not None
+
+    def get(self, key: str):
+        """Return a fresh copy of the cached result for key, or None."""
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return json.loads(text)
+            if self._db is not None:
+                row = self._db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._stats["disk_hits"] += 1
+                    self._storeInMemory(key, row[0])
+                    return json.loads(row[0])
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key: str, result: dict):
+        text = json.dumps(result)
+        with self._lock:
+            self._storeInMemory(key, text)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO results (key, value, stored_at) VALUES (?, ?, ?)", (key, text, time.time()))
+                self._db.commit()
+
+    def _storeInMemory(self, key: str, text: str):
+        size = len(text)
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old)
+        self._entries[key] = text
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+            stats["memory_entries"] = len(self._entries)
+            stats["memory_bytes"] = self._bytes
+            stats["max_bytes"] = self.max_bytes
+            if self._db is not None:
+                stats["disk_entries"] = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            return stats
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
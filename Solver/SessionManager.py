@@ -0,0 +1,112 @@
+import threading
+import time
+import uuid
+from Problem import createProblem
+from .Solve import optimizeModel
+
+class SessionNotFoundError(LookupError):
+    pass
+
+class SessionLimitError(RuntimeError):
+    pass
+
+#A built model kept alive between tool calls so it can be patched and re-solved.
+class Session:
+    def __init__(self, problem):
+        self.id = uuid.uuid4().hex
+        self.problem = problem
+        self.last_used = time.monotonic()
+        self.solves = 0
+        #Serializes patch and solve calls on the same model
+        self.lock = threading.Lock()
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+    def close(self):
+        self.problem.dispose()
+
+#Owns all live sessions. Sessions idle for longer than idle_timeout seconds are closed on the next access,
+#and at most max_sessions models are kept alive at once.
+class SessionManager:
+    def __init__(self, max_sessions: int = 16, idle_timeout: float = 900):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def expireIdle(self) -> int:
+        """Close sessions that have been idle too long and return how many were closed."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [session for session in self._sessions.values()
+                       if now - session.last_used > self.idle_timeout and not session.lock.locked()]
+            for session in expired:
+                del self._sessions[session.id]
+        for session in expired:
+            session.close()
+        return len(expired)
+
+    def create(self, problem: dict) -> Session:
+        """Build the problem and register it as a new session. Blocking, call from a worker thread."""
+        self.expireIdle()
+        with self._lock:
+            if len(self._sessions) >= self.max_sessions:
+                raise SessionLimitError(f"Too many open sessions ({self.max_sessions}). Close a session before creating a new one.")
+        session = Session(createProblem(problem))
+        if session.problem.getModel() is None:
+            raise ValueError("Model creation failed. Please check the problem definition.")
+        with self._lock:
+            #Re-check, another session may have been created while this one was building
+            if len(self._sessions) >= self.max_sessions:
+                session.close()
+                raise SessionLimitError(f"Too many open sessions ({self.max_sessions}). Close a session before creating a new one.")
+            self._sessions[session.id] = session
+        return session
+
+    def get(self, session_id: str) -> Session:
+        self.expireIdle()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                raise SessionNotFoundError(f"Unknown or expired session {session_id}")
+            session.touch()
+            return session
+
+    def patch(self, session_id: str, patch: dict) -> dict:
+        session = self.get(session_id)
+        with session.lock:
+            applied = session.problem.applyPatch(patch)
+            session.touch()
+            return applied
+
+    def solve(self, task, session_id: str):
+        """Re-solve the session model in place. Intended to be run on a SolverPool worker."""
+        session = self.get(session_id)
+        with session.lock:
+            result = optimizeModel(task, session.problem.getModel(), session.problem.getParameters(),
+                                   session.problem.getOutputOptions())
+            if isinstance(result, dict):
+                session.problem.storeSolutionAsStart()
+            session.solves += 1
+            session.touch()
+            return result
+
+    def close(self, session_id: str):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            raise SessionNotFoundError(f"Unknown or expired session {session_id}")
+        with session.lock:
+            session.close()
+
+    def closeAll(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
@@ -0,0 +1,190 @@
+import base64
+import fnmatch
+import re
+import numpy as np
+from gurobipy import GurobiError, GRB
+from Problem import validateOutputOptions
+
+#Builds the solution part of a solve result from a solved model, shaped by the "output" options of the problem.
+#Values are read in bulk with Model.getAttr and filtered with numpy, so large models do not pay per-variable attribute access.
+
+def _nameMask(names: list, patterns: list):
+    regex = re.compile("|".join(fnmatch.translate(pattern) for pattern in patterns))
+    return np.fromiter((regex.match(name) is not None for name in names), dtype=bool, count=len(names))
+
+def selectEntries(names: list, values, options: dict, patterns: list = None):
+    """
+    Apply the name patterns, the sparse tolerance and top_k to one vector.
+    Returns the kept names and values in model order.
+    """
+    values = np.asarray(values, dtype=float)
+    keep = np.ones(len(values), dtype=bool)
+    if patterns:
+        keep &= _nameMask(names, patterns)
+    if options["sparse"]:
+        keep &= np.abs(values) > options["tolerance"]
+    indices = np.flatnonzero(keep)
+    if options["top_k"] is not None and len(indices) > options["top_k"]:
+        largest = np.argsort(-np.abs(values[indices]), kind="stable")[:options["top_k"]]
+        indices = np.sort(indices[largest])
+    return [names[index] for index in indices], values[indices]
+
+def encodeVector(names: list, values, encoding: str):
+    if encoding == "columnar":
+        packed = np.ascontiguousarray(values, dtype="<f8").tobytes()
+        return {"names": names, "values": base64.b64encode(packed).decode("ascii"), "dtype": "float64"}
+    return dict(zip(names, np.asarray(values, dtype=float).tolist()))
+
+def decodeVector(payload) -> dict:
+    """Turn an encoded vector of either encoding back into {name: value}."""
+    if isinstance(payload, dict) and set(payload) == {"names", "values", "dtype"}:
+        values = np.frombuffer(base64.b64decode(payload["values"]), dtype="<f8")
+        return dict(zip(payload["names"], values.tolist()))
+    return dict(payload)
+
+def _constraints(model):
+    constrs = model.getConstrs()
+    qconstrs = model.getQConstrs()
+    names = model.getAttr("ConstrName", constrs) if constrs else []
+    if qconstrs:
+        names = names + model.getAttr("QCName", qconstrs)
+    return constrs, qconstrs, names
+
+def _constraintValues(model, constrs, qconstrs, attribute: str, qattribute: str) -> list:
+    values = model.getAttr(attribute, constrs) if constrs else []
+    if qconstrs:
+        values = values + model.getAttr(qattribute, qconstrs)
+    return values
+
+def _addVector(report: dict, omitted: dict, options: dict, key: str, names: list, values, patterns: list):
+    kept_names, kept_values = selectEntries(names, values, options, patterns)
+    report[key] = encodeVector(kept_names, kept_values, options["encoding"])
+    if len(kept_names) < len(names):
+        omitted[key] = len(names) - len(kept_names)
+
+def _finishReport(report: dict, omitted: dict, notes: list) -> dict:
+    if omitted:
+        report["omitted"] = omitted
+    if notes:
+        report["notes"] = notes
+    return report
+
+def _finite(value: float):
+    return value if abs(value) < GRB.INFINITY else None
+
+def objectivesReport(model) -> list:
+    """Name, priority, weight and value of each objective of a solved multi-objective model."""
+    objectives = []
+    for index in range(model.NumObj):
+        model.setParam("ObjNumber", index)
+        objectives.append({"name": model.ObjNName, "priority": model.ObjNPriority, "weight": model.ObjNWeight,
+                           "objective_value": _finite(model.ObjNVal)})
+    return objectives
+
+def scenariosReport(model, var_names: list, options: dict) -> list:
+    """
+    Name, objective value, bound and solution of each scenario after the base scenario 0 of a solved multi-scenario model.
+    Scenario solutions are always sparse, and a scenario without a feasible solution has none.
+    """
+    variables = model.getVars()
+    sparse = dict(options, sparse=True)
+    scenarios = []
+    for number in range(1, model.NumScenarios):
+        model.setParam("ScenarioNumber", number)
+        scenario = {"name": model.ScenNName, "objective_value": _finite(model.ScenNObjVal), "bound": _finite(model.ScenNObjBound)}
+        if scenario["objective_value"] is not None:
+            names, values = selectEntries(var_names, model.getAttr("ScenNX", variables), sparse, options["variables"])
+            scenario["solution"] = encodeVector(names, values, options["encoding"])
+        scenarios.append(scenario)
+    model.setParam("ScenarioNumber", 0)
+    return scenarios
+
+def solutionReport(model, options: dict = None) -> dict:
+    """
+    Return {"solution": ...} plus "reduced_costs", "duals", "slacks" and "basis" when requested,
+    and "objectives" or "scenarios" for multi-objective and multi-scenario models. The solution and the
+    "objective_value" of a multi-scenario model are those of its base scenario.
+    Vectors that were filtered report how many entries were left out under "omitted".
+    """
+    options = options or validateOutputOptions(None)
+    report = {}
+    omitted = {}
+    notes = []
+
+    def add(key, names, values, patterns):
+        _addVector(report, omitted, options, key, names, values, patterns)
+
+    variables = model.getVars()
+    var_names = model.getAttr("VarName", variables)
+    if model.NumScenarios > 0:
+        #ObjVal and X belong to the best scenario, the result reports the base scenario 0 and lists the others under "scenarios"
+        model.setParam("ScenarioNumber", 0)
+        report["objective_value"] = _finite(model.ScenNObjVal)
+        if report["objective_value"] is None:
+            notes.append("The base scenario has no feasible solution.")
+            add("solution", [], [], None)
+        else:
+            add("solution", var_names, model.getAttr("ScenNX", variables), options["variables"])
+    else:
+        add("solution", var_names, model.getAttr("X", variables), options["variables"])
+
+    if options["reduced_costs"] or options["duals"]:
+        if model.IsMIP:
+            notes.append("Reduced costs and duals are not available for MIP models.")
+        else:
+            try:
+                if options["reduced_costs"]:
+                    add("reduced_costs", var_names, model.getAttr("RC", variables), options["variables"])
+                if options["duals"]:
+                    constrs, qconstrs, names = _constraints(model)
+                    add("duals", names, _constraintValues(model, constrs, qconstrs, "Pi", "QCPi"), options["constraints"])
+            except GurobiError as e:
+                notes.append(f"Reduced costs and duals are not available: {str(e)}")
+    if options["slacks"] and model.NumScenarios > 0:
+        notes.append("Slacks are not available for multi-scenario models.")
+    elif options["slacks"]:
+        constrs, qconstrs, names = _constraints(model)
+        add("slacks", names, _constraintValues(model, constrs, qconstrs, "Slack", "QCSlack"), options["constraints"])
+    if options["basis"]:
+        #Never filtered, a warm start can only use a basis that covers the whole model
+        if model.IsMIP:
+            notes.append("The basis is not available for MIP models.")
+        else:
+            try:
+                constrs = model.getConstrs()
+                report["basis"] = {
+                    "variables": dict(zip(var_names, model.getAttr("VBasis", variables))),
+                    "constraints": dict(zip(model.getAttr("ConstrName", constrs), model.getAttr("CBasis", constrs))) if constrs else {},
+                }
+            except GurobiError as e:
+                notes.append(f"The basis is not available: {str(e)}")
+    if model.NumObj > 1:
+        report["objectives"] = objectivesReport(model)
+    if model.NumScenarios > 0:
+        report["scenarios"] = scenariosReport(model, var_names, options)
+    return _finishReport(report, omitted, notes)
+
+def arraySolutionReport(var_names: list, x, constr_names: list, slacks, options: dict = None,
+                        reduced_costs=None, duals=None, notes: list = None) -> dict:
+    """
+    solutionReport for a solve that did not run in Gurobi, from plain vectors in column and row order.
+    reduced_costs and duals are None where the solver has none, e.g. for MIP models. There is never a basis.
+    """
+    options = options or validateOutputOptions(None)
+    report = {}
+    omitted = {}
+    notes = list(notes or [])
+    _addVector(report, omitted, options, "solution", var_names, x, options["variables"])
+    if options["reduced_costs"] or options["duals"]:
+        if reduced_costs is None or duals is None:
+            notes.append("Reduced costs and duals are not available for MIP models.")
+        else:
+            if options["reduced_costs"]:
+                _addVector(report, omitted, options, "reduced_costs", var_names, reduced_costs, options["variables"])
+            if options["duals"]:
+                _addVector(report, omitted, options, "duals", constr_names, duals, options["constraints"])
+    if options["slacks"]:
+        _addVector(report, omitted, options, "slacks", constr_names, slacks, options["constraints"])
+    if options["basis"]:
+        notes.append("The basis is only available from Gurobi solves.")
+    return _finishReport(report, omitted, notes)
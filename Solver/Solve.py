@@ -0,0 +1,305 @@
+import copy
+import cProfile
+import math
+import os
+import time
+from gurobipy import GRB
+from Problem import (createProblem, compileProblem, CompiledProblem, validateParameters, resolveParameters,
+                     SciPyProblem, selectBackend, canFallBack, reduceProblem)
+import config
+from .SolutionReport import solutionReport, arraySolutionReport
+from .Metrics import tracePhase, MODEL_ATTRIBUTES, SOLVER_ATTRIBUTES
+from .Decomposition import BlockSolver, StopFlag, solveBlocks, solveLagrangian
+
+#Server-wide parameter defaults and caps, validated once at import
+DEFAULT_PARAMETERS = validateParameters(config.GUROBI_MCP_DEFAULT_PARAMETERS)
+PARAMETER_CAPS = validateParameters(config.GUROBI_MCP_PARAMETER_CAPS)
+
+#Statuses of a solve that stopped on a limit. The best solution is returned if one was found.
+LIMIT_STATUSES = (GRB.TIME_LIMIT, GRB.NODE_LIMIT, GRB.SOLUTION_LIMIT, GRB.ITERATION_LIMIT,
+                  GRB.USER_OBJ_LIMIT, GRB.WORK_LIMIT, GRB.MEM_LIMIT)
+
+#Backend of problems that name none, and the size above which auto sends LP and MILP problems to SciPy
+DEFAULT_BACKEND = config.GUROBI_MCP_BACKEND
+GUROBI_SIZE_LIMIT = config.GUROBI_MCP_GUROBI_SIZE_LIMIT
+#Whether problems go through reduceProblem before their Gurobi model is built
+REDUCE_PROBLEMS = config.GUROBI_MCP_REDUCE_PROBLEMS
+#Decomposition settings of problems that give none or leave out some of the keys
+DEFAULT_DECOMPOSITION = {"mode": config.GUROBI_MCP_DECOMPOSITION, "coupling": [],
+                         "max_iterations": config.GUROBI_MCP_LAGRANGIAN_MAX_ITERATIONS,
+                         "time_limit": config.GUROBI_MCP_LAGRANGIAN_TIME_LIMIT}
+#Process pool for the blocks of decomposed problems, started on the first decomposed solve
+BLOCK_SOLVER = BlockSolver(max_workers=config.GUROBI_MCP_DECOMPOSITION_WORKERS)
+
+#Directory that receives a cProfile dump of every traced model build. Empty turns build profiling off.
+BUILD_PROFILE_DIR = config.GUROBI_MCP_PROFILE_DIR
+
+def solverParameters(task, requested: dict) -> dict:
+    """Parameters for one solve: server defaults, then the problem's own parameters, clamped by the server caps and the worker's thread share."""
+    caps = dict(PARAMETER_CAPS)
+    if task is not None:
+        caps["Threads"] = min(caps.get("Threads", task.threads), task.threads)
+    parameters = resolveParameters(requested, DEFAULT_PARAMETERS, caps)
+    if parameters.get("Threads") == 0 and task is not None:
+        parameters["Threads"] = task.threads
+    return parameters
+
+def _relativeGap(incumbent: float, bound: float):
+    if incumbent is None or bound is None or not math.isfinite(incumbent) or not math.isfinite(bound):
+        return None
+    return abs(incumbent - bound) / max(abs(incumbent), 1e-10)
+
+def progressCallback(task, model):
+    """
+    Build a Gurobi callback that records the bound, incumbent, gap, node count and elapsed time on the task,
+    keeps the best incumbent solution, and passes a snapshot to task.on_progress at most once per task.progress_interval.
+    """
+    variables = model.getVars()
+    names = [v.varName for v in variables]
+    last_report = [0.0]
+
+    def report(snapshot, force=False):
+        task.progress = snapshot
+        now = time.monotonic()
+        if task.on_progress is not None and (force or now - last_report[0] >= task.progress_interval):
+            last_report[0] = now
+            task.on_progress(snapshot)
+
+    def callback(model, where):
+        try:
+            if where == GRB.Callback.MIP:
+                incumbent = model.cbGet(GRB.Callback.MIP_OBJBST)
+                bound = model.cbGet(GRB.Callback.MIP_OBJBND)
+                report({
+                    "solve_id": task.id,
+                    "incumbent_objective": incumbent if abs(incumbent) < GRB.INFINITY else None,
+                    "bound": bound if abs(bound) < GRB.INFINITY else None,
+                    "gap": _relativeGap(incumbent, bound) if abs(incumbent) < GRB.INFINITY else None,
+                    "node_count": model.cbGet(GRB.Callback.MIP_NODCNT),
+                    "elapsed": model.cbGet(GRB.Callback.RUNTIME),
+                })
+            elif where == GRB.Callback.MIPSOL:
+                objective = model.cbGet(GRB.Callback.MIPSOL_OBJ)
+                task.setIncumbent(objective, dict(zip(names, model.cbGetSolution(variables))))
+                bound = model.cbGet(GRB.Callback.MIPSOL_OBJBND)
+                report({
+                    "solve_id": task.id,
+                    "incumbent_objective": objective,
+                    "bound": bound if abs(bound) < GRB.INFINITY else None,
+                    "gap": _relativeGap(objective, bound),
+                    "node_count": model.cbGet(GRB.Callback.MIPSOL_NODCNT),
+                    "elapsed": model.cbGet(GRB.Callback.RUNTIME),
+                }, force=True)
+            elif where == GRB.Callback.SIMPLEX:
+                report({
+                    "solve_id": task.id,
+                    "objective": model.cbGet(GRB.Callback.SPX_OBJVAL),
+                    "iteration_count": model.cbGet(GRB.Callback.SPX_ITRCNT),
+                    "elapsed": model.cbGet(GRB.Callback.RUNTIME),
+                })
+        except Exception:
+            #Progress reporting must never abort the solve
+            pass
+
+    return callback
+
+def optimizeModel(task, model, parameters: dict = None, output: dict = None, report=None):
+    """
+    Optimize an already built model on the calling (worker) thread with the given problem parameters.
+    output holds the validated "output" options that shape the solution part of the result.
+    report(model, output) builds the solution part instead of solutionReport, e.g. for a reduced model.
+    Returns the result dictionary, or an error string in the same format as the GurobiSolver tool.
+    """
+    for name, value in solverParameters(task, parameters).items():
+        model.setParam(name, value)
+    if output is not None and output["duals"] and model.IsQCP:
+        #Gurobi only computes duals of quadratic constraints on request
+        model.setParam("QCPDual", 1)
+    trace = task.trace if task is not None else None
+    if task is not None:
+        if not task.attach(model):
+            return "Error: Solve was cancelled before it started."
+    try:
+        with tracePhase(trace, "solve"):
+            if task is not None:
+                model.optimize(progressCallback(task, model))
+            else:
+                model.optimize()
+    finally:
+        if task is not None:
+            task.detach()
+    if trace is not None:
+        #Read after the solve, which has applied any additions a lazy build left pending
+        trace.recordAttributes(trace.model, model, MODEL_ATTRIBUTES)
+        trace.recordAttributes(trace.solver, model, SOLVER_ATTRIBUTES)
+        trace.solver["status"] = model.status
+    #A solve stopped early through StopSolve still returns its best solution
+    stopped_with_solution = model.status == GRB.INTERRUPTED and model.SolCount > 0 and (task is None or not task.cancelled)
+    stopped_on_limit = model.status in LIMIT_STATUSES and model.SolCount > 0
+    if model.status == GRB.OPTIMAL or stopped_on_limit or stopped_with_solution:
+        result = {
+            "status": model.status,
+            "objective_value": model.objVal,
+        }
+        with tracePhase(trace, "report"):
+            result.update((report or solutionReport)(model, output))
+        return result
+    elif model.status == GRB.INTERRUPTED:
+        return "Error: Optimization was cancelled."
+    elif model.status in LIMIT_STATUSES:
+        return f"Error: Optimization stopped with status {model.status} before a solution was found. Consider raising the limit in parameters."
+    else:
+        return f"Error: Optimization failed with status {model.status}. Please check the problem definition."
+
+def buildProblem(task, problem):
+    """
+    createProblem for a solve that follows right away, recording the build time and its steps in the task's trace.
+    The build runs under cProfile when BUILD_PROFILE_DIR is set.
+    """
+    trace = task.trace if task is not None else None
+    #The solve follows right away and applies the pending additions, so the build skips its own model.update()
+    if trace is None:
+        return createProblem(problem, lazy_update=True)
+    profiler = cProfile.Profile() if BUILD_PROFILE_DIR else None
+    with trace.phase("build"):
+        if profiler is not None:
+            profiler.enable()
+        try:
+            built = createProblem(problem, lazy_update=True)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+    if profiler is not None:
+        os.makedirs(BUILD_PROFILE_DIR, exist_ok=True)
+        trace.profile = os.path.join(BUILD_PROFILE_DIR, f"build-{task.id}-{int(time.time())}.prof")
+        profiler.dump_stats(trace.profile)
+    for step, seconds in built.build_timings.items():
+        trace.record("build." + step, seconds)
+    return built
+
+def solveWithSciPy(task, compiled, notes: list = None):
+    """Solve an LP or MILP with the SciPy backend on the calling (worker) thread. The result has the format of optimizeModel plus "backend"."""
+    trace = task.trace if task is not None else None
+    if task is not None and task.cancelled:
+        return "Error: Solve was cancelled before it started."
+    try:
+        problem = SciPyProblem(compiled)
+        with tracePhase(trace, "solve"):
+            solution = problem.solve(solverParameters(task, problem.getParameters()))
+    except ValueError as e:
+        return f"Error: {str(e)}"
+    except Exception as e:
+        return f"Error: Optimization failed. {str(e)}"
+    if trace is not None:
+        trace.solver["runtime"] = solution.runtime
+        trace.solver["status"] = solution.status
+    if solution.x is None:
+        if solution.status in LIMIT_STATUSES:
+            return f"Error: Optimization stopped with status {solution.status} before a solution was found. Consider raising the limit in parameters."
+        return f"Error: Optimization failed with status {solution.status}. Please check the problem definition."
+    result = {
+        "status": solution.status,
+        "objective_value": solution.objective,
+        "backend": "scipy",
+    }
+    with tracePhase(trace, "report"):
+        slacks = compiled.rhs - compiled.A @ solution.x
+        result.update(arraySolutionReport(compiled.var_names, solution.x, compiled.constr_names, slacks, problem.getOutputOptions(),
+                                          solution.reduced_costs, solution.duals, (notes or []) + solution.notes))
+    return result
+
+def reducedSolutionReport(reduction, model, output: dict) -> dict:
+    """The solution part of a result for the original problem of a reduction, from the solved reduced model."""
+    original = reduction.original
+    x = reduction.expand(model.getAttr("X", model.getVars()))
+    slacks = original.rhs - original.A @ x if output["slacks"] else None
+    return arraySolutionReport(original.var_names, x, original.constr_names, slacks, output)
+
+def _solveWithGurobi(task, compiled, fallback: bool):
+    """Build and optimize with Gurobi. With fallback, license errors are raised for solveProblem to retry on SciPy."""
+    report = None
+    if REDUCE_PROBLEMS:
+        with tracePhase(task.trace if task is not None else None, "reduce"):
+            reduced, reduction = reduceProblem(compiled)
+        if reduction is not None:
+            compiled = reduced
+            report = lambda model, output: reducedSolutionReport(reduction, model, output)
+    try:
+        problem = buildProblem(task, compiled)
+    except ValueError as e:
+        return f"Error: {str(e)}"
+    except Exception as e:
+        if fallback and canFallBack(compiled, e, DEFAULT_BACKEND):
+            raise
+        return f"Error: Model creation failed. {str(e)}"
+    try:
+        model = problem.getModel()
+        if model is None:
+            return "Error: Model creation failed. Please check the problem definition."
+        return optimizeModel(task, model, problem.getParameters(), problem.getOutputOptions(), report)
+    except Exception as e:
+        if fallback and canFallBack(compiled, e, DEFAULT_BACKEND):
+            raise
+        return f"Error: Optimization failed. {str(e)}"
+    finally:
+        #The result holds plain values only, so the model and its environment can be released right away
+        problem.dispose()
+
+def solveDecomposed(task, compiled, settings: dict):
+    """
+    Solve a problem in blocks with the given decomposition settings. Returns (result, problem, report): the result,
+    or None with the problem to solve as one model instead (started from the last Lagrangian iteration, if any)
+    and the report of the decomposition to add to its result.
+    """
+    trace = task.trace if task is not None else None
+    parameters = solverParameters(task, compiled.parameters)
+    #StopSolve and cancellation reach the block solves through the flag attached in place of a model
+    stop = StopFlag()
+    if task is not None and not task.attach(stop):
+        return "Error: Solve was cancelled before it started.", compiled, None
+    try:
+        with tracePhase(trace, "decomposition"):
+            if settings["mode"] == "blocks":
+                result, x, report = solveBlocks(BLOCK_SOLVER, compiled, parameters, stop), None, {"mode": "blocks", "components": 1, "blocks": 1}
+            else:
+                result, x, report = solveLagrangian(BLOCK_SOLVER, compiled, parameters, settings["coupling"],
+                                                    settings["max_iterations"], settings["time_limit"], stop)
+    finally:
+        if task is not None:
+            task.detach()
+    #Like optimizeModel: a stopped solve returns its best solution, a cancelled one or one without a solution does not
+    if stop.stopped and (not isinstance(result, dict) or (task is not None and task.cancelled)):
+        return "Error: Optimization was cancelled.", compiled, None
+    if result is None and x is not None:
+        compiled = copy.copy(compiled)
+        compiled.start = x
+    return result, compiled, report
+
+def solveProblem(task, problem: dict):
+    """
+    Build and optimize the problem on the calling (worker) thread. problem is a problem dict or a CompiledProblem.
+    The backend is chosen with selectBackend; an "auto" LP or MILP that Gurobi has no license for is solved with SciPy instead.
+    Gurobi solves are split into blocks by the decomposition settings, see solveDecomposed.
+    A result reports the class of the problem detected by analyzeProblem under "problem_class".
+    """
+    try:
+        compiled = problem if isinstance(problem, CompiledProblem) else compileProblem(problem)
+        backend = selectBackend(compiled, DEFAULT_BACKEND, GUROBI_SIZE_LIMIT)
+    except ValueError as e:
+        return f"Error: {str(e)}"
+    settings = dict(DEFAULT_DECOMPOSITION, **(compiled.decomposition or {}))
+    result, decomposition = None, None
+    if backend == "scipy":
+        result = solveWithSciPy(task, compiled)
+    elif settings["mode"] != "off" and not (compiled.objectives or compiled.scenarios):
+        result, compiled, decomposition = solveDecomposed(task, compiled, settings)
+    if result is None:
+        try:
+            result = _solveWithGurobi(task, compiled, fallback=True)
+        except Exception as e:
+            result = solveWithSciPy(task, compiled, [f"Solved with the scipy backend because Gurobi failed: {str(e)}"])
+        if isinstance(result, dict) and decomposition is not None:
+            result["decomposition"] = decomposition
+    if isinstance(result, dict) and compiled.analysis is not None:
+        result["problem_class"] = compiled.analysis.report()
+    return result
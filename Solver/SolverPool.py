@@ -0,0 +1,145 @@
+import asyncio
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+class SolverQueueFullError(RuntimeError):
+    pass
+
+#Handle shared between the event loop and the worker thread that runs one solve.
+#The worker attaches the model once it is built so the event loop can interrupt it.
+class SolveTask:
+    _ids = itertools.count(1)
+
+    def __init__(self, threads: int, on_progress=None, progress_interval: float = 1.0, trace=None):
+        self.id = next(SolveTask._ids)
+        self.threads = threads
+        self.cancelled = False
+        #Called from the solver thread with a progress snapshot at most once per progress_interval seconds
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+        #Latest progress snapshot and best incumbent seen by the solver callback
+        self.progress = {}
+        self.incumbent = None
+        self.incumbent_objective = None
+        #RequestTrace of the tool call that receives the queue wait and the build and solve phases, or None
+        self.trace = trace
+        self.submitted = time.perf_counter()
+        self._model = None
+        self._lock = threading.Lock()
+
+    def attach(self, model) -> bool:
+        """
+        Register the model that is about to be optimized.
+        Returns False if the task was cancelled in the meantime and the solve should not start.
+        """
+        with self._lock:
+            self._model = model
+            return not self.cancelled
+
+    def detach(self):
+        with self._lock:
+            self._model = None
+
+    def stop(self):
+        """Ask a running solve to stop early. It returns the best solution found so far."""
+        with self._lock:
+            if self._model is not None:
+                #terminate() is safe to call from another thread, optimize() returns with status INTERRUPTED
+                self._model.terminate()
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+        self.stop()
+
+    def setIncumbent(self, objective: float, solution: dict):
+        with self._lock:
+            self.incumbent_objective = objective
+            self.incumbent = solution
+
+    def getIncumbent(self):
+        with self._lock:
+            return self.incumbent_objective, self.incumbent
+
+#Runs blocking solves in a bounded thread pool so the event loop stays free for other tool calls.
+#gurobipy releases the GIL inside optimize(), so worker threads solve in parallel.
+class SolverPool:
+    def __init__(self, max_workers: int = 0, threads_per_solve: int = 0, max_queue: int = 32, progress_interval: float = 1.0):
+        cpu_count = os.cpu_count() or 1
+        if max_workers <= 0:
+            if threads_per_solve > 0:
+                max_workers = max(1, cpu_count // threads_per_solve)
+            else:
+                max_workers = min(2, cpu_count)
+        if threads_per_solve <= 0:
+            threads_per_solve = max(1, cpu_count // max_workers)
+        self.max_workers = max_workers
+        self.threads_per_solve = threads_per_solve
+        self.max_queue = max(0, max_queue)
+        self.progress_interval = progress_interval
+        self._tasks = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gurobi-solver")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Number of solves that are running or waiting for a worker."""
+        with self._lock:
+            return self._pending
+
+    def getTask(self, task_id: int):
+        """Return the running or queued SolveTask with the given id, or None."""
+        with self._lock:
+            return self._tasks.get(task_id)
+
+    def _release(self, task):
+        with self._lock:
+            self._pending -= 1
+            self._tasks.pop(task.id, None)
+
+    def _runTask(self, fn, task, *args):
+        if task.trace is not None:
+            task.trace.record("queue_wait", time.perf_counter() - task.submitted)
+        return fn(task, *args)
+
+    def submit(self, fn, *args, on_progress=None, trace=None):
+        """
+        Queue fn(task, *args) on a worker thread and return the SolveTask and the concurrent.futures.Future of its result.
+        Raises SolverQueueFullError when all workers are busy and the queue is full.
+        """
+        task = SolveTask(self.threads_per_solve, on_progress=on_progress, progress_interval=self.progress_interval, trace=trace)
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                raise SolverQueueFullError(f"Solver queue is full ({self._pending} solves pending). Try again later.")
+            self._pending += 1
+            self._tasks[task.id] = task
+        try:
+            future = self._executor.submit(self._runTask, fn, task, *args)
+        except BaseException:
+            self._release(task)
+            raise
+        #The pending slot is released when the worker finishes, not when the caller stops waiting
+        future.add_done_callback(lambda _: self._release(task))
+        return task, future
+
+    async def run(self, fn, *args, on_progress=None, trace=None):
+        """
+        Run fn(task, *args) on a worker thread and return its result.
+        Raises SolverQueueFullError when all workers are busy and the queue is full.
+        If the awaiting call is cancelled (e.g. the MCP client disconnects) a queued solve is dropped
+        and a running solve is terminated.
+        """
+        task, future = self.submit(fn, *args, on_progress=on_progress, trace=trace)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            future.cancel()
+            task.cancel()
+            raise
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,9 @@
+#Create references for the classes in this module so it is acessible from the package level
+from .SolverPool import SolverPool, SolveTask, SolverQueueFullError
+from .Solve import solveProblem
+from .ResultCache import ResultCache
+from .SessionManager import SessionManager, Session, SessionNotFoundError, SessionLimitError
+from .BatchSolver import BatchSolver, expandBatch, mergeProblem
+from .Metrics import MetricsRegistry, RequestTrace
+from .JobManager import JobManager, Job, JobNotFoundError, JobLimitError
+from .Decomposition import BlockSolver, solveBlocks, solveLagrangian
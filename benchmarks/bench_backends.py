@@ -0,0 +1,77 @@
+import argparse
+import json
+import os
+import time
+from gurobipy import GRB
+from Problem import compileProblem, scipyUnsupported
+from Solver import solveProblem
+from benchmarks.generators import generateLP
+
+#Solve the same compiled problems with the Gurobi and SciPy backends and compare the time and the objective of each.
+#Covers the LP and MILP fixtures in TestProblems and generated instances; problems SciPy cannot solve are skipped.
+#Exits with status 1 if the two backends solve an instance to optimality with different objectives.
+#Generated MILPs get a time limit, instances that stop on it in either backend are not compared.
+#Run from the repository root: python -m benchmarks.bench_backends
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIZES = [(200, 100), (1000, 500), (1900, 1500)]
+BACKENDS = ("gurobi", "scipy")
+
+def fixtures() -> list:
+    folder = os.path.join(ROOT, "TestProblems")
+    problems = []
+    for name in sorted(os.listdir(folder)):
+        with open(os.path.join(folder, name)) as file:
+            problems.append((name, json.load(file)))
+    return problems
+
+def timeSolve(compiled, backend: str, repeat: int):
+    """Best seconds of repeat solves with the backend, and the last result."""
+    compiled.backend = backend
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = solveProblem(None, compiled)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the Gurobi and SciPy backends on the fixtures and generated LPs and MILPs.")
+    parser.add_argument("--density", type=float, default=0.01, help="Fraction of variables appearing in each constraint")
+    parser.add_argument("--repeat", type=int, default=3, help="Solves per measurement, the best time is reported")
+    parser.add_argument("--time-limit", type=float, default=20, help="TimeLimit of the generated instances in seconds")
+    parser.add_argument("--tolerance", type=float, default=1e-6, help="Relative objective difference reported as a disagreement")
+    args = parser.parse_args()
+
+    instances = fixtures()
+    for num_vars, num_constrs in SIZES:
+        for integer in (False, True):
+            problem = generateLP(num_vars, num_constrs, density=args.density, integer=integer)
+            problem["parameters"] = {"TimeLimit": args.time_limit}
+            instances.append((problem["problem"]["name"], problem))
+
+    print(f"{'instance':<22}" + "".join(f"{backend + ' (s)':>14}" for backend in BACKENDS) + f"{'objective':>16}{'agree':>7}")
+    disagreements = 0
+    for name, problem in instances:
+        compiled = compileProblem(problem)
+        if scipyUnsupported(compiled) is not None:
+            continue
+        times, objectives, optimal = {}, {}, True
+        for backend in BACKENDS:
+            times[backend], result = timeSolve(compiled, backend, args.repeat)
+            objectives[backend] = result["objective_value"] if isinstance(result, dict) else None
+            optimal = optimal and isinstance(result, dict) and result["status"] == GRB.OPTIMAL
+        gurobi, scipy = objectives["gurobi"], objectives["scipy"]
+        if optimal:
+            agree = "yes" if abs(gurobi - scipy) <= args.tolerance * max(1.0, abs(gurobi)) else "NO"
+        else:
+            agree = "limit"
+        disagreements += agree == "NO"
+        objective = f"{gurobi:>16.6g}" if gurobi is not None else f"{'-':>16}"
+        print(f"{name:<22}" + "".join(f"{times[backend]:>14.3f}" for backend in BACKENDS) + objective + f"{agree:>7}")
+    if disagreements:
+        print(f"{disagreements} instances solved to different objectives")
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
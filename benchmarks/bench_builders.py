@@ -0,0 +1,39 @@
+import argparse
+import time
+from Problem import createProblem
+from benchmarks.generators import generateLP
+
+#Compare the "expression" (LinExpr per constraint) and "matrix" (addMVar/addMConstr) model builders.
+#Run from the repository root: python -m benchmarks.bench_builders
+
+SIZES = [(1000, 500), (10000, 5000), (50000, 20000), (100000, 50000)]
+
+def timeBuild(problem: dict, builder: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        built = createProblem(problem, builder)
+        best = min(best, time.perf_counter() - start)
+        built.dispose()
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the model builders on generated LP/MILP instances.")
+    parser.add_argument("--density", type=float, default=0.001, help="Fraction of variables appearing in each constraint")
+    parser.add_argument("--repeat", type=int, default=3, help="Builds per measurement, the best time is reported")
+    parser.add_argument("--max-vars", type=int, default=None, help="Skip instances with more variables than this")
+    args = parser.parse_args()
+
+    print(f"{'instance':<22}{'nonzeros':>10}{'expression (s)':>16}{'matrix (s)':>12}{'speedup':>9}")
+    for num_vars, num_constrs in SIZES:
+        if args.max_vars is not None and num_vars > args.max_vars:
+            continue
+        for integer in (False, True):
+            problem = generateLP(num_vars, num_constrs, density=args.density, integer=integer)
+            nonzeros = sum(len(c["lhs"]) for c in problem["constraints"]["linear_constraints"])
+            expression = timeBuild(problem, "expression", args.repeat)
+            matrix = timeBuild(problem, "matrix", args.repeat)
+            print(f"{problem['problem']['name']:<22}{nonzeros:>10}{expression:>16.3f}{matrix:>12.3f}{expression / matrix:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
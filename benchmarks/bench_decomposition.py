@@ -0,0 +1,52 @@
+import argparse
+import time
+from gurobipy import GRB
+from Solver import solveProblem
+from benchmarks.generators import generateBlockMILP
+
+#Solve generated block-structured MILPs three ways: as one model, split into their independent blocks ("blocks"), and
+#with the linking constraints relaxed into a Lagrangian loop over the blocks ("lagrangian"). Reports the time and
+#objective of each mode, and checks that the blocks mode reaches the objective of the single model (within the MIP gap).
+#Exits with status 1 if it does not. Instances without linking constraints split into blocks as they are.
+#Run from the repository root: python -m benchmarks.bench_decomposition
+
+#(blocks, variables per block, constraints per block, linking constraints), within the size-limited license
+INSTANCES = [(4, 100, 60, 0), (8, 100, 60, 0), (16, 100, 60, 0), (8, 100, 60, 2), (16, 100, 60, 4)]
+
+def solveMode(problem: dict, mode: str, iterations: int):
+    start = time.perf_counter()
+    result = solveProblem(None, dict(problem, decomposition={"mode": mode, "max_iterations": iterations}))
+    seconds = time.perf_counter() - start
+    if isinstance(result, str):
+        return seconds, None, False
+    return seconds, result["objective_value"], result["status"] == GRB.OPTIMAL
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare decomposition modes on block-structured MILPs.")
+    parser.add_argument("--iterations", type=int, default=20, help="max_iterations of the lagrangian mode")
+    parser.add_argument("--time-limit", type=float, default=30, help="TimeLimit of each solve in seconds")
+    parser.add_argument("--mip-gap", type=float, default=1e-4, help="MIPGap of every solve, also the allowed objective difference")
+    args = parser.parse_args()
+
+    print(f"{'instance':<26}{'off (s)':>9}{'blocks (s)':>12}{'lagrangian (s)':>16}{'off obj':>11}{'lagr. obj':>11}{'agree':>7}")
+    disagreements = 0
+    for seed, (num_blocks, vars_per_block, constrs_per_block, coupling) in enumerate(INSTANCES):
+        problem = generateBlockMILP(num_blocks, vars_per_block, constrs_per_block, coupling=coupling, seed=seed)
+        problem["parameters"] = {"MIPGap": args.mip_gap, "TimeLimit": args.time_limit}
+        single, single_objective, single_optimal = solveMode(problem, "off", args.iterations)
+        blocks, blocks_objective, blocks_optimal = solveMode(problem, "blocks", args.iterations)
+        lagrangian, lagrangian_objective, _ = solveMode(problem, "lagrangian", args.iterations)
+        if single_optimal and blocks_optimal:
+            same = abs(single_objective - blocks_objective) <= 2 * args.mip_gap * max(1.0, abs(single_objective))
+            agree = "yes" if same else "NO"
+        else:
+            agree = "limit"
+        disagreements += agree == "NO"
+        print(f"{problem['problem']['name']:<26}{single:>9.3f}{blocks:>12.3f}{lagrangian:>16.3f}"
+              f"{single_objective or float('nan'):>11.1f}{lagrangian_objective or float('nan'):>11.1f}{agree:>7}", flush=True)
+    if disagreements:
+        print(f"{disagreements} instances solved to different objectives in blocks")
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+import gurobipy as gp
+from Problem import compileProblem, createProblem
+from Solver.Solve import optimizeModel
+from benchmarks.generators import generateProblem
+
+#Time and memory of each phase of the GurobiSolver pipeline on generated LP/MILP/QP/QCP instances:
+#parse (JSON decode and compile), build (Gurobi model), solve, serialize (LP text) and encode (JSON result).
+#Results are written as JSON so runs on different commits can be compared with --compare.
+#Run from the repository root: python -m benchmarks.bench_pipeline --suite small --output results.json
+
+PHASES = ("parse", "build", "solve", "serialize", "encode")
+
+#Instance specs per suite, passed to generators.generateProblem. "small" fits a size-limited Gurobi license,
+#which also caps quadratic models at far fewer variables than linear ones.
+SUITES = {
+    "small": [
+        {"type": "LP", "num_vars": 1000, "num_constrs": 500, "density": 0.01},
+        {"type": "MILP", "num_vars": 500, "num_constrs": 250, "density": 0.02},
+        {"type": "QP", "num_vars": 150, "num_constrs": 100, "density": 0.05, "q_terms": 300},
+        {"type": "QCP", "num_vars": 150, "num_constrs": 100, "density": 0.05, "q_terms": 300, "num_qconstrs": 10},
+    ],
+    "medium": [
+        {"type": "LP", "num_vars": 20000, "num_constrs": 10000, "density": 0.001},
+        {"type": "LP", "num_vars": 20000, "num_constrs": 10000, "density": 0.005},
+        {"type": "MILP", "num_vars": 20000, "num_constrs": 10000, "density": 0.001},
+        {"type": "QP", "num_vars": 20000, "num_constrs": 10000, "density": 0.001, "q_terms": 20000},
+        {"type": "QCP", "num_vars": 20000, "num_constrs": 10000, "density": 0.001, "q_terms": 20000, "num_qconstrs": 50},
+    ],
+    "large": [
+        {"type": "LP", "num_vars": 100000, "num_constrs": 50000, "density": 0.0005},
+        {"type": "MILP", "num_vars": 100000, "num_constrs": 50000, "density": 0.0005},
+        {"type": "QP", "num_vars": 100000, "num_constrs": 50000, "density": 0.0005, "q_terms": 100000},
+        {"type": "QCP", "num_vars": 100000, "num_constrs": 50000, "density": 0.0005, "q_terms": 100000, "num_qconstrs": 200},
+    ],
+}
+
+class PhaseTimer:
+    """Records the wall time of each phase."""
+    def __init__(self):
+        self.values = {}
+
+    def __call__(self, phase: str, function):
+        start = time.perf_counter()
+        value = function()
+        self.values[phase] = time.perf_counter() - start
+        return value
+
+class PhaseMemory:
+    """
+    Records the peak Python heap allocation of each phase with tracemalloc. Memory Gurobi allocates in its
+    own library is not traced, the process peak RSS is reported separately for that.
+    """
+    def __init__(self):
+        self.values = {}
+
+    def __call__(self, phase: str, function):
+        tracemalloc.start()
+        try:
+            value = function()
+            self.values[phase] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return value
+
+def runPipeline(payload: str, measure) -> dict:
+    """Run every phase once on a JSON payload, measuring each with measure(phase, function). Returns the result."""
+    compiled = measure("parse", lambda: compileProblem(json.loads(payload)))
+    problem = measure("build", lambda: createProblem(compiled))
+    try:
+        result = measure("solve", lambda: optimizeModel(None, problem.getModel(), problem.getParameters(), problem.getOutputOptions()))
+        measure("serialize", problem.getProblemAsLP)
+        measure("encode", lambda: json.dumps(result))
+    finally:
+        problem.dispose()
+    return result
+
+def benchmarkInstance(spec: dict, repeat: int, parameters: dict) -> dict:
+    """Best-of-repeat time and peak Python memory per phase for one generated instance."""
+    problem = generateProblem(spec)
+    problem["parameters"] = parameters
+    payload = json.dumps(problem)
+    seconds = {phase: float("inf") for phase in PHASES}
+    for _ in range(repeat):
+        timer = PhaseTimer()
+        result = runPipeline(payload, timer)
+        for phase, value in timer.values.items():
+            seconds[phase] = min(seconds[phase], value)
+    memory = PhaseMemory()
+    runPipeline(payload, memory)
+    compiled = compileProblem(problem)
+    return {
+        "instance": problem["problem"]["name"],
+        "spec": spec,
+        "num_vars": compiled.num_vars,
+        "num_constrs": compiled.num_constrs,
+        "num_qconstrs": compiled.num_qconstrs,
+        "nonzeros": int(compiled.A.nnz),
+        "payload_bytes": len(payload),
+        "status": result["status"] if isinstance(result, dict) else result,
+        "seconds": seconds,
+        "peak_bytes": memory.values,
+    }
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def runSuite(specs: list, repeat: int = 3, parameters: dict = None) -> dict:
+    results = []
+    for spec in specs:
+        results.append(benchmarkInstance(spec, repeat, parameters or {}))
+    return {
+        "commit": _commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "gurobi": ".".join(str(part) for part in gp.gurobi.version()),
+        "parameters": parameters or {},
+        "repeat": repeat,
+        #ru_maxrss is in kilobytes on Linux
+        "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "results": results,
+    }
+
+def compareRuns(baseline: dict, current: dict, threshold: float) -> list:
+    """Phases of instances present in both runs that got slower than threshold times the baseline."""
+    previous = {result["instance"]: result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        before = previous.get(result["instance"])
+        if before is None:
+            continue
+        for phase in PHASES:
+            old, new = before["seconds"].get(phase), result["seconds"].get(phase)
+            #Phases that take under 10 ms are too noisy to compare
+            if old is not None and new is not None and max(old, new) >= 1e-2 and new > old * threshold:
+                regressions.append(f"{result['instance']} {phase}: {old:.4f}s -> {new:.4f}s ({new / old:.2f}x)")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the parse, build, solve, serialize and encode phases on generated instances.")
+    parser.add_argument("--suite", choices=sorted(SUITES), default="small", help="Set of generated instances to run")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per instance, the best time per phase is reported")
+    parser.add_argument("--threads", type=int, default=1, help="Gurobi Threads parameter, 1 keeps solve times comparable")
+    parser.add_argument("--time-limit", type=float, default=60, help="Gurobi TimeLimit per solve in seconds")
+    parser.add_argument("--mip-gap", type=float, default=0.01, help="Gurobi MIPGap, so MIP instances finish in a stable time")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to check for regressions")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    run = runSuite(SUITES[args.suite], args.repeat, {"Threads": args.threads, "TimeLimit": args.time_limit, "MIPGap": args.mip_gap})
+    print(f"{'instance':<28}" + "".join(f"{phase + ' (s)':>14}" for phase in PHASES) + f"{'peak MB':>10}")
+    for result in run["results"]:
+        peak = max(result["peak_bytes"].values()) / 2**20
+        print(f"{result['instance']:<28}" + "".join(f"{result['seconds'][phase]:>14.4f}" for phase in PHASES) + f"{peak:>10.1f}")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(run, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compareRuns(json.load(file), run, args.threshold)
+        for regression in regressions:
+            print("Regression:", regression)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
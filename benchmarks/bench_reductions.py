@@ -0,0 +1,48 @@
+import argparse
+import time
+from Problem import compileProblem, reduceProblem
+from Solver import Solve, solveProblem
+from benchmarks.generators import generateSloppyLP
+
+#Measure the reductions of reduceProblem on generated LPs cluttered with zero coefficients, fixed variables,
+#singleton rows and unused variables: the rows and columns removed, and the time of a full solve with and without them.
+#The two solves must reach the same objective.
+#Run from the repository root: python -m benchmarks.bench_reductions
+
+SIZES = [(500, 1000), (1000, 5000), (1900, 20000)]
+
+def timeSolve(problem, reduce: bool, repeat: int):
+    best = float("inf")
+    Solve.REDUCE_PROBLEMS = reduce
+    try:
+        for _ in range(repeat):
+            compiled = compileProblem(problem)
+            start = time.perf_counter()
+            result = solveProblem(None, compiled)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        Solve.REDUCE_PROBLEMS = True
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the presolve-style reductions on cluttered LPs.")
+    parser.add_argument("--density", type=float, default=0.01, help="Fraction of variables appearing in each constraint")
+    parser.add_argument("--clutter", type=float, default=0.3, help="Rate of zero terms, fixed variables, singleton rows and unused variables")
+    parser.add_argument("--repeat", type=int, default=3, help="Solves per measurement, the best time is reported")
+    args = parser.parse_args()
+
+    print(f"{'instance':<24}{'rows':>9}{'removed':>9}{'columns':>9}{'removed':>9}{'as sent (s)':>13}{'reduced (s)':>13}{'speedup':>9}")
+    for num_vars, num_constrs in SIZES:
+        problem = generateSloppyLP(num_vars, num_constrs, density=args.density, clutter=args.clutter)
+        compiled = compileProblem(problem)
+        _, reduction = reduceProblem(compiled)
+        stats = reduction.stats if reduction is not None else {"rows": 0, "columns": 0}
+        plain, plain_result = timeSolve(problem, False, args.repeat)
+        reduced, reduced_result = timeSolve(problem, True, args.repeat)
+        if abs(plain_result["objective_value"] - reduced_result["objective_value"]) > 1e-6 * max(1.0, abs(plain_result["objective_value"])):
+            raise SystemExit(f"{problem['problem']['name']}: objective {reduced_result['objective_value']} after reduction, {plain_result['objective_value']} without")
+        print(f"{problem['problem']['name']:<24}{compiled.num_constrs:>9}{stats['rows']:>9}{compiled.num_vars:>9}{stats['columns']:>9}"
+              f"{plain:>13.3f}{reduced:>13.3f}{plain / reduced:>8.2f}x")
+
+if __name__ == "__main__":
+    main()
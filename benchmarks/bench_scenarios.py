@@ -0,0 +1,70 @@
+import argparse
+import copy
+import time
+from gurobipy import GRB
+from Solver import solveProblem
+from benchmarks.generators import generateLP
+
+#Answer a "what if every capacity grows by 5%, 10%, ..." sweep on generated LPs and MILPs two ways: one solve per variant,
+#each building its own model, and one multi-scenario solve of a single model. Reports both times and checks that every
+#variant reaches the same objective both ways (within the MIP gap). Exits with status 1 if one does not.
+#Instances get a time limit, those that stop on it are not compared.
+#Run from the repository root: python -m benchmarks.bench_scenarios
+
+SIZES = [(200, 100), (1000, 500), (1900, 1500)]
+
+def variants(problem: dict, count: int, step: float) -> list:
+    """The rhs of every constraint of each variant, scaled by 1 + step, 1 + 2 * step, ..."""
+    constraints = problem["constraints"]["linear_constraints"]
+    return [{constraint["name"]: constraint["rhs"] * (1 + step * number) for constraint in constraints} for number in range(1, count + 1)]
+
+def solveSeparately(problem: dict, rhs_variants: list):
+    """Seconds of all solves, the objective of each, and whether all of them were solved to optimality."""
+    start = time.perf_counter()
+    results = [solveProblem(None, problem)]
+    for rhs in rhs_variants:
+        variant = copy.deepcopy(problem)
+        for constraint in variant["constraints"]["linear_constraints"]:
+            constraint["rhs"] = rhs[constraint["name"]]
+        results.append(solveProblem(None, variant))
+    seconds = time.perf_counter() - start
+    return seconds, [result["objective_value"] for result in results], all(result["status"] == GRB.OPTIMAL for result in results)
+
+def solveScenarios(problem: dict, rhs_variants: list):
+    scenarios = [{"name": f"variant{number}", "rhs": rhs} for number, rhs in enumerate(rhs_variants, start=1)]
+    start = time.perf_counter()
+    result = solveProblem(None, dict(problem, scenarios=scenarios))
+    seconds = time.perf_counter() - start
+    return seconds, [result["objective_value"]] + [scenario["objective_value"] for scenario in result["scenarios"]], result["status"] == GRB.OPTIMAL
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare a sweep of separate solves with one multi-scenario solve.")
+    parser.add_argument("--scenarios", type=int, default=10, help="Variants besides the problem itself")
+    parser.add_argument("--step", type=float, default=0.05, help="Growth of every rhs from one variant to the next")
+    parser.add_argument("--density", type=float, default=0.01, help="Fraction of variables appearing in each constraint")
+    parser.add_argument("--time-limit", type=float, default=20, help="TimeLimit of each solve in seconds")
+    parser.add_argument("--mip-gap", type=float, default=1e-4, help="MIPGap of the MILP instances, also the allowed objective difference")
+    args = parser.parse_args()
+
+    print(f"{'instance':<18}{'separate (s)':>14}{'scenarios (s)':>15}{'speedup':>9}{'agree':>7}")
+    disagreements = 0
+    for num_vars, num_constrs in SIZES:
+        for integer in (False, True):
+            problem = generateLP(num_vars, num_constrs, density=args.density, integer=integer)
+            problem["parameters"] = {"MIPGap": args.mip_gap, "TimeLimit": args.time_limit}
+            rhs_variants = variants(problem, args.scenarios, args.step)
+            separate, separate_objectives, separate_optimal = solveSeparately(problem, rhs_variants)
+            together, scenario_objectives, scenario_optimal = solveScenarios(problem, rhs_variants)
+            if separate_optimal and scenario_optimal:
+                same = all(abs(a - b) <= 2 * args.mip_gap * max(1.0, abs(a)) for a, b in zip(separate_objectives, scenario_objectives))
+                agree = "yes" if same else "NO"
+            else:
+                agree = "limit"
+            disagreements += agree == "NO"
+            print(f"{problem['problem']['name']:<18}{separate:>14.3f}{together:>15.3f}{separate / together:>8.2f}x{agree:>7}", flush=True)
+    if disagreements:
+        print(f"{disagreements} instances solved to different objectives")
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from benchmarks.generators import generateLP
+
+#Time a cold start of the server the way an MCP host sees it: launch main.py over stdio, then time the answers to
+#initialize, tools/list and a first GurobiSolver call, each measured from the process launch.
+#Exits with status 1 if the median time to the initialize answer is over --budget seconds.
+#Run from the repository root: python -m benchmarks.bench_startup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MILESTONES = ("initialize", "tools/list", "first solve")
+
+def _request(process, message: dict):
+    process.stdin.write(json.dumps(message) + "\n")
+    process.stdin.flush()
+
+def _response(process, request_id: int) -> dict:
+    """Read stdout until the answer to request_id, skipping notifications."""
+    while True:
+        line = process.stdout.readline()
+        if not line:
+            raise RuntimeError("The server exited before answering request " + str(request_id))
+        message = json.loads(line)
+        if message.get("id") == request_id:
+            return message
+
+def measureStartup(problem: dict) -> dict:
+    """Launch one server process and return the seconds from launch to each milestone."""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, "main.py")], cwd=ROOT, text=True,
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    times = {}
+    try:
+        _request(process, {"jsonrpc": "2.0", "id": 1, "method": "initialize",
+                           "params": {"protocolVersion": "2024-11-05", "capabilities": {}, "clientInfo": {"name": "bench_startup", "version": "1"}}})
+        _response(process, 1)
+        times["initialize"] = time.perf_counter() - start
+        _request(process, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+        _request(process, {"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+        _response(process, 2)
+        times["tools/list"] = time.perf_counter() - start
+        _request(process, {"jsonrpc": "2.0", "id": 3, "method": "tools/call", "params": {"name": "GurobiSolver", "arguments": {"problem": problem}}})
+        answer = _response(process, 3)
+        if answer.get("error") or answer["result"].get("isError"):
+            raise RuntimeError(f"GurobiSolver failed: {answer}")
+        times["first solve"] = time.perf_counter() - start
+    finally:
+        process.stdin.close()
+        process.terminate()
+        process.wait()
+    return times
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cold start of the MCP server over stdio.")
+    parser.add_argument("--repeat", type=int, default=5, help="Server launches, the median of each milestone is reported")
+    parser.add_argument("--budget", type=float, default=1.5, help="Seconds allowed from launch to the initialize answer")
+    args = parser.parse_args()
+
+    problem = generateLP(20, 10)
+    runs = [measureStartup(problem) for _ in range(args.repeat)]
+    print(f"{'milestone':<14}{'median (s)':>12}{'min (s)':>10}{'max (s)':>10}")
+    medians = {}
+    for milestone in MILESTONES:
+        values = [run[milestone] for run in runs]
+        medians[milestone] = statistics.median(values)
+        print(f"{milestone:<14}{medians[milestone]:>12.3f}{min(values):>10.3f}{max(values):>10.3f}")
+    if medians["initialize"] > args.budget:
+        print(f"initialize took {medians['initialize']:.3f}s, over the budget of {args.budget:.3f}s")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
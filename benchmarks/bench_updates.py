@@ -0,0 +1,59 @@
+import argparse
+import time
+from Problem import createProblem, compileProblem, OptimizationProblem
+from benchmarks.generators import generateLP
+
+#Compare how model.update() is scheduled during a build, on models with many constraints:
+#"step" updates after every build step (how the builders used to work), "deferred" once at the end of the build,
+#and "lazy" not at all, leaving the pending additions to the next optimize or write.
+#Each measurement is the build of a compiled problem followed by one model.update(), so all modes end with the same processed model.
+#Run from the repository root: python -m benchmarks.bench_updates
+
+SIZES = [(2000, 10000), (10000, 50000), (20000, 200000)]
+MODES = ("step", "deferred", "lazy")
+
+_timed = OptimizationProblem._timed
+
+def _stepUpdates(self, step: str, function):
+    value = _timed(self, step, function)
+    if step != "update":
+        self._model.update()
+    return value
+
+def timeBuild(problem, builder: str, mode: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        if mode == "step":
+            OptimizationProblem._timed = _stepUpdates
+        try:
+            start = time.perf_counter()
+            built = createProblem(problem, builder, lazy_update=mode == "lazy")
+            built.getModel().update()
+            best = min(best, time.perf_counter() - start)
+        finally:
+            OptimizationProblem._timed = _timed
+        built.dispose()
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark update scheduling of the model builders on generated LPs.")
+    parser.add_argument("--density", type=float, default=0.002, help="Fraction of variables appearing in each constraint")
+    parser.add_argument("--repeat", type=int, default=3, help="Builds per measurement, the best time is reported")
+    parser.add_argument("--max-constrs", type=int, default=None, help="Skip instances with more constraints than this")
+    args = parser.parse_args()
+
+    print(f"{'instance':<22}{'builder':>12}" + "".join(f"{mode + ' (s)':>14}" for mode in MODES) + f"{'speedup':>9}")
+    for num_vars, num_constrs in SIZES:
+        if args.max_constrs is not None and num_constrs > args.max_constrs:
+            continue
+        problem = generateLP(num_vars, num_constrs, density=args.density)
+        name = problem["problem"]["name"]
+        #Compiled once, so only the Gurobi build and its updates are measured
+        problem = compileProblem(problem)
+        for builder in OptimizationProblem.BUILDERS:
+            times = {mode: timeBuild(problem, builder, mode, args.repeat) for mode in MODES}
+            speedup = times["step"] / min(times["deferred"], times["lazy"])
+            print(f"{name:<22}{builder:>12}" + "".join(f"{times[mode]:>14.3f}" for mode in MODES) + f"{speedup:>8.2f}x")
+
+if __name__ == "__main__":
+    main()
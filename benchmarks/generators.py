@@ -0,0 +1,168 @@
+import random
+
+#Generators for random problem dicts in the format of problemformat.json, used by the benchmarks
+
+def generateLP(num_vars: int, num_constrs: int, density: float = 0.01, integer: bool = False, seed: int = 0) -> dict:
+    """
+    Generate a random feasible LP (or MILP when integer is True) with about density * num_vars terms per constraint.
+    """
+    rng = random.Random(seed)
+    var_type = "integer" if integer else "continuous"
+    variables = {f"x{j}": {"type": var_type, "name": f"x{j}", "lb": 0, "ub": 10} for j in range(num_vars)}
+    terms_per_row = max(1, int(density * num_vars))
+    linear_constraints = []
+    for i in range(num_constrs):
+        columns = rng.sample(range(num_vars), terms_per_row)
+        linear_constraints.append({
+            "lhs": {f"x{j}": rng.randint(1, 9) for j in columns},
+            "rhs": rng.randint(terms_per_row, 10 * terms_per_row),
+            "sign": "<=",
+            "name": f"c{i}"
+        })
+    return {
+        "problem": {"name": f"{'MILP' if integer else 'LP'}_{num_vars}x{num_constrs}", "type": "MILP" if integer else "LP"},
+        "objective": {
+            "type": "maximize",
+            "function_type": "linear",
+            "linear_terms": {f"x{j}": rng.randint(1, 20) for j in range(num_vars)}
+        },
+        "variables": variables,
+        "constraints": {"linear_constraints": linear_constraints}
+    }
+
+def _squaredDifferences(rng: random.Random, num_vars: int, num_terms: int, scale: int) -> list:
+    """Quadratic terms of a sum of scale * (x_i - x_j)^2 and scale * x_i^2, which is convex by construction."""
+    terms = []
+    for _ in range(num_terms):
+        i, j = rng.sample(range(num_vars), 2) if num_vars > 1 else (0, 0)
+        coef = rng.randint(1, scale)
+        terms.append({"var1": f"x{i}", "var2": f"x{i}", "coef": coef})
+        if i != j:
+            terms.append({"var1": f"x{j}", "var2": f"x{j}", "coef": coef})
+            terms.append({"var1": f"x{i}", "var2": f"x{j}", "coef": -2 * coef})
+    return terms
+
+def generateQP(num_vars: int, num_constrs: int, density: float = 0.01, q_terms: int = 100, integer: bool = False, seed: int = 0) -> dict:
+    """
+    Generate a random feasible convex QP (MIQP when integer is True) on the linear constraints of generateLP,
+    minimizing q_terms squared differences minus a linear reward.
+    """
+    problem = generateLP(num_vars, num_constrs, density=density, integer=integer, seed=seed)
+    rng = random.Random(seed + 1)
+    problem["problem"] = {"name": f"{'MIQP' if integer else 'QP'}_{num_vars}x{num_constrs}_q{q_terms}", "type": "MIQP" if integer else "QP"}
+    problem["objective"] = {
+        "type": "minimize",
+        "function_type": "quadratic",
+        "linear_terms": {f"x{j}": -rng.randint(1, 20) for j in range(num_vars)},
+        "quadratic_terms": _squaredDifferences(rng, num_vars, q_terms, 5)
+    }
+    return problem
+
+def generateQCP(num_vars: int, num_constrs: int, density: float = 0.01, q_terms: int = 100, num_qconstrs: int = 5,
+                integer: bool = False, seed: int = 0) -> dict:
+    """
+    Generate a random feasible convex QCP (MIQCP when integer is True): the QP of generateQP plus num_qconstrs
+    constraints bounding a weighted sum of q_terms / num_qconstrs squared variables each.
+    """
+    problem = generateQP(num_vars, num_constrs, density=density, q_terms=q_terms, integer=integer, seed=seed)
+    rng = random.Random(seed + 2)
+    problem["problem"] = {"name": f"{'MIQCP' if integer else 'QCP'}_{num_vars}x{num_constrs}_q{q_terms}", "type": "MIQCP" if integer else "QCP"}
+    per_constraint = max(1, q_terms // max(1, num_qconstrs))
+    problem["constraints"]["quadratic_constraints"] = [{
+        "name": f"q{k}",
+        "quadratic_terms": [{"var1": f"x{j}", "var2": f"x{j}", "coef": rng.randint(1, 3)}
+                            for j in rng.sample(range(num_vars), min(num_vars, per_constraint))],
+        "linear_terms": {f"x{j}": rng.randint(1, 9) for j in rng.sample(range(num_vars), max(1, int(density * num_vars)))},
+        "sign": "<=",
+        "rhs": 50 * per_constraint
+    } for k in range(num_qconstrs)]
+    return problem
+
+def generateProblem(spec: dict) -> dict:
+    """Generate the instance described by a benchmark spec {"type", "num_vars", "num_constrs", ...}."""
+    arguments = {key: value for key, value in spec.items() if key != "type"}
+    integer = spec["type"].startswith("MI")
+    base = spec["type"][2:] if integer else spec["type"]
+    generator = {"LP": generateLP, "QP": generateQP, "QCP": generateQCP}[base]
+    return generator(integer=integer, **arguments)
+
+def generatePortfolio(num_assets: int, num_factors: int = 5, risk_aversion: float = 1.0, seed: int = 0) -> dict:
+    """
+    Generate a dense mean-variance portfolio QP: minimize risk_aversion * x'Σx minus the expected return over a budget
+    constraint. The covariance Σ = FF' + D of a factor model is PSD and listed as every (i, j) and (j, i) pair,
+    the way covariance matrices usually arrive, so there are num_assets^2 quadratic terms.
+    """
+    rng = random.Random(seed)
+    factors = [[rng.gauss(0, 0.1) for _ in range(num_factors)] for _ in range(num_assets)]
+    terms = []
+    for i in range(num_assets):
+        for j in range(num_assets):
+            covariance = sum(a * b for a, b in zip(factors[i], factors[j])) + (rng.uniform(0.01, 0.05) if i == j else 0.0)
+            terms.append({"var1": f"x{i}", "var2": f"x{j}", "coef": risk_aversion * covariance})
+    return {
+        "problem": {"name": f"Portfolio_{num_assets}", "type": "QP"},
+        "objective": {
+            "type": "minimize",
+            "function_type": "quadratic",
+            "linear_terms": {f"x{i}": -rng.uniform(0.01, 0.2) for i in range(num_assets)},
+            "quadratic_terms": terms
+        },
+        "variables": {f"x{i}": {"type": "continuous", "name": f"x{i}", "lb": 0, "ub": 1} for i in range(num_assets)},
+        "constraints": {"linear_constraints": [{"lhs": {f"x{i}": 1 for i in range(num_assets)}, "rhs": 1, "sign": "=", "name": "budget"}]}
+    }
+
+def generateSloppyLP(num_vars: int, num_constrs: int, density: float = 0.01, clutter: float = 0.3, seed: int = 0) -> dict:
+    """
+    Generate the LP of generateLP with the clutter of hand or LLM written problems mixed in, at a rate of clutter:
+    zero coefficients in each lhs, variables fixed at 0 with lb == ub, singleton rows that only bound one variable,
+    and variables that appear in no constraint.
+    """
+    problem = generateLP(num_vars, num_constrs, density=density, seed=seed)
+    rng = random.Random(seed + 3)
+    problem["problem"]["name"] = f"SloppyLP_{num_vars}x{num_constrs}"
+    variables = problem["variables"]
+    for key, variable in variables.items():
+        if rng.random() < clutter / 3:
+            variable["lb"] = variable["ub"] = 0
+    constraints = problem["constraints"]["linear_constraints"]
+    for constraint in constraints:
+        for key in rng.sample(sorted(variables), max(1, int(clutter * len(constraint["lhs"])))):
+            constraint["lhs"].setdefault(key, 0)
+    constraints.extend({"lhs": {f"x{rng.randrange(num_vars)}": rng.randint(1, 5)}, "rhs": rng.randint(5, 40), "sign": "<=", "name": f"bound{i}"}
+                       for i in range(int(clutter * num_constrs)))
+    for j in range(int(clutter * num_vars / 3)):
+        variables[f"unused{j}"] = {"type": "continuous", "name": f"unused{j}", "lb": 0, "ub": 10}
+        problem["objective"]["linear_terms"][f"unused{j}"] = rng.randint(-5, 5)
+    return problem
+
+def generateBlockMILP(num_blocks: int, vars_per_block: int, constrs_per_block: int, coupling: int = 0, density: float = 0.05,
+                      integer: bool = True, seed: int = 0) -> dict:
+    """
+    Generate a feasible MILP (LP when integer is False) of num_blocks independent blocks like generateLP, with variables
+    x{block}_{j} and constraints c{block}_{i}, plus coupling shared-capacity constraints link{k} over a few variables
+    of every block.
+    """
+    rng = random.Random(seed + 4)
+    var_type = "integer" if integer else "continuous"
+    variables, linear_constraints, objective = {}, [], {}
+    terms_per_row = max(1, int(density * vars_per_block))
+    for block in range(num_blocks):
+        for j in range(vars_per_block):
+            variables[f"x{block}_{j}"] = {"type": var_type, "name": f"x{block}_{j}", "lb": 0, "ub": 10}
+            objective[f"x{block}_{j}"] = rng.randint(1, 20)
+        for i in range(constrs_per_block):
+            linear_constraints.append({
+                "lhs": {f"x{block}_{j}": rng.randint(1, 9) for j in rng.sample(range(vars_per_block), terms_per_row)},
+                "rhs": rng.randint(terms_per_row, 10 * terms_per_row),
+                "sign": "<=",
+                "name": f"c{block}_{i}"
+            })
+    for k in range(coupling):
+        lhs = {f"x{block}_{j}": rng.randint(1, 3) for block in range(num_blocks) for j in rng.sample(range(vars_per_block), terms_per_row)}
+        linear_constraints.append({"lhs": lhs, "rhs": rng.randint(len(lhs), 3 * len(lhs)), "sign": "<=", "name": f"link{k}"})
+    return {
+        "problem": {"name": f"Block{'MILP' if integer else 'LP'}_{num_blocks}x{vars_per_block}_link{coupling}", "type": "MILP" if integer else "LP"},
+        "objective": {"type": "maximize", "function_type": "linear", "linear_terms": objective},
+        "variables": variables,
+        "constraints": {"linear_constraints": linear_constraints}
+    }
@@ -0,0 +1,90 @@
+import json
+import os
+#Server configuration. Every setting can be overridden with an environment variable of the same name.
+
+def _intFromEnv(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Environment variable {name} must be an integer, got {value!r}")
+
+def _floatFromEnv(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"Environment variable {name} must be a number, got {value!r}")
+
+def _jsonFromEnv(name: str, default):
+    value = os.environ.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        return json.loads(value)
+    except ValueError:
+        raise ValueError(f"Environment variable {name} must be JSON, got {value!r}")
+
+def _strFromEnv(name: str, default: str) -> str:
+    return os.environ.get(name) or default
+
+#Engine used when a problem names no backend: "auto", "gurobi" or "scipy". auto falls back to SciPy for LP and MILP problems Gurobi has no license for.
+GUROBI_MCP_BACKEND = _strFromEnv("GUROBI_MCP_BACKEND", "auto")
+#Variables or constraints above which auto sends LP and MILP problems straight to SciPy, e.g. the limit of a size-limited license. 0 always tries Gurobi first.
+GUROBI_MCP_GUROBI_SIZE_LIMIT = _intFromEnv("GUROBI_MCP_GUROBI_SIZE_LIMIT", 0)
+#1 drops zero coefficients, singleton rows, fixed and unused variables before a Gurobi model is built, 0 builds problems as sent.
+GUROBI_MCP_REDUCE_PROBLEMS = _intFromEnv("GUROBI_MCP_REDUCE_PROBLEMS", 1)
+#Decomposition mode of problems without a decomposition key: "off", "blocks" or "lagrangian".
+GUROBI_MCP_DECOMPOSITION = _strFromEnv("GUROBI_MCP_DECOMPOSITION", "off")
+#Worker processes that solve the blocks of decomposed problems, also the most blocks a problem is split into (at least 2). 0 uses one per cpu.
+GUROBI_MCP_DECOMPOSITION_WORKERS = _intFromEnv("GUROBI_MCP_DECOMPOSITION_WORKERS", 0)
+#Subgradient iterations of a lagrangian decomposition unless the problem sets max_iterations.
+GUROBI_MCP_LAGRANGIAN_MAX_ITERATIONS = _intFromEnv("GUROBI_MCP_LAGRANGIAN_MAX_ITERATIONS", 50)
+#Seconds a lagrangian decomposition may iterate unless the problem sets time_limit.
+GUROBI_MCP_LAGRANGIAN_TIME_LIMIT = _floatFromEnv("GUROBI_MCP_LAGRANGIAN_TIME_LIMIT", 60.0)
+#Number of solves that may run at the same time. 0 derives it from the cpu count and GUROBI_MCP_THREADS_PER_SOLVE.
+GUROBI_MCP_MAX_WORKERS = _intFromEnv("GUROBI_MCP_MAX_WORKERS", 0)
+#Gurobi Threads parameter given to each solve. 0 splits the cpu count evenly across the workers.
+GUROBI_MCP_THREADS_PER_SOLVE = _intFromEnv("GUROBI_MCP_THREADS_PER_SOLVE", 0)
+#Number of solve requests allowed to wait for a free worker before new requests are rejected.
+GUROBI_MCP_MAX_QUEUE = _intFromEnv("GUROBI_MCP_MAX_QUEUE", 32)
+#Minimum seconds between two progress notifications of the same solve.
+GUROBI_MCP_PROGRESS_INTERVAL = _floatFromEnv("GUROBI_MCP_PROGRESS_INTERVAL", 1.0)
+#Memory budget in bytes for cached solve results. 0 disables the in-memory cache.
+GUROBI_MCP_CACHE_MAX_BYTES = _intFromEnv("GUROBI_MCP_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+#Number of started Gurobi environments kept for reuse by model builds. 0 uses the number of solver workers plus two.
+GUROBI_MCP_ENV_POOL_SIZE = _intFromEnv("GUROBI_MCP_ENV_POOL_SIZE", 0)
+#Maximum total size in bytes of the LP/MPS text cached by ProblemToLP. 0 disables the cache.
+GUROBI_MCP_MODEL_FILE_CACHE_MAX_BYTES = _intFromEnv("GUROBI_MCP_MODEL_FILE_CACHE_MAX_BYTES", 16 * 1024 * 1024)
+#Path of a SQLite file that keeps cached solve results across restarts. Empty disables the on-disk cache.
+GUROBI_MCP_CACHE_DB = _strFromEnv("GUROBI_MCP_CACHE_DB", "")
+#Memory budget in bytes for recent solve results that later problems can name in warm_start_from. 0 disables warm_start_from.
+GUROBI_MCP_WARM_START_MAX_BYTES = _intFromEnv("GUROBI_MCP_WARM_START_MAX_BYTES", 16 * 1024 * 1024)
+#Directory that SolveProblemFile may read problem files from, subdirectories included. Defaults to problems/ next to this file. * allows any path the server can read.
+GUROBI_MCP_PROBLEM_FILE_DIR = _strFromEnv("GUROBI_MCP_PROBLEM_FILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "problems"))
+#Number of incremental model sessions that may be open at once.
+GUROBI_MCP_MAX_SESSIONS = _intFromEnv("GUROBI_MCP_MAX_SESSIONS", 16)
+#Seconds after which an unused session is closed and its model freed.
+GUROBI_MCP_SESSION_IDLE_TIMEOUT = _intFromEnv("GUROBI_MCP_SESSION_IDLE_TIMEOUT", 900)
+#Jobs submitted with SubmitSolve that may be queued or running at once.
+GUROBI_MCP_MAX_JOBS = _intFromEnv("GUROBI_MCP_MAX_JOBS", 64)
+#Seconds a finished job keeps its result for GetJobResult.
+GUROBI_MCP_JOB_RESULT_TTL = _intFromEnv("GUROBI_MCP_JOB_RESULT_TTL", 3600)
+#Worker processes used by GurobiBatchSolver. 0 uses one per cpu.
+GUROBI_MCP_BATCH_WORKERS = _intFromEnv("GUROBI_MCP_BATCH_WORKERS", 0)
+#Gurobi threads shared by all batch workers. 0 uses the cpu count.
+GUROBI_MCP_BATCH_THREADS = _intFromEnv("GUROBI_MCP_BATCH_THREADS", 0)
+#Instances allowed in one GurobiBatchSolver call.
+GUROBI_MCP_MAX_BATCH_SIZE = _intFromEnv("GUROBI_MCP_MAX_BATCH_SIZE", 1000)
+#Gurobi parameters applied to every solve unless the problem sets them, as a JSON object, e.g. {"MIPGap": 0.001}
+GUROBI_MCP_DEFAULT_PARAMETERS = _jsonFromEnv("GUROBI_MCP_DEFAULT_PARAMETERS", {})
+#Upper limits for Gurobi parameters that no problem can exceed, as a JSON object. Threads is always capped by the worker share.
+GUROBI_MCP_PARAMETER_CAPS = _jsonFromEnv("GUROBI_MCP_PARAMETER_CAPS", {"TimeLimit": 3600})
+#Where each finished tool call is logged as one JSON line with its phase timings: a file path, "stderr", or empty for no log.
+GUROBI_MCP_METRICS_LOG = _strFromEnv("GUROBI_MCP_METRICS_LOG", "")
+#Directory that receives a cProfile dump of every model build. Empty disables build profiling.
+GUROBI_MCP_PROFILE_DIR = _strFromEnv("GUROBI_MCP_PROFILE_DIR", "")
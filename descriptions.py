@@ -0,0 +1,333 @@
+import inspect
+
+#Descriptions of the MCP tools that take a problem. The problem format is written once here and appended to the
+#docstring of each of those tools when it is registered, instead of being repeated in every docstring.
+
+PROBLEM_FORMAT = """
+Terminology:
+- "Objective Function": The function to be maximized or minimized.
+- "Constraints": The conditions that the solution must satisfy.
+Supported problem types:
+- Linear Programming (LP)
+- Mixed Integer Linear Programming (MILP)
+- Quadratic Programming (QP)
+- Mixed Integer Quadratic Programming (MIQP)
+- Quadratic Constrained Programming (QCP)
+- Mixed Integer Quadratic Constrained Programming (MIQCP)
+
+The server detects the actual type from the variables, quadratic_terms and quadratic_constraints and builds the
+problem as that type, so a mislabeled problem still solves. The result reports both under "problem_class".
+input_schema = {
+    "problem": {
+        "type": "object",
+        "properties": {
+            "name": {"type": "string"},
+            "type": {
+                "type": "string",
+                "enum": ["LP", "MILP", "QP", "MIQP", "QCP", "MIQCP"]
+            }
+        },
+        "required": ["type"],
+        "optional": ["name"]
+    },
+    "objective": {
+        "type": "object",
+        "properties": {
+            "type": {"type": "string", "enum": ["minimize", "maximize"]},
+            "function_type": {"type": "string", "enum": ["linear", "quadratic"]},
+            "linear_terms": {"type": "object",
+                "patternProperties": {
+                    "^.*$": {"type": "number"}
+                }
+            },
+            "quadratic_terms": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "var1": {"type": "string"},
+                        "var2": {"type": "string"},
+                        "coef": {"type": "number"}
+                    },
+                    "required": ["var1", "var2", "coef"]
+                }
+            },
+            "name": {"type": "string"},
+            "priority": {"type": "integer"},
+            "weight": {"type": "number"},
+            "abs_tol": {"type": "number", "minimum": 0},
+            "rel_tol": {"type": "number", "minimum": 0}
+        },
+        "required": ["type", "function_type", "linear_terms"],
+        "optional": ["quadratic_terms", "name", "priority", "weight", "abs_tol", "rel_tol"]
+    },
+    "variables": {
+        "type": "object",
+        "patternProperties": {
+            "^.*$": {
+                "type": "object",
+                "properties": {
+                    "type": {"type": "string"},
+                    "name": {"type": "string"},
+                    "lb": {"type": "number"},
+                    "ub": {"type": "number"},
+                    "start": {"type": "number", "description": "Start value (MIP start)"},
+                    "hint": {"type": "number", "description": "Value the solver should lean towards (VarHintVal)"}
+                },
+                "required": ["type"],
+                "optional": ["name", "lb", "ub", "start", "hint"]
+            }
+        }
+    },
+    "constraints": {
+        "type": "object",
+        "properties": {
+            "linear_constraints": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "lhs": {"type": "object",
+                            "patternProperties": {
+                                "^.*$": {"type": "number"}
+                            }
+                        },
+                        "rhs": {"type": "number"},
+                        "sign": {"type": "string",
+                            "enum": ["=", "<=", ">=", "<", ">"]
+                        },
+                        "name": {"type": "string"}
+                    },
+                    "required": ["lhs", "rhs", "sign"],
+                    "optional": ["name"]
+                }
+            },
+            "quadratic_constraints": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "quadratic_terms": {"type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "var1": {"type": "string"},
+                                    "var2": {"type": "string"},
+                                    "coef": {"type": "number"}
+                                },
+                                "required": ["var1", "var2", "coef"]
+                            }
+                        },
+                        "linear_terms": {"type": "object",
+                            "patternProperties": {
+                                "^.*$": {"type": "number"}
+                            }
+                        },
+                        "constant": {"type": "number"},
+                        "sign": {"type": "string",
+                            "enum": ["=", "<=", ">=", "<", ">"]
+                        },
+                        "name": {"type": "string"}
+                    },
+                    "required": ["quadratic_terms", "linear_terms", "sign"],
+                    "optional": ["constant", "name"]
+                }
+            }
+        }
+    },
+    "parameters": {
+        "type": "object",
+        "description": "Optional Gurobi parameters for this solve",
+        "properties": {
+            "TimeLimit": {"type": "number", "minimum": 0},
+            "MIPGap": {"type": "number", "minimum": 0},
+            "MIPGapAbs": {"type": "number", "minimum": 0},
+            "NodeLimit": {"type": "number", "minimum": 0},
+            "SolutionLimit": {"type": "integer", "minimum": 1},
+            "Threads": {"type": "integer", "minimum": 0},
+            "Method": {"type": "integer", "minimum": -1, "maximum": 5},
+            "Presolve": {"type": "integer", "minimum": -1, "maximum": 2},
+            "MIPFocus": {"type": "integer", "minimum": 0, "maximum": 3},
+            "NumericFocus": {"type": "integer", "minimum": 0, "maximum": 3},
+            "Cuts": {"type": "integer", "minimum": -1, "maximum": 3},
+            "Heuristics": {"type": "number", "minimum": 0, "maximum": 1},
+            "NonConvex": {"type": "integer", "minimum": -1, "maximum": 2},
+            "Seed": {"type": "integer", "minimum": 0}
+        }
+    },
+    "output": {
+        "type": "object",
+        "description": "Optional shape of the solution in the result",
+        "properties": {
+            "sparse": {"type": "boolean", "description": "Only values with magnitude above tolerance"},
+            "tolerance": {"type": "number", "minimum": 0},
+            "variables": {"type": "array", "items": {"type": "string"}, "description": "Glob patterns on variable names, e.g. x_*"},
+            "constraints": {"type": "array", "items": {"type": "string"}, "description": "Glob patterns on constraint names for duals and slacks"},
+            "top_k": {"type": "integer", "minimum": 1},
+            "encoding": {"type": "string", "enum": ["object", "columnar"]},
+            "duals": {"type": "boolean"},
+            "reduced_costs": {"type": "boolean"},
+            "slacks": {"type": "boolean"},
+            "basis": {"type": "boolean", "description": "Simplex basis of LP results, reused by warm_start_from"}
+        }
+    },
+    "warm_start_from": {"type": "string", "description": "result_id of an earlier result to start from"},
+    "backend": {"type": "string", "enum": ["auto", "gurobi", "scipy"], "description": "Engine that solves the problem, scipy solves LP and MILP only"},
+    "decomposition": {
+        "type": "object", "description": "Solve independent blocks in parallel, or relax coupling constraints over them",
+        "properties": {
+            "mode": {"type": "string", "enum": ["off", "blocks", "lagrangian"]},
+            "coupling": {"type": "array", "items": {"type": "string"}, "description": "Glob patterns of linear constraint names to relax"},
+            "max_iterations": {"type": "integer", "minimum": 1},
+            "time_limit": {"type": "number", "exclusiveMinimum": 0}
+        }
+    },
+    "objectives": {
+        "type": "array", "description": "Further objectives, the objective section is objective 0",
+        "items": {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string"},
+                "linear_terms": {"type": "object", "patternProperties": {"^.*$": {"type": "number"}}},
+                "constant": {"type": "number"},
+                "priority": {"type": "integer"},
+                "weight": {"type": "number"},
+                "abs_tol": {"type": "number", "minimum": 0},
+                "rel_tol": {"type": "number", "minimum": 0}
+            },
+            "required": ["linear_terms"]
+        }
+    },
+    "scenarios": {
+        "type": "array", "description": "Variants of the problem solved in the same optimize as the problem itself",
+        "items": {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string"},
+                "objective": {"type": "object", "patternProperties": {"^.*$": {"type": "number"}}},
+                "rhs": {"type": "object", "patternProperties": {"^.*$": {"type": "number"}}},
+                "lb": {"type": "object", "patternProperties": {"^.*$": {"type": "number"}}},
+                "ub": {"type": "object", "patternProperties": {"^.*$": {"type": "number"}}}
+            }
+        }
+    },
+    "sets": {
+        "type": "object",
+        "description": "Index sets: a list of labels, or a size n for the labels 0..n-1",
+        "patternProperties": {"^.*$": {"type": ["array", "integer"]}}
+    },
+    "data": {
+        "type": "object",
+        "description": "Numeric tables indexed by sets, values nested in the order of index",
+        "patternProperties": {"^.*$": {"type": "object", "properties": {"index": {"type": "array"}, "values": {"type": "array"}}}}
+    },
+    "variable_families": {
+        "type": "object",
+        "description": "Indexed variables named family[label,...]; lb, ub, start and hint may name a data table",
+        "patternProperties": {
+            "^.*$": {
+                "type": "object",
+                "properties": {
+                    "index": {"type": "array", "items": {"type": "string"}},
+                    "type": {"type": "string"},
+                    "lb": {"type": ["number", "string"]},
+                    "ub": {"type": ["number", "string"]},
+                    "start": {"type": ["number", "string"]},
+                    "hint": {"type": ["number", "string"]}
+                },
+                "required": ["index"]
+            }
+        }
+    },
+    "required": ["problem", "objective", "variables", "constraints"],
+    "optional": ["parameters", "output", "warm_start_from", "backend", "decomposition", "objectives", "scenarios", "sets", "data", "variable_families"]
+}
+
+Large structured models can use sets, data and variable_families instead of one entry per variable.
+constraints.linear_templates lists constraint templates {"name", "over": {index: set}, "lhs": [terms],
+"sign", "rhs"} that expand to one constraint per combination of the over indices, named name[labels], and
+objective.linear_templates lists terms summed into the linear objective. A term is {"family", "index",
+"sum": {index: set}, "coef"}: index entries are bound (over) or summed indices or fixed labels, and coef is a
+number or a data table over the family's sets. rhs is a number or a data table over the over sets.
+Family elements such as "x[Resource1,Job1]" can also be used in linear_terms and lhs like any variable.
+Example: {"name": "assign", "over": {"j": "Jobs"}, "lhs": [{"family": "x", "index": ["r", "j"],
+"sum": {"r": "Resources"}}], "sign": "=", "rhs": 1}
+
+Sensitivity sweeps ("what if demand is 10% higher") do not need one solve per variant. scenarios lists variants
+{"name", "objective": {variable: coef}, "rhs": {linear constraint name: rhs}, "lb": {variable: lb}, "ub": {variable: ub}}
+that are solved together with the problem in one optimize of one model. objectives lists further linear objectives
+{"name", "linear_terms", "constant", "priority", "weight", "abs_tol", "rel_tol"} after the objective section, which may set
+the same keys: higher priorities are optimized first, objectives of equal priority are blended by weight (a negative
+weight flips the sense), and abs_tol and rel_tol let a MIP give up that much of a higher priority objective.
+A problem has either scenarios or objectives, and its objective section has no quadratic_terms when it has objectives.
+
+Problems made of independent blocks, e.g. one plan per site, can set decomposition {"mode": "blocks"}: the connected
+components of variables and constraints are solved as separate models in parallel and merged into one result.
+{"mode": "lagrangian"} also splits blocks that share a few constraints, named by the glob patterns in coupling or the
+densest rows otherwise, by moving those constraints into the objective with multipliers that are updated for up to
+max_iterations iterations or time_limit seconds. It is a heuristic: it returns the best solution that satisfies the
+coupling constraints, with status 13 (suboptimal) when it is not proven optimal, and without duals. Without such a
+solution the problem is solved as one model, started from the last iteration.
+
+Example input (QP):
+{
+    "problem": {
+        "name": "Example QP",
+        "type": "QP"
+    },
+    "objective": {
+        "type": "minimize",
+        "function_type": "quadratic",
+        "linear_terms": {"x": 3, "y": 4},
+        "quadratic_terms": [
+        {"var1": "x", "var2": "x", "coef": 1},
+        {"var1": "x", "var2": "y", "coef": 2},
+        {"var1": "y", "var2": "y", "coef": 3}
+        ]
+    },
+    "variables": {
+        "x": {"type": "continuous", "lb": 0},
+        "y": {"type": "continuous", "lb": 0, "ub": 1}
+    },
+    "constraints": {
+        "linear_constraints": [
+            {
+                "lhs": {"x": 2, "y": 1},
+                "rhs": 10,
+                "sign": "<=",
+                "name": "c1"
+            }
+        ]
+    }
+}
+"""
+
+#What a solve returns, for the tools that solve a problem
+RESULT_FORMAT = """
+The server may cap parameters such as TimeLimit and Threads. A solve that stops on a limit
+returns the best solution found with the matching Gurobi status (e.g. 9 for TIME_LIMIT).
+By default "solution" maps every variable name to its value. With output.encoding "columnar" it is
+{"names": [...], "values": base64 little-endian float64, "dtype": "float64"}. Duals, reduced costs and
+slacks use the same format, and "omitted" counts the entries left out by the output filters.
+
+Every result has a "result_id". To re-solve a variant of an earlier problem, pass that id as warm_start_from:
+MIP models start from the earlier solution, LP models from its basis when the earlier problem was solved
+with output.basis true and has the same variables and constraints, otherwise from its solution values.
+A start value given on a variable takes precedence over the earlier solution.
+
+"problem_class" is {"declared": problem.type, "detected": the type found in the problem, "convex": true, false or null}.
+Nonconvex quadratic problems are solved with NonConvex 2 unless parameters set NonConvex.
+
+The solution and objective_value of a problem with scenarios are those of the problem as given, and "scenarios" lists
+{"name", "objective_value", "bound", "solution"} for each scenario, with only the nonzero values in the solution
+(no solution and a null objective_value for a scenario without a feasible solution). A problem with objectives
+gets "objectives": [{"name", "priority", "weight", "objective_value"}].
+
+Results of problems solved by SciPy instead of Gurobi have "backend": "scipy" and never a basis.
+Decomposed results add "decomposition": {"mode", "components", "blocks"}, for lagrangian also "coupling_constraints",
+"iterations", "bound" and "gap", and "fallback" with the reason when the problem was solved as one model.
+"""
+
+def describeTool(docstring: str, *sections: str) -> str:
+    """A tool description: the cleaned up docstring followed by the given sections."""
+    return "\n\n".join([inspect.cleandoc(docstring)] + [section.strip() for section in sections])
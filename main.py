@@ -1,367 +1,482 @@
-import gurobipy as grb
-from gurobipy import GRB
-from mcp.server.fastmcp import FastMCP
+import asyncio
+import json
+import logging
+import os
 import sys
-import io
-from mcp import types
-from Problem import LP,QP,QCP,OptimizationProblem
+import threading
+import uuid
+from contextlib import asynccontextmanager
+from gurobipy import GRB
+from mcp.server.fastmcp import FastMCP, Context
+import config
+from descriptions import PROBLEM_FORMAT, RESULT_FORMAT, describeTool
+
+#The Problem and Solver packages load numpy and scipy, and the solver state starts the Gurobi environments.
+#None of it is needed to answer the MCP handshake, so _loadSolver runs on a background thread as soon as the
+#transport is up (see _lifespan), and each tool waits for it with _solverReady before touching any of it.
+Problem = None
+Solver = None
+solver_pool = None
+result_cache = None
+model_file_cache = None
+warm_start_results = None
+session_manager = None
+job_manager = None
+batch_solver = None
+metrics = None
+_solver_lock = threading.Lock()
+_solver_loaded = threading.Event()
+
+def _loadSolver():
+    """Import the model and solver packages and create the server state. Runs once, on whichever thread gets here first."""
+    global Problem, Solver, solver_pool, result_cache, model_file_cache, warm_start_results, session_manager, job_manager, batch_solver, metrics
+    with _solver_lock:
+        if _solver_loaded.is_set():
+            return
+        import Problem
+        import Solver
+        #Worker pool that runs solves off the event loop
+        solver_pool = Solver.SolverPool(max_workers=config.GUROBI_MCP_MAX_WORKERS,
+                                        threads_per_solve=config.GUROBI_MCP_THREADS_PER_SOLVE,
+                                        max_queue=config.GUROBI_MCP_MAX_QUEUE,
+                                        progress_interval=config.GUROBI_MCP_PROGRESS_INTERVAL)
+        #Quiet Gurobi environments started once and checked out by every model build, so no request pays for an environment start
+        Problem.OptimizationProblem.env_pool = Problem.EnvPool(size=config.GUROBI_MCP_ENV_POOL_SIZE or solver_pool.max_workers + 2, prestart=True)
+        #Results of earlier solves keyed by the canonical problem hash
+        result_cache = Solver.ResultCache(max_bytes=config.GUROBI_MCP_CACHE_MAX_BYTES, db_path=config.GUROBI_MCP_CACHE_DB)
+        #LP/MPS text returned by ProblemToLP keyed by format and canonical problem hash
+        model_file_cache = Solver.ResultCache(max_bytes=config.GUROBI_MCP_MODEL_FILE_CACHE_MAX_BYTES)
+        #Recent solve results keyed by their result_id, for problems that warm start from them with warm_start_from
+        warm_start_results = Solver.ResultCache(max_bytes=config.GUROBI_MCP_WARM_START_MAX_BYTES)
+        #Built models kept alive between calls for patch and re-solve conversations
+        session_manager = Solver.SessionManager(max_sessions=config.GUROBI_MCP_MAX_SESSIONS, idle_timeout=config.GUROBI_MCP_SESSION_IDLE_TIMEOUT)
+        #Solves submitted with SubmitSolve, which run on the solver pool while the client polls for their result
+        job_manager = Solver.JobManager(solver_pool, max_jobs=config.GUROBI_MCP_MAX_JOBS, result_ttl=config.GUROBI_MCP_JOB_RESULT_TTL)
+        #Process pool for GurobiBatchSolver, started on the first batch
+        batch_solver = Solver.BatchSolver(max_workers=config.GUROBI_MCP_BATCH_WORKERS, total_threads=config.GUROBI_MCP_BATCH_THREADS)
+
+        #Request counts, phase timings and model sizes of the tool calls, served by the gurobi://metrics resource
+        metrics = Solver.MetricsRegistry()
+        metrics.gauge("gurobi_mcp_solves_pending", "Solves running or waiting for a worker.", lambda: solver_pool.pending)
+        metrics.gauge("gurobi_mcp_jobs_active", "Submitted jobs that are queued or running.", lambda: job_manager.active)
+        metrics.gauge("gurobi_mcp_sessions_open", "Open incremental model sessions.", lambda: len(session_manager))
+        metrics.gauge("gurobi_mcp_env_pool_idle", "Started Gurobi environments waiting to be checked out.", lambda: Problem.OptimizationProblem.env_pool.stats()["idle"])
+        _solver_loaded.set()
+
+async def _solverReady():
+    """Wait for _loadSolver without blocking the event loop, loading the solver here if the background load has not started."""
+    if not _solver_loaded.is_set():
+        await asyncio.to_thread(_loadSolver)
+
+@asynccontextmanager
+async def _lifespan(server: FastMCP):
+    """Start loading the solver in the background once the transport is up, while the client finishes the handshake."""
+    threading.Thread(target=_loadSolver, name="gurobi-mcp-startup", daemon=True).start()
+    yield {}
+
 # Create an MCP server
-mcp = FastMCP("GurobiLLM")
+mcp = FastMCP("GurobiLLM", lifespan=_lifespan)
+
+def _configureMetricsLog(destination: str):
+    """Send the JSON line of every finished tool call to a file or stderr. stdout carries the MCP protocol."""
+    logger = logging.getLogger("gurobi_mcp.metrics")
+    logger.propagate = False
+    if not destination:
+        logger.addHandler(logging.NullHandler())
+        return
+    handler = logging.StreamHandler(sys.stderr) if destination == "stderr" else logging.FileHandler(destination)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+_configureMetricsLog(config.GUROBI_MCP_METRICS_LOG)
+
+def _finishRequest(trace, result, outcome: str = None):
+    """Record a finished tool call in the metrics and the structured log, then return its result."""
+    metrics.recordRequest(trace, outcome or ("error" if isinstance(result, str) else "ok"))
+    return result
+
+def createProblem(problem, builder: str = None, lazy_update: bool = False):
+    """Problem.createProblem, kept importable from main. Loads the solver first if it has not been loaded yet."""
+    _loadSolver()
+    return Problem.createProblem(problem, builder, lazy_update)
+
+def _compileWithWarmStart(problem: dict):
+    """compileProblem, then attach the earlier result named by warm_start_from. Raises ValueError if it is unknown or expired."""
+    return _attachWarmStart(Problem.compileProblem(problem))
+
+def _readWithWarmStart(path: str, file_format: str = None):
+    """readProblemFile for a path inside GUROBI_MCP_PROBLEM_FILE_DIR, then attach the earlier result named by warm_start_from."""
+    path = os.path.realpath(path)
+    if config.GUROBI_MCP_PROBLEM_FILE_DIR != "*":
+        root = os.path.realpath(config.GUROBI_MCP_PROBLEM_FILE_DIR)
+        if os.path.commonpath([root, path]) != root:
+            raise ValueError(f"Problem files must be inside {root}")
+    return _attachWarmStart(Problem.readProblemFile(path, file_format))
+
+def _attachWarmStart(compiled):
+    if compiled.warm_start_from is not None:
+        compiled.warm_start = warm_start_results.get(compiled.warm_start_from)
+        if compiled.warm_start is None:
+            raise ValueError(f"Unknown or expired result_id {compiled.warm_start_from} in warm_start_from")
+    return compiled
+
+def _resolveWarmStarts(instances: list) -> list:
+    """
+    The batch instances with those that name warm_start_from compiled and their earlier result attached,
+    since the batch worker processes cannot see warm_start_results. Raises ValueError naming the instance.
+    """
+    resolved = []
+    for index, instance in enumerate(instances):
+        if isinstance(instance, dict) and instance.get("warm_start_from") is not None:
+            try:
+                instance = _compileWithWarmStart(instance)
+            except ValueError as e:
+                raise ValueError(f"Instance {index}: {str(e)}")
+        resolved.append(instance)
+    return resolved
+
+def _keepResult(result):
+    """Give a successful result a new result_id that later problems can name in warm_start_from."""
+    if isinstance(result, dict) and warm_start_results.enabled:
+        result["result_id"] = uuid.uuid4().hex
+        warm_start_results.put(result["result_id"], result)
+    return result
+
+def _solveAndKeep(task, compiled):
+    """solveProblem, then keep a successful result for warm_start_from."""
+    return _keepResult(Solver.solveProblem(task, compiled))
+
+def _cacheResult(key: str, result):
+    """Cache a proven optimal result without its result_id, which may expire before the cached copy is served."""
+    if key is not None and isinstance(result, dict) and result["status"] == GRB.OPTIMAL:
+        result_cache.put(key, {name: value for name, value in result.items() if name != "result_id"})
+
+def _cachedResult(key: str):
+    """A copy of the cached result for key under a new result_id, or None."""
+    cached = result_cache.get(key) if key is not None else None
+    return _keepResult(dict(cached)) if cached is not None else None
+
+def _writeProblem(problem: dict, file_format: str) -> str:
+    """
+    LP or MPS text of a problem, written from its compiled arrays without a Gurobi model.
+    Problems with objectives or scenarios are built and written by Gurobi, whose writer has sections for them.
+    """
+    compiled = Problem.compileProblem(problem)
+    if not (compiled.objectives or compiled.scenarios):
+        return Problem.writeLP(compiled) if file_format == "lp" else Problem.writeMPS(compiled)
+    built = Problem.createProblem(compiled)
+    try:
+        return built.getProblemAsLP() if file_format == "lp" else built.getProblemAsMPS()
+    finally:
+        built.dispose()
 
 supported_problem_types = ["LP", "MILP", "QP", "MIQP", "QCP", "MIQCP"]
 
+def _problemTool(*sections: str):
+    """Register a tool whose description is its docstring followed by the given sections, e.g. the shared problem format."""
+    def register(function):
+        return mcp.tool(description=describeTool(function.__doc__, *sections))(function)
+    return register
+
+def _progressReporter(ctx: Context):
+    """Forward progress snapshots from a solver thread to the client as MCP progress notifications."""
+    if ctx is None:
+        return None
+    loop = asyncio.get_running_loop()
+    def report(snapshot: dict):
+        asyncio.run_coroutine_threadsafe(ctx.report_progress(snapshot["elapsed"], None, json.dumps(snapshot)), loop)
+    return report
+
+@_problemTool(PROBLEM_FORMAT, RESULT_FORMAT)
+async def GurobiSolver(problem: dict, ctx: Context = None):
+    """
+    Solve a optimization problem using Gurobi.
+    """
+    await _solverReady()
+    trace = Solver.RequestTrace("GurobiSolver")
+    key = None
+    if result_cache.enabled:
+        try:
+            with trace.phase("hash"):
+                key = await asyncio.to_thread(Problem.problemHash, problem)
+        except Exception:
+            key = None  #Malformed problem, let the solve report the error
+    cached = _cachedResult(key)
+    if cached is not None:
+        return _finishRequest(trace, cached, "cached")
+    #Invalid problems are rejected here without taking a worker slot or allocating a model
+    try:
+        with trace.phase("compile"):
+            compiled = await asyncio.to_thread(_compileWithWarmStart, problem)
+    except ValueError as e:
+        return _finishRequest(trace, f"Error: {str(e)}", "invalid")
+    try:
+        result = await solver_pool.run(_solveAndKeep, compiled, on_progress=_progressReporter(ctx), trace=trace)
+    except Solver.SolverQueueFullError as e:
+        return _finishRequest(trace, f"Error: {str(e)}", "rejected")
+    #Only proven optimal results are reused, time limited runs may improve on a retry
+    _cacheResult(key, result)
+    return _finishRequest(trace, result)
+
+@_problemTool(RESULT_FORMAT)
+async def SolveProblemFile(path: str, file_format: str = None, ctx: Context = None):
+    """
+    Solve a problem stored in a local file, for problems too large to pass as a tool argument.
+    path is read by the server and must be inside its problem file directory. file_format is "json", "jsonl", "mps" or "lp", by default taken from the extension; .gz files are decompressed.
+    "json" is a problem in the input schema of the GurobiSolver tool. Its linear_constraints and quadratic_constraints are read one constraint at a time.
+    "jsonl" has that problem without linear_constraints and quadratic_constraints on the first line, then one constraint per line;
+    a line with quadratic_terms is a quadratic constraint, any other line a linear constraint.
+    "mps" and "lp" are read with Gurobi's reader, variables are reported by their names.
+    Results are not cached, since the file may change between calls.
+    """
+    await _solverReady()
+    trace = Solver.RequestTrace("SolveProblemFile")
+    try:
+        with trace.phase("compile"):
+            compiled = await asyncio.to_thread(_readWithWarmStart, path, file_format)
+    except (ValueError, OSError) as e:
+        return _finishRequest(trace, f"Error: {str(e)}", "invalid")
+    try:
+        result = await solver_pool.run(_solveAndKeep, compiled, on_progress=_progressReporter(ctx), trace=trace)
+    except Solver.SolverQueueFullError as e:
+        return _finishRequest(trace, f"Error: {str(e)}", "rejected")
+    return _finishRequest(trace, result)
+
 @mcp.tool()
-async def GurobiSolver(problem: dict):
-    """
-     Solve a optimization problem using Gurobi.
-            Terminology:
-            - "Objective Function": The function to be maximized or minimized.
-            - "Constraints": The conditions that the solution must satisfy.
-            Supported problem types:
-            - Linear Programming (LP)
-            - Mixed Integer Linear Programming (MILP)
-            - Quadratic Programming (QP)
-            - Mixed Integer Quadratic Programming (MIQP)
-            - Quadratic Constrained Programming (QCP)
-            - Mixed Integer Quadratic Constrained Programming (MIQCP)
-            
-            For problem types such as LP,MILP,QP,MIQP do not include key "quadratic_constraints" in the constraints section.
-            For problem types such as LP,MILP do not include the key "quadratic_terms" in the objective section.
-    input_schema = {
-                        "problem": {
-                            "type": "object",
-                            "properties": {
-                                "name": {"type": "string"},
-                                "type": {
-                                    "type": "string",
-                                    "enum": ["LP", "MILP", "QP", "MIQP", "QCP", "MIQCP"]
-                                }
-                            },
-                            "required": ["type"],
-                            "optional": ["name"]
-                        },
-                        "objective": {
-                            "type": "object",
-                            "properties": {
-                                "type": {"type": "string", "enum": ["minimize", "maximize"]},
-                                "function_type": {"type": "string", "enum": ["linear", "quadratic"]},
-                                "linear_terms": {"type": "object",
-                                    "patternProperties": {
-                                        "^.*$": {"type": "number"}
-                                    }
-                                },
-                                "quadratic_terms": {
-                                    "type": "array",
-                                    "items": {
-                                        "type": "object",
-                                        "properties": {
-                                            "var1": {"type": "string"},
-                                            "var2": {"type": "string"},
-                                            "coef": {"type": "number"}
-                                        },
-                                        "required": ["var1", "var2", "coef"]
-                                    }
-                                }
-                            },
-                            "required": ["type", "function_type", "linear_terms"],
-                            "optional": ["quadratic_terms"]
-                        },
-                        "variables": {
-                            "type": "object",
-                            "patternProperties": {
-                                "^.*$": {
-                                    "type": "object",
-                                    "properties": {
-                                        "type": {"type": "string"},
-                                        "name": {"type": "string"},
-                                        "lb": {"type": "number"},
-                                        "ub": {"type": "number"}
-                                    },
-                                    "required": ["type"],
-                                    "optional": ["name", "lb", "ub"]
-                                }
-                            }
-                        },
-                        "constraints": {
-                            "type": "object",
-                            "properties": {
-                                "linear_constraints": {
-                                    "type": "array",
-                                    "items": {
-                                        "type": "object",
-                                        "properties": {
-                                            "lhs": {"type": "object",
-                                                "patternProperties": {
-                                                    "^.*$": {"type": "number"}
-                                                }
-                                            },
-                                            "rhs": {"type": "number"},
-                                            "sign": {"type": "string",
-                                                "enum": ["=", "<=", ">=", "<", ">"]
-                                            },
-                                            "name": {"type": "string"}
-                                        },
-                                        "required": ["lhs", "rhs", "sign"],
-                                        "optional": ["name"]
-                                    }
-                                },
-                                "quadratic_constraints": {
-                                    "type": "array",
-                                    "items": {
-                                        "type": "object",
-                                        "properties": {
-                                            "quadratic_terms": {"type": "array",
-                                                "items": {
-                                                    "type": "object",
-                                                    "properties": {
-                                                        "var1": {"type": "string"},
-                                                        "var2": {"type": "string"},
-                                                        "coef": {"type": "number"}
-                                                    },
-                                                    "required": ["var1", "var2", "coef"]
-                                                }
-                                            },
-                                            "linear_terms": {"type": "object",
-                                                "patternProperties": {
-                                                    "^.*$": {"type": "number"}
-                                                }
-                                            },
-                                            "constant": {"type": "number"},
-                                            "sign": {"type": "string",
-                                                "enum": ["=", "<=", ">=", "<", ">"]
-                                            },
-                                            "name": {"type": "string"}
-                                        },
-                                        "required": ["quadratic_terms", "linear_terms", "sign"],
-                                        "optional": ["constant", "name"]
-                                    }
-                                }
-                            }
-                        },
-                        "required": ["problem", "objective", "variables", "constraints"]
-                    }
-
-            Example input (QP):
-            {
-                "problem": {
-                    "name": "Example QP",
-                    "type": "QP"
-                },
-                "objective": {
-                    "type": "minimize",
-                    "function_type": "quadratic",
-                    "linear_terms": {"x": 3, "y": 4},
-                    "quadratic_terms": [
-                    {"var1": "x", "var2": "x", "coef": 1},
-                    {"var1": "x", "var2": "y", "coef": 2},
-                    {"var1": "y", "var2": "y", "coef": 3}
-                    ]
-                },
-                "variables": {
-                    "x": {"type": "continuous", "lb": 0},
-                    "y": {"type": "continuous", "lb": 0, "ub": 1}
-                },
-                "constraints": {
-                    "linear_constraints": [
-                        {
-                            "lhs": {"x": 2, "y": 1},
-                            "rhs": 10,
-                            "sign": "<=",
-                            "name": "c1"
-                        }
-                    ]
-                }
-            }
+async def SubmitSolve(problem: dict):
+    """
+    Start solving a problem in the background and return right away with a job_id, instead of waiting for the solve like GurobiSolver.
+    The problem uses the same input schema as the GurobiSolver tool. Use it for long solves, or to run several solves at the same time.
+    Poll GetJobStatus with the job_id, fetch the result with GetJobResult and stop the job with CancelJob.
+    The returned solve_id also works with GetIncumbent and StopSolve while the job runs.
     """
+    await _solverReady()
+    trace = Solver.RequestTrace("SubmitSolve")
+    key = None
+    if result_cache.enabled:
+        try:
+            with trace.phase("hash"):
+                key = await asyncio.to_thread(Problem.problemHash, problem)
+        except Exception:
+            key = None
+    cached = _cachedResult(key)
+    if cached is not None:
+        return _finishRequest(trace, job_manager.completed(cached).status(), "cached")
     try:
-        problem = createProblem(problem)
-        model = problem.getModel()
-        if model is None:
-            return "Error: Model creation failed. Please check the problem definition."
-        model.optimize()
-        if model.status == GRB.OPTIMAL or model.status == GRB.TIME_LIMIT:
-            solution = {v.varName: v.x for v in model.getVars()}
-            result = {
-                "status": model.status,
-                "objective_value": model.objVal,
-                "solution": solution
-            }
-            return result
-        else:
-            return f"Error: Optimization failed with status {model.status}. Please check the problem definition."
+        with trace.phase("compile"):
+            compiled = await asyncio.to_thread(_compileWithWarmStart, problem)
+    except ValueError as e:
+        return _finishRequest(trace, f"Error: {str(e)}", "invalid")
+
+    def onResult(result):
+        _cacheResult(key, result)
+        _finishRequest(trace, result)
+
+    try:
+        job = job_manager.submit(_solveAndKeep, compiled, on_result=onResult, trace=trace)
+    except (Solver.SolverQueueFullError, Solver.JobLimitError) as e:
+        return _finishRequest(trace, f"Error: {str(e)}", "rejected")
+    return job.status()
+
+@mcp.tool()
+async def GetJobStatus(job_id: str):
+    """
+    Return the state of a submitted job (queued, running, completed, failed or cancelled), how long it has been queued and running,
+    and while it runs the latest progress snapshot and incumbent objective.
+    """
+    await _solverReady()
+    try:
+        return job_manager.get(job_id).status()
+    except Solver.JobNotFoundError as e:
+        return f"Error: {str(e)}"
+
+@mcp.tool()
+async def GetJobResult(job_id: str, wait_seconds: float = 0):
+    """
+    Return the status of a submitted job and, once it has finished, its "result" in the same format as the GurobiSolver result.
+    With wait_seconds > 0 the call waits up to that long for the job to finish before returning.
+    Results are kept for a while after the job finishes and can be fetched more than once.
+    """
+    await _solverReady()
+    try:
+        job = job_manager.get(job_id)
+    except Solver.JobNotFoundError as e:
+        return f"Error: {str(e)}"
+    if wait_seconds > 0 and not job.done:
+        await asyncio.to_thread(job.wait, wait_seconds)
+    status = job.status()
+    if job.done:
+        status["result"] = job.result
+    return status
+
+@mcp.tool()
+async def CancelJob(job_id: str):
+    """
+    Cancel a submitted job. A queued job is dropped, a running solve is terminated and the job ends as cancelled without a solution.
+    To stop a running job early and keep its best solution use StopSolve with the solve_id of the job instead.
+    """
+    await _solverReady()
+    try:
+        return (await asyncio.to_thread(job_manager.cancel, job_id)).status()
+    except Solver.JobNotFoundError as e:
+        return f"Error: {str(e)}"
+
+@mcp.tool()
+async def GetIncumbent(solve_id: int):
+    """
+    Return the latest progress and the best solution found so far by a running GurobiSolver or SolveSession call.
+    The solve_id is included in the progress notifications of the running solve.
+    """
+    await _solverReady()
+    task = solver_pool.getTask(solve_id)
+    if task is None:
+        return f"Error: No running solve with id {solve_id}."
+    objective, solution = task.getIncumbent()
+    return {"solve_id": solve_id, "progress": task.progress, "objective_value": objective, "solution": solution}
+
+@mcp.tool()
+async def StopSolve(solve_id: int):
+    """
+    Stop a running GurobiSolver or SolveSession call early, e.g. once the gap in its progress notifications is good enough.
+    The stopped call returns the best solution found so far with status 11 (INTERRUPTED).
+    """
+    await _solverReady()
+    task = solver_pool.getTask(solve_id)
+    if task is None:
+        return f"Error: No running solve with id {solve_id}."
+    task.stop()
+    return {"solve_id": solve_id, "stopping": True}
+
+@mcp.tool()
+async def GurobiBatchSolver(problems: list[dict] = None, base_problem: dict = None, overrides: list[dict] = None, ctx: Context = None):
+    """
+    Solve many optimization problems in one call, in parallel. Every problem uses the input schema of the GurobiSolver tool.
+    Either pass "problems", a list of complete problems, or pass "base_problem" plus "overrides", a list of partial problems
+    that are each merged into the base problem to form one instance (useful for scenario and sensitivity sweeps).
+    Nested objects are merged, other values are replaced. Linear and quadratic constraints can be overridden by name:
+    {"constraints": {"linear_constraints": {"c1": {"rhs": 12}}}}
+    Returns {"results": [...], "summary": {...}} with one result per instance in input order, in the same format as GurobiSolver.
+    Instances may warm start from earlier results with warm_start_from. Batch results have no result_id.
+    A progress notification is sent as each instance finishes.
+    """
+    await _solverReady()
+    try:
+        instances = Solver.expandBatch(problems, base_problem, overrides)
+    except Exception as e:
+        return f"Error: {str(e)}"
+    if len(instances) > config.GUROBI_MCP_MAX_BATCH_SIZE:
+        return f"Error: Batch has {len(instances)} problems, the limit is {config.GUROBI_MCP_MAX_BATCH_SIZE}."
+    try:
+        instances = await asyncio.to_thread(_resolveWarmStarts, instances)
+    except ValueError as e:
+        return f"Error: {str(e)}"
+
+    async def reportResult(index, result, completed):
+        if ctx is not None:
+            status = "solved" if isinstance(result, dict) else "failed"
+            await ctx.report_progress(completed, len(instances), f"Instance {index} {status}")
+
+    return await batch_solver.solve(instances, on_result=reportResult)
+
+@_problemTool(PROBLEM_FORMAT)
+async def ProblemToLP(problem: dict, file_format: str = "lp"):
+    """
+    Retuns the content of the problem written into the LP format file.
+    Set file_format to "mps" for the MPS format instead.
+    Must describe problem using the input schema defined below.
+    """
+    await _solverReady()
+    if file_format not in ("lp", "mps"):
+        return f"Error: Unsupported file format {file_format}. Use one of ['lp', 'mps']."
+    trace = Solver.RequestTrace("ProblemToLP")
+    try:
+        with trace.phase("hash"):
+            key = file_format + ":" + await asyncio.to_thread(Problem.problemHash, problem)
+        result = model_file_cache.get(key)
+        if result is not None:
+            return _finishRequest(trace, result, "cached")
+        with trace.phase("write"):
+            result = await asyncio.to_thread(_writeProblem, problem, file_format)
+        model_file_cache.put(key, result)
+        return _finishRequest(trace, result, "ok")
     except Exception as e:
-        return f"Error: Problem type is not specified. {str(e)}"
+        return _finishRequest(trace, f"Error: {str(e)}", "error")
 
 @mcp.tool()
-async def ProblemToLP(problem: dict):
-    """
-     Retuns the content of the problem written into the LP format file. 
-     Must describe problem using the input schema defined below.
-    Terminology:
-    - "Objective Function": The function to be maximized or minimized.
-    - "Constraints": The conditions that the solution must satisfy.
-    Supported problem types:
-    - Linear Programming (LP)
-    - Mixed Integer Linear Programming (MILP)
-    - Quadratic Programming (QP)
-    - Mixed Integer Quadratic Programming (MIQP)
-    - Quadratic Constrained Programming (QCP)
-    - Mixed Integer Quadratic Constrained Programming (MIQCP)
-    
-    For problem types such as LP,MILP,QP,MIQP do not include key "quadratic_constraints" in the constraints section.
-    For problem types such as LP,MILP do not include the key "quadratic_terms" in the objective section.
-    input_schema = {
-                        "problem": {
-                            "type": "object",
-                            "properties": {
-                                "name": {"type": "string"},
-                                "type": {
-                                    "type": "string",
-                                    "enum": ["LP", "MILP", "QP", "MIQP", "QCP", "MIQCP"]
-                                }
-                            },
-                            "required": ["type"],
-                            "optional": ["name"]
-                        },
-                        "objective": {
-                            "type": "object",
-                            "properties": {
-                                "type": {"type": "string", "enum": ["minimize", "maximize"]},
-                                "function_type": {"type": "string", "enum": ["linear", "quadratic"]},
-                                "linear_terms": {"type": "object",
-                                    "patternProperties": {
-                                        "^.*$": {"type": "number"}
-                                    }
-                                },
-                                "quadratic_terms": {
-                                    "type": "array",
-                                    "items": {
-                                        "type": "object",
-                                        "properties": {
-                                            "var1": {"type": "string"},
-                                            "var2": {"type": "string"},
-                                            "coef": {"type": "number"}
-                                        },
-                                        "required": ["var1", "var2", "coef"]
-                                    }
-                                }
-                            },
-                            "required": ["type", "function_type", "linear_terms"],
-                            "optional": ["quadratic_terms"]
-                        },
-                        "variables": {
-                            "type": "object",
-                            "patternProperties": {
-                                "^.*$": {
-                                    "type": "object",
-                                    "properties": {
-                                        "type": {"type": "string"},
-                                        "name": {"type": "string"},
-                                        "lb": {"type": "number"},
-                                        "ub": {"type": "number"}
-                                    },
-                                    "required": ["type"],
-                                    "optional": ["name", "lb", "ub"]
-                                }
-                            }
-                        },
-                        "constraints": {
-                            "type": "object",
-                            "properties": {
-                                "linear_constraints": {
-                                    "type": "array",
-                                    "items": {
-                                        "type": "object",
-                                        "properties": {
-                                            "lhs": {"type": "object",
-                                                "patternProperties": {
-                                                    "^.*$": {"type": "number"}
-                                                }
-                                            },
-                                            "rhs": {"type": "number"},
-                                            "sign": {"type": "string",
-                                                "enum": ["=", "<=", ">=", "<", ">"]
-                                            },
-                                            "name": {"type": "string"}
-                                        },
-                                        "required": ["lhs", "rhs", "sign"],
-                                        "optional": ["name"]
-                                    }
-                                },
-                                "quadratic_constraints": {
-                                    "type": "array",
-                                    "items": {
-                                        "type": "object",
-                                        "properties": {
-                                            "quadratic_terms": {"type": "array",
-                                                "items": {
-                                                    "type": "object",
-                                                    "properties": {
-                                                        "var1": {"type": "string"},
-                                                        "var2": {"type": "string"},
-                                                        "coef": {"type": "number"}
-                                                    },
-                                                    "required": ["var1", "var2", "coef"]
-                                                }
-                                            },
-                                            "linear_terms": {"type": "object",
-                                                "patternProperties": {
-                                                    "^.*$": {"type": "number"}
-                                                }
-                                            },
-                                            "constant": {"type": "number"},
-                                            "sign": {"type": "string",
-                                                "enum": ["=", "<=", ">=", "<", ">"]
-                                            },
-                                            "name": {"type": "string"}
-                                        },
-                                        "required": ["quadratic_terms", "linear_terms", "sign"],
-                                        "optional": ["constant", "name"]
-                                    }
-                                }
-                            }
-                        },
-                        "required": ["problem", "objective", "variables", "constraints"]
-                    }
-
-            Example input (QP):
-            {
-                "problem": {
-                    "name": "Example QP",
-                    "type": "QP"
-                },
-                "objective": {
-                    "type": "minimize",
-                    "function_type": "quadratic",
-                    "linear_terms": {"x": 3, "y": 4},
-                    "quadratic_terms": [
-                    {"var1": "x", "var2": "x", "coef": 1},
-                    {"var1": "x", "var2": "y", "coef": 2},
-                    {"var1": "y", "var2": "y", "coef": 3}
-                    ]
-                },
-                "variables": {
-                    "x": {"type": "continuous", "lb": 0},
-                    "y": {"type": "continuous", "lb": 0, "ub": 1}
-                },
-                "constraints": {
-                    "linear_constraints": [
-                        {
-                            "lhs": {"x": 2, "y": 1},
-                            "rhs": 10,
-                            "sign": "<=",
-                            "name": "c1"
-                        }
-                    ]
-                }
-            }
+async def CreateSession(problem: dict):
     """
+    Build a problem once and keep the model alive for later PatchSession and SolveSession calls.
+    The problem uses the same input schema as the GurobiSolver tool.
+    Returns the session_id to pass to the other session tools. Sessions are closed automatically when unused for a while.
+    Use sessions when the same problem will be changed and re-solved several times, each re-solve warm starts from the previous one.
+    """
+    await _solverReady()
     try:
-        problem = createProblem(problem)
-        result = problem.getProblemAsLP()
-        return result
+        compiled = await asyncio.to_thread(_compileWithWarmStart, problem)
+        session = await asyncio.to_thread(session_manager.create, compiled)
+        model = session.problem.getModel()
+        return {"session_id": session.id, "num_vars": model.NumVars, "num_constraints": model.NumConstrs + model.NumQConstrs,
+                "problem_class": compiled.analysis.report()}
     except Exception as e:
-        return f"Error: Problem type is not specified. {str(e)}"
+        return f"Error: {str(e)}"
+
+@mcp.tool()
+async def PatchSession(session_id: str, patch: dict):
+    """
+    Change the model of a session in place. All sections of the patch are optional:
+    {
+        "variables": {"x": {"lb": 0, "ub": 5, "type": "integer"}},
+        "linear_constraints": [{"name": "c1", "rhs": 10}, {"name": "c1", "lhs": {"x": 2}}, {"name": "new_c", "lhs": {"x": 1, "y": 1}, "sign": "<=", "rhs": 4}],
+        "remove_constraints": ["c2"],
+        "objective": {"type": "maximize", "linear_terms": {"x": 3}}
+    }
+    Existing variables and constraints (matched by variable key and constraint name) get only the given fields changed,
+    unknown ones are added and need lhs, sign and rhs. A coefficient of 0 in "lhs" removes the term.
+    A patch with any error is rejected as a whole and leaves the model unchanged.
+    """
+    await _solverReady()
+    try:
+        applied = await asyncio.to_thread(session_manager.patch, session_id, patch)
+        return {"session_id": session_id, "applied": applied}
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+@mcp.tool()
+async def SolveSession(session_id: str, ctx: Context = None):
+    """
+    Solve the current model of a session. Returns the same result as the GurobiSolver tool.
+    """
+    await _solverReady()
+    trace = Solver.RequestTrace("SolveSession")
+    try:
+        result = await solver_pool.run(session_manager.solve, session_id, on_progress=_progressReporter(ctx), trace=trace)
+        return _finishRequest(trace, result)
+    except Exception as e:
+        return _finishRequest(trace, f"Error: {str(e)}")
+
+@mcp.tool()
+async def CloseSession(session_id: str):
+    """
+    Close a session and free its model.
+    """
+    await _solverReady()
+    try:
+        await asyncio.to_thread(session_manager.close, session_id)
+        return {"session_id": session_id, "closed": True}
+    except Solver.SessionNotFoundError as e:
+        return f"Error: {str(e)}"
+
+@mcp.resource("gurobi://cache/stats", name="CacheStats", description="Hit, miss and size counters of the solve result cache.", mime_type="application/json")
+async def CacheStats() -> str:
+    await _solverReady()
+    return json.dumps(result_cache.stats())
+
+@mcp.resource("gurobi://metrics", name="Metrics", description="Request counts, per-phase timings, model sizes and solver statistics in the Prometheus text format.", mime_type="text/plain")
+async def Metrics() -> str:
+    await _solverReady()
+    return metrics.render()
+
 #Create prompt for formulating the problem
 @mcp.prompt()
 def GurobiSolverPrompt(problem: str) -> str:
@@ -375,17 +490,5 @@ def GurobiSolverPrompt(problem: str) -> str:
     """
 
 
-def createProblem(problem: dict) -> OptimizationProblem:
-    type = problem["problem"]["type"]
-    if type == "LP" or type == "MILP":
-        return LP(problem)
-    elif type == "QP" or type == "MIQP":
-        return QP(problem)
-    elif type == "QCP" or type == "MIQCP":
-        return QCP(problem)
-    else:
-        raise ValueError(f"Unsupported problem type: {type}")
-
-
 if __name__ == "__main__":
     mcp.run()
\ No newline at end of file
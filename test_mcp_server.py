@@ -1,8 +1,31 @@
-from main import GurobiSolver,createProblem,ProblemToLP
-from Problem import LP, QP, QCP
+from main import GurobiSolver,createProblem,ProblemToLP,CreateSession,PatchSession,SolveSession,CloseSession,GurobiBatchSolver,GetIncumbent,StopSolve,Metrics,SubmitSolve,GetJobStatus,GetJobResult,CancelJob,SolveProblemFile
+from Problem import LP, QP, QCP, OptimizationProblem, EnvPool, ProblemValidationError, compileProblem, problemHash, validateParameters, resolveParameters, writeLP, writeMPS
+from Problem.ProblemReader import JsonStream
+from Problem.ProblemAnalyzer import quadraticCurvature
+from Problem.ProblemReducer import reduceProblem
+from Solver import solveProblem, SolverPool, SolveTask, SolverQueueFullError, ResultCache, SessionManager, SessionLimitError, RequestTrace, JobManager, JobLimitError
+from Solver import Solve
+from Solver.Solve import optimizeModel
+from Solver.SolutionReport import decodeVector
+from benchmarks.bench_pipeline import benchmarkInstance, compareRuns, PHASES
+from benchmarks.generators import generateSloppyLP, generateBlockMILP
+import asyncio
+import gzip
+import io
+import random
+import subprocess
+import sys
+import threading
+import time
 import os
 import json
+import logging
+import math
+import pstats
 import pytest
+import main
+import gurobipy as gp
+import numpy as np
 
 def getJson(filename):
     """Read a JSON file and return its content."""
@@ -63,4 +86,751 @@ async def testProblemToLPTool():
     result = await ProblemToLP(milp)
     assert isinstance(result,str), "Result should be a string"
     assert "Maximize" in result, "Result should contain 'Maximize'"
-    assert "3 x_Resource1_Job1 + 27 x_Resource1_Job2 + 13 x_Resource1_Job3" in result, "Result should contain the objective function"
\ No newline at end of file
+    assert "3 x_Resource1_Job1 + 27 x_Resource1_Job2 + 13 x_Resource1_Job3" in result, "Result should contain the objective function"
+
+@pytest.mark.asyncio
+async def testGurobiSolverConcurrentSolves():
+    """Several solves submitted together all complete through the worker pool."""
+    results = await asyncio.gather(GurobiSolver(milp), GurobiSolver(qp), GurobiSolver(qcp))
+    assert all(isinstance(result, dict) and result["status"] == 2 for result in results), "All solves should be optimal"
+
+@pytest.mark.asyncio
+async def testSolverPoolRejectsWhenQueueFull():
+    """The pool applies backpressure once all workers are busy and the queue is full."""
+    pool = SolverPool(max_workers=1, threads_per_solve=1, max_queue=0)
+    release = threading.Event()
+    def blocked(task):
+        release.wait(5)
+        return task.id
+    first = asyncio.ensure_future(pool.run(blocked))
+    await asyncio.sleep(0.05)
+    with pytest.raises(SolverQueueFullError):
+        await pool.run(blocked)
+    release.set()
+    assert isinstance(await first, int)
+    assert pool.pending == 0
+    pool.shutdown()
+
+def writeModel(model, path) -> str:
+    model.write(str(path))
+    with open(path) as f:
+        return f.read()
+
+@pytest.mark.parametrize("fixture", [milp, qp, qcp])
+def testMatrixBuilderMatchesExpressionBuilder(fixture, tmp_path):
+    """The matrix builder produces the same model as the per-term expression builder."""
+    matrix = writeModel(createProblem(fixture, "matrix").getModel(), tmp_path / "matrix.lp")
+    expression = writeModel(createProblem(fixture, "expression").getModel(), tmp_path / "expression.lp")
+    assert matrix == expression, "Both builders should write the same LP file"
+
+@pytest.mark.parametrize("fixture", [milp, qp, qcp])
+def testWriteLPMatchesGurobi(fixture, tmp_path):
+    """The in-memory LP writer produces the same text as Gurobi's own LP writer."""
+    expected = writeModel(createProblem(fixture).getModel(), tmp_path / "gurobi.lp")
+    assert writeLP(fixture) == expected
+
+@pytest.mark.parametrize("fixture", [milp, qp, qcp])
+def testWriteMPSRoundTrip(fixture, tmp_path):
+    """Gurobi reads the MPS text back into the same model."""
+    path = tmp_path / "problem.mps"
+    path.write_text(writeMPS(fixture))
+    expected = writeModel(createProblem(fixture).getModel(), tmp_path / "gurobi.lp")
+    assert writeModel(gp.read(str(path)), tmp_path / "read.lp") == expected
+
+def testWritersKeepBinaryBoundsLikeGurobi(tmp_path):
+    """Binary bounds outside [0, 1] or fractional are written as Gurobi keeps them, so an infeasible model stays infeasible."""
+    bounds = [(2, 1), (2, 3), (-1, 5), (-1, 0.5), (0.5, 0.7), (0, 0), (1, 1), (-2, -1), (0, 1), (0.3, 1)]
+    problem = {
+        "problem": {"name": "binaries", "type": "MILP"},
+        "objective": {"type": "minimize", "function_type": "linear", "linear_terms": {f"b{i}": 1 for i in range(len(bounds))}},
+        "variables": {f"b{i}": {"type": "binary", "lb": lb, "ub": ub} for i, (lb, ub) in enumerate(bounds)},
+        "constraints": {"linear_constraints": [{"name": "c", "lhs": {"b0": 1, "b9": 1}, "rhs": 5, "sign": "<="}]},
+    }
+    model = createProblem(problem).getModel()
+    assert writeLP(problem) == writeModel(model, tmp_path / "gurobi.lp")
+    section = lambda text: text[text.index("BOUNDS"):].split()
+    assert section(writeMPS(problem)) == section(writeModel(model, tmp_path / "gurobi.mps"))
+    #Gurobi's reader drops bounds it finds twice, reading the written file must give what reading Gurobi's own file gives
+    path = tmp_path / "problem.mps"
+    path.write_text(writeMPS(problem))
+    assert writeModel(gp.read(str(path)), tmp_path / "read.lp") == writeModel(gp.read(str(tmp_path / "gurobi.mps")), tmp_path / "read_gurobi.lp")
+
+@pytest.mark.asyncio
+async def testProblemToLPToolMPS():
+    result = await ProblemToLP(qcp, file_format="mps")
+    assert result.startswith("NAME") and "QCMATRIX" in result
+    assert (await ProblemToLP(qcp, file_format="xml")).startswith("Error:")
+
+def testEnvPoolReusesEnvironments(capfd):
+    """Disposed problems hand their environment back to the pool and building prints nothing."""
+    pool = EnvPool(size=1, prestart=True)
+    previous, OptimizationProblem.env_pool = OptimizationProblem.env_pool, pool
+    try:
+        for fixture in (milp, qp, qcp):
+            createProblem(fixture).dispose()
+        assert pool.stats()["created"] == 1 and pool.stats()["reused"] == 3
+        first, second = createProblem(milp), createProblem(qp)
+        assert pool.stats()["created"] == 2, "A second environment is started while the first is checked out"
+        first.dispose()
+        second.dispose()
+        assert pool.stats()["idle"] == 1 and pool.stats()["disposed"] == 1
+    finally:
+        OptimizationProblem.env_pool = previous
+        pool.close()
+    assert capfd.readouterr().out == ""
+
+def testConcurrentBuildsUseSeparateEnvironments():
+    """Models built on several threads at once each get their own environment."""
+    problems = []
+    def build(fixture):
+        problems.append(createProblem(fixture))
+    threads = [threading.Thread(target=build, args=(fixture,)) for fixture in (milp, qp, qcp) * 2]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(problem._env) for problem in problems}) == len(problems)
+    for problem in problems:
+        problem.dispose()
+
+@pytest.mark.asyncio
+async def testInvalidProblemIsRejectedBeforeBuilding():
+    """An unknown variable is reported by name and no environment or model is allocated."""
+    invalid = json.loads(json.dumps(milp))
+    invalid["constraints"]["linear_constraints"][0]["lhs"]["z"] = 1
+    created = OptimizationProblem.env_pool.stats()["created"] + OptimizationProblem.env_pool.stats()["reused"]
+    result = await GurobiSolver(invalid)
+    assert result.startswith("Error: Invalid problem: Unknown variable z in constraint")
+    assert OptimizationProblem.env_pool.stats()["created"] + OptimizationProblem.env_pool.stats()["reused"] == created
+
+def testValidationReportsEveryError():
+    """All problems in the request are reported together."""
+    invalid = json.loads(json.dumps(qcp))
+    invalid["objective"]["function_type"] = "cubic"
+    invalid["variables"]["y"]["name"] = "x"
+    invalid["constraints"]["linear_constraints"][0]["sign"] = "=<"
+    invalid["constraints"]["quadratic_constraints"][0]["quadratic_terms"][0]["var2"] = "w"
+    with pytest.raises(ProblemValidationError) as error:
+        compileProblem(invalid)
+    assert len(error.value.errors) == 4
+    assert "Duplicate variable name x" in str(error.value)
+    del invalid["problem"]["type"]
+    with pytest.raises(ValueError, match="Problem type is not specified"):
+        createProblem(invalid)
+
+def testCompiledProblemIsReusedByBuilders():
+    """A CompiledProblem builds the same model as the problem dict it came from."""
+    compiled = compileProblem(qcp)
+    assert compiled.category == "QCP" and compiled.num_vars == 2 and compiled.num_qconstrs == 1
+    problem = createProblem(compiled)
+    assert problem.getModel().NumQConstrs == 1
+    assert problem.getProblemAsLP() == writeLP(qcp)
+    problem.dispose()
+
+def testProblemHashIgnoresFormatting():
+    """Key order, int vs float and omitted default names do not change the problem hash."""
+    reordered = json.loads(json.dumps(qcp, sort_keys=True))
+    reordered["objective"]["linear_terms"] = {"y": 2.0, "x": 1.0}
+    del reordered["variables"]["x"]["name"]
+    assert problemHash(reordered) == problemHash(qcp)
+    changed = json.loads(json.dumps(qcp))
+    changed["constraints"]["linear_constraints"][0]["rhs"] = 6
+    assert problemHash(changed) != problemHash(qcp)
+
+def testResultCacheEvictsAndPersists(tmp_path):
+    """The cache evicts least recently used results over budget and serves them again from disk."""
+    cache = ResultCache(max_bytes=60, db_path=str(tmp_path / "cache.db"))
+    cache.put("a", {"solution": {"x": 1.0}})
+    cache.put("b", {"solution": {"y": 2.0}})
+    cache.put("c", {"solution": {"z": 3.0}})
+    assert cache.stats()["evictions"] == 1
+    assert cache.get("a") == {"solution": {"x": 1.0}}
+    assert cache.get("missing") is None
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["misses"], stats["disk_entries"]) == (1, 1, 3)
+    cache.close()
+    restarted = ResultCache(max_bytes=60, db_path=str(tmp_path / "cache.db"))
+    assert restarted.get("c") == {"solution": {"z": 3.0}}
+    restarted.close()
+
+@pytest.mark.asyncio
+async def testSessionPatchAndResolve():
+    """A session model can be patched in place and re-solved."""
+    session = await CreateSession(milp)
+    session_id = session["session_id"]
+    first = await SolveSession(session_id)
+    assert first["solution"]["x_Resource1_Job1"] == 1
+    patch = {"objective": {"linear_terms": {"(Resource1,Job1)": 0, "(Resource1,Job2)": 500}}}
+    patched = await PatchSession(session_id, patch)
+    assert patched["applied"]["objective"] == 2
+    second = await SolveSession(session_id)
+    assert second["solution"]["x_Resource1_Job2"] == 1, "Re-solve should pick up the new objective coefficient"
+    misspelled = await PatchSession(session_id, {"variables": {"(Resource1,Job1)": {"type": "integr"}, "new": {"ub": 1}}})
+    assert misspelled.startswith("Error: Unknown type integr")
+    assert (await PatchSession(session_id, {"objective": {"linear_terms": {"new": 1}}})) == "Error: Unknown variable new", "A rejected patch changes nothing"
+    rejected = [{"variables": {"(Resource2,Job3)": {"ub": 0}}, "remove_constraints": ["nope"]},
+                {"variables": {"(Resource2,Job3)": "bad"}},
+                {"objective": {"linear_terms": {"(Resource2,Job3)": 0}}, "linear_constraints": [{"name": "new_c", "sign": "<=", "rhs": 1}]}]
+    errors = [await PatchSession(session_id, patch) for patch in rejected]
+    assert errors == ["Error: Unknown constraint nope in remove_constraints", "Error: Variable (Resource2,Job3) must be an object",
+                      "Error: New constraint new_c needs lhs"]
+    assert (await SolveSession(session_id))["objective_value"] == second["objective_value"], "Rejected patches leave the model unchanged"
+    assert (await CloseSession(session_id))["closed"]
+    assert (await SolveSession(session_id)).startswith("Error"), "A closed session cannot be solved"
+
+def testSessionManagerLimitsAndExpiry():
+    """The session cap is enforced and idle sessions are closed."""
+    manager = SessionManager(max_sessions=1, idle_timeout=0)
+    manager.create(qp)
+    manager.idle_timeout = 3600
+    with pytest.raises(SessionLimitError):
+        manager.create(qp)
+    manager.idle_timeout = 0
+    assert manager.expireIdle() == 1
+    assert len(manager) == 0
+
+@pytest.mark.asyncio
+async def testGurobiBatchSolverOverrides():
+    """A base problem with overrides is solved as one instance per override."""
+    overrides = [{}, {"constraints": {"linear_constraints": {"c2": {"rhs": 6}}}}, {"variables": {"x": {"ub": -1}}}]
+    batch = await GurobiBatchSolver(base_problem=qp, overrides=overrides)
+    results, summary = batch["results"], batch["summary"]
+    assert results[0]["status"] == 2 and results[1]["status"] == 2
+    assert results[1]["solution"]["x"] == pytest.approx(2), "Override should raise the lower limit on x"
+    assert isinstance(results[2], str), "Infeasible instance should report an error"
+    assert (summary["total"], summary["solved"], summary["failed"]) == (3, 2, 1)
+    assert summary["best_index"] == 0
+    result_id = (await GurobiSolver(milp))["result_id"]
+    resolved = main._resolveWarmStarts([milp, dict(milp, warm_start_from=result_id)])
+    assert resolved[0] is milp and resolved[1].warm_start["result_id"] == result_id, "Warm starts are resolved before instances reach the workers"
+    batch = await GurobiBatchSolver(base_problem=dict(milp, warm_start_from=result_id), overrides=[{}])
+    assert batch["results"][0]["objective_value"] == pytest.approx(193) and batch["summary"]["best_index"] == 0
+    assert (await GurobiBatchSolver(problems=[milp, dict(milp, warm_start_from="unknown")])).startswith("Error: Instance 1: Unknown or expired")
+
+def marketSplitProblem(rows=6, cols=50, seed=1):
+    """A small binary market split problem that Gurobi cannot prove optimal quickly."""
+    rng = random.Random(seed)
+    variables = {f"x{j}": {"type": "binary"} for j in range(cols)}
+    linear_constraints = []
+    objective = {}
+    for i in range(rows):
+        lhs = {f"x{j}": rng.randint(0, 99) for j in range(cols)}
+        rhs = sum(lhs.values()) // 2
+        variables[f"sp{i}"] = {"type": "continuous"}
+        variables[f"sm{i}"] = {"type": "continuous"}
+        lhs[f"sp{i}"] = 1
+        lhs[f"sm{i}"] = -1
+        objective[f"sp{i}"] = 1
+        objective[f"sm{i}"] = 1
+        linear_constraints.append({"lhs": lhs, "rhs": rhs, "sign": "=", "name": f"r{i}"})
+    return {
+        "problem": {"name": "MarketSplit", "type": "MILP"},
+        "objective": {"type": "minimize", "function_type": "linear", "linear_terms": objective},
+        "variables": variables,
+        "constraints": {"linear_constraints": linear_constraints}
+    }
+
+class ProgressRecorder:
+    """Stands in for the MCP Context and records progress notifications."""
+    def __init__(self):
+        self.messages = []
+
+    async def report_progress(self, progress, total=None, message=None):
+        self.messages.append(json.loads(message))
+
+@pytest.mark.asyncio
+async def testProgressIncumbentAndStopSolve():
+    """A long MIP reports progress, exposes its incumbent and can be stopped early with its best solution."""
+    recorder = ProgressRecorder()
+    solve = asyncio.ensure_future(GurobiSolver(marketSplitProblem(), ctx=recorder))
+    for _ in range(200):
+        await asyncio.sleep(0.05)
+        if any(message.get("incumbent_objective") is not None for message in recorder.messages):
+            break
+    solve_id = recorder.messages[-1]["solve_id"]
+    incumbent = await GetIncumbent(solve_id)
+    assert isinstance(incumbent["solution"], dict) and incumbent["objective_value"] is not None
+    assert (await StopSolve(solve_id))["stopping"]
+    result = await asyncio.wait_for(solve, 10)
+    assert result["status"] == 11, "A stopped solve should return its incumbent with status INTERRUPTED"
+    assert "gap" in recorder.messages[-1] and "node_count" in recorder.messages[-1]
+
+def testParametersAreValidated():
+    """Unknown parameters, wrong types and out of range values are rejected before the model is built."""
+    with pytest.raises(ValueError, match="unsupported parameter"):
+        validateParameters({"OutputFlag": 1})
+    with pytest.raises(ValueError, match="must be an integer"):
+        validateParameters({"Threads": 1.5})
+    with pytest.raises(ValueError, match="must be an integer"):
+        validateParameters({"Threads": math.inf})
+    with pytest.raises(ValueError, match="between"):
+        validateParameters({"MIPFocus": 7})
+    assert validateParameters({"TimeLimit": 5, "Method": 1.0}) == {"TimeLimit": 5.0, "Method": 1}
+    assert resolveParameters({"TimeLimit": 100}, {"MIPGap": 0.01}, {"TimeLimit": 10}) == {"TimeLimit": 10, "MIPGap": 0.01}
+
+@pytest.mark.asyncio
+async def testGurobiSolverTimeLimitParameter():
+    """A TimeLimit in the problem stops a hard MIP and returns its incumbent."""
+    problem = marketSplitProblem()
+    problem["parameters"] = {"TimeLimit": 0.5}
+    result = await GurobiSolver(problem)
+    assert result["status"] == 9, "Expected status TIME_LIMIT(9)"
+    assert isinstance(result["solution"], dict)
+
+@pytest.mark.asyncio
+async def testSparseFilteredSolution():
+    """Sparse output with a name pattern and top_k reports only the matching nonzeros and counts the rest."""
+    problem = json.loads(json.dumps(milp))
+    problem["output"] = {"sparse": True, "variables": ["x_Resource1_*", "x_Resource2_*"], "top_k": 1, "duals": True}
+    result = await GurobiSolver(problem)
+    assert result["solution"] == {"x_Resource1_Job1": 1.0}
+    assert result["omitted"]["solution"] == 8
+    assert "duals" not in result and "MIP" in result["notes"][0]
+    problem["output"] = {"encoding": "binary", "top_k": 0}
+    result = await GurobiSolver(problem)
+    assert isinstance(result, str) and "encoding" in result and "top_k" in result
+
+def testColumnarDualsAndSlacks():
+    """Columnar vectors decode to the values Gurobi reports for the solution, duals, reduced costs and slacks."""
+    problem = {
+        "problem": {"type": "LP", "name": "Columnar"},
+        "objective": {"type": "maximize", "function_type": "linear", "linear_terms": {"x": 3, "y": 2}},
+        "variables": {"x": {"type": "continuous", "lb": 0}, "y": {"type": "continuous", "lb": 0}},
+        "constraints": {"linear_constraints": [
+            {"name": "capacity", "lhs": {"x": 1, "y": 1}, "rhs": 4, "sign": "<="},
+            {"name": "limit", "lhs": {"x": 1}, "rhs": 3, "sign": "<="},
+            {"name": "loose", "lhs": {"y": 1}, "rhs": 10, "sign": "<="}]},
+        "output": {"encoding": "columnar", "duals": True, "reduced_costs": True, "slacks": True, "constraints": ["c*", "l*"]}
+    }
+    result = solveProblem(None, problem)
+    assert result["solution"]["dtype"] == "float64"
+    assert decodeVector(result["solution"]) == {"x": 3.0, "y": 1.0}
+    assert decodeVector(result["duals"]) == {"capacity": 2.0, "limit": 1.0, "loose": 0.0}
+    assert decodeVector(result["reduced_costs"]) == {"x": 0.0, "y": 0.0}
+    assert decodeVector(result["slacks"]) == {"capacity": 0.0, "limit": 0.0, "loose": 9.0}
+
+@pytest.mark.asyncio
+async def testIndexedFamiliesMatchScalarProblem():
+    """MILP1 written with sets, a data table, a variable family and templates solves to the same assignment."""
+    indexed = getJson(os.path.join("TestProblems", "MILP1Indexed.json"))
+    compiled = compileProblem(indexed)
+    assert compiled.num_vars == 9 and compiled.num_constrs == 6
+    assert compiled.constr_names[0] == "Resource_Constraint[Resource1]"
+    result = await GurobiSolver(indexed)
+    expected = await GurobiSolver(milp)
+    assert result["objective_value"] == expected["objective_value"]
+    assert result["solution"]["x[Resource1,Job1]"] == 1
+    assert result["solution"]["x[Resource3,Job2]"] == 1
+
+def testTemplatesExpandIntoArrays():
+    """Templates over large sets expand without per-variable entries, and family elements can be used by name."""
+    n = 300
+    problem = {
+        "problem": {"type": "LP"},
+        "sets": {"I": n, "J": n},
+        "variable_families": {"x": {"index": ["I", "J"], "ub": 1}},
+        "variables": {"t": {"type": "continuous"}},
+        "objective": {"type": "minimize", "function_type": "linear", "linear_terms": {"t": 1},
+                      "linear_templates": [{"family": "x", "index": ["i", "j"], "sum": {"i": "I", "j": "J"}, "coef": 2}]},
+        "constraints": {
+            "linear_constraints": [{"name": "link", "lhs": {"x[0,0]": 1, "t": -1}, "rhs": 0, "sign": "<="}],
+            "linear_templates": [{"name": "row", "over": {"i": "I"}, "lhs": [{"family": "x", "index": ["i", "j"], "sum": {"j": "J"}}], "sign": ">=", "rhs": 1}]
+        }
+    }
+    compiled = compileProblem(problem)
+    assert compiled.num_vars == n * n + 1 and compiled.num_constrs == n + 1
+    assert compiled.A.nnz == n * n + 2
+    assert compiled.A[0, compiled.var_names.index("x[0,0]")] == 1
+    assert compiled.obj.sum() == 2 * n * n + 1
+    problem["constraints"]["linear_templates"][0]["lhs"] = [{"family": "x", "index": ["i", n]}]
+    with pytest.raises(ProblemValidationError, match="nor a label of set J"):
+        compileProblem(problem)
+
+def testBenchmarkPipelineReportsEveryPhase():
+    """The benchmark harness times every phase of a generated instance and flags slower phases."""
+    result = benchmarkInstance({"type": "QP", "num_vars": 30, "num_constrs": 10, "density": 0.2, "q_terms": 20}, 1, {"Threads": 1})
+    assert result["status"] == 2 and result["num_vars"] == 30
+    assert set(result["seconds"]) == set(PHASES) and set(result["peak_bytes"]) == set(PHASES)
+    baseline = {"results": [dict(result, seconds={phase: 0.01 for phase in PHASES})]}
+    slower = {"results": [dict(result, seconds=dict({phase: 0.01 for phase in PHASES}, solve=0.05))]}
+    assert compareRuns(baseline, slower, 1.2) == [f"{result['instance']} solve: 0.0100s -> 0.0500s (5.00x)"]
+
+@pytest.mark.asyncio
+async def testMetricsRecordPhasesOfEachCall():
+    """A solve records its phases, model size and solver statistics in the metrics resource and the structured log."""
+    records = []
+    handler = logging.Handler()
+    handler.emit = lambda record: records.append(json.loads(record.getMessage()))
+    logger = logging.getLogger("gurobi_mcp.metrics")
+    logger.addHandler(handler)
+    level = logger.level
+    logger.setLevel(logging.INFO)
+    try:
+        problem = json.loads(json.dumps(qp))
+        problem["problem"]["name"] = "MetricsQP"
+        result = await GurobiSolver(problem)
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(level)
+    assert result["status"] == 2
+    trace = records[-1]
+    assert trace["tool"] == "GurobiSolver" and trace["outcome"] == "ok"
+    assert {"compile", "queue_wait", "build", "build.variables", "solve", "report"} <= set(trace["phases"])
+    assert "build.update" not in trace["phases"], "The solve applies the pending additions of the build"
+    assert trace["model"]["cols"] == 2 and trace["model"]["q_nonzeros"] == 3
+    assert "runtime" in trace["solver"] and "iter_count" in trace["solver"]
+    text = await Metrics()
+    assert 'gurobi_mcp_requests_total{outcome="ok",tool="GurobiSolver"}' in text
+    assert 'gurobi_mcp_phase_seconds_count{phase="build.variables",tool="GurobiSolver"}' in text
+    assert "# TYPE gurobi_mcp_solves_pending gauge" in text
+
+def testBuildProfilingWritesProfile(tmp_path, monkeypatch):
+    """With a profile directory set, the build of a traced solve is captured with cProfile."""
+    monkeypatch.setattr(Solve, "BUILD_PROFILE_DIR", str(tmp_path))
+    task = SolveTask(1, trace=RequestTrace("GurobiSolver"))
+    result = solveProblem(task, milp)
+    assert result["status"] == 2
+    stats = pstats.Stats(task.trace.profile)
+    assert any(function[2] == "_addVariables" for function in stats.stats)
+
+def testLazyUpdateDefersPendingAdditions():
+    """A lazy build leaves its additions pending until the solve, and solves to the same result as a regular build."""
+    lazy = createProblem(qcp, lazy_update=True)
+    regular = createProblem(qcp)
+    try:
+        assert lazy.getModel().NumVars == 0, "Additions should still be pending"
+        assert regular.getModel().NumVars == 2 and regular.getModel().NumQConstrs == 1
+        assert optimizeModel(None, lazy.getModel())["objective_value"] == pytest.approx(optimizeModel(None, regular.getModel())["objective_value"])
+        assert "update" not in lazy.build_timings and "update" in regular.build_timings
+    finally:
+        lazy.dispose()
+        regular.dispose()
+
+def testQuadraticTermsAreMerged(tmp_path):
+    """Symmetric and duplicate quadratic terms are merged into one term and cancelling terms are dropped, with either builder."""
+    problem = json.loads(json.dumps(qcp))
+    problem["objective"]["quadratic_terms"] += [{"var1": "x", "var2": "y", "coef": 1}, {"var1": "y", "var2": "x", "coef": 2},
+                                                {"var1": "y", "var2": "y", "coef": -2}]
+    problem["constraints"]["quadratic_constraints"][0]["quadratic_terms"].append({"var1": "y", "var2": "x", "coef": 1.5})
+    compiled = compileProblem(problem)
+    assert list(zip(compiled.obj_q_rows, compiled.obj_q_cols, compiled.obj_q_vals)) == [(0, 0, 1), (0, 1, 3)]
+    constraint = compiled.quadratic_constraints[0]
+    assert list(zip(constraint.q_rows, constraint.q_cols, constraint.q_vals)) == [(0, 0, 1), (0, 1, 2), (1, 1, 1)]
+    matrix = writeModel(createProblem(compiled, "matrix").getModel(), tmp_path / "matrix.lp")
+    assert matrix == writeModel(createProblem(compiled, "expression").getModel(), tmp_path / "expression.lp")
+    assert writeLP(compiled) == matrix
+
+@pytest.mark.asyncio
+async def testSubmitSolveAndFetchResult():
+    """A submitted solve returns a job at once, and GetJobResult returns the same result as GurobiSolver once it finishes."""
+    job = await SubmitSolve(qp)
+    assert job["state"] in ("queued", "running", "completed")
+    result = await GetJobResult(job["job_id"], wait_seconds=30)
+    assert result["state"] == "completed"
+    assert result["result"]["objective_value"] == pytest.approx((await GurobiSolver(qp))["objective_value"])
+    assert (await GetJobStatus(job["job_id"]))["state"] == "completed"
+    assert (await CancelJob("unknown")).startswith("Error: Unknown or expired job")
+
+def testJobLimitCancellationAndExpiry():
+    """Queued jobs can be dropped, running jobs are cancelled through their task, the job limit holds and finished jobs expire."""
+    pool = SolverPool(max_workers=1, threads_per_solve=1, max_queue=4)
+    manager = JobManager(pool, max_jobs=2, result_ttl=60)
+    started = threading.Event()
+
+    def runUntilCancelled(task):
+        started.set()
+        while not task.cancelled:
+            time.sleep(0.01)
+        return "Error: Optimization was cancelled."
+
+    running = manager.submit(runUntilCancelled)
+    queued = manager.submit(lambda task: {"status": 2})
+    with pytest.raises(JobLimitError):
+        manager.submit(lambda task: {"status": 2})
+    assert started.wait(5)
+    assert manager.cancel(queued.id).state == "cancelled"
+    assert manager.get(running.id).state == "running"
+    manager.cancel(running.id)
+    assert running.wait(5) and running.state == "cancelled"
+    assert manager.submit(lambda task: {"status": 2}).wait(5)
+    manager.result_ttl = 0
+    time.sleep(0.01)
+    assert manager.expireFinished() == 3 and len(manager) == 0
+    pool.shutdown()
+
+@pytest.mark.asyncio
+async def testWarmStartFromEarlierResult():
+    """An LP solved with its basis restarts from it without simplex iterations, and a MIP takes the earlier solution as its start."""
+    lp = json.loads(json.dumps(milp))
+    lp["problem"]["type"] = "LP"
+    for variable in lp["variables"].values():
+        variable["type"] = "continuous"
+    lp["output"] = {"basis": True}
+    first = await GurobiSolver(lp)
+    assert set(first["basis"]) == {"variables", "constraints"}
+    lp["warm_start_from"] = first["result_id"]
+    compiled = main._compileWithWarmStart(lp)
+    problem = createProblem(compiled)
+    try:
+        problem.getModel().optimize()
+        assert problem.getModel().IterCount == 0 and problem.getModel().ObjVal == pytest.approx(first["objective_value"])
+    finally:
+        problem.dispose()
+
+    mip = dict(milp, warm_start_from=(await GurobiSolver(milp))["result_id"])
+    mip["variables"] = dict(milp["variables"], **{"(Resource1,Job1)": dict(milp["variables"]["(Resource1,Job1)"], start=0, hint=1)})
+    problem = createProblem(main._compileWithWarmStart(mip))
+    try:
+        model = problem.getModel()
+        starts = dict(zip(model.getAttr("VarName", model.getVars()), model.getAttr("Start", model.getVars())))
+        assert starts["x_Resource1_Job1"] == 0 and starts["x_Resource2_Job3"] == 1
+        assert model.getVarByName("x_Resource1_Job1").VarHintVal == 1
+    finally:
+        problem.dispose()
+    assert (await GurobiSolver(dict(milp, warm_start_from="unknown"))).startswith("Error: Unknown or expired result_id")
+
+@pytest.mark.asyncio
+async def testCachedResultsGetAFreshResultId(monkeypatch):
+    """A result served from the cache can be named in warm_start_from after the solve that produced it has expired."""
+    problem = dict(milp, problem={"name": "cached_warm_start", "type": "MILP"})
+    first = await GurobiSolver(problem)
+    monkeypatch.setattr(main, "warm_start_results", ResultCache(max_bytes=1024 * 1024))
+    cached = await GurobiSolver(problem)
+    assert cached["result_id"] != first["result_id"] and cached["objective_value"] == first["objective_value"]
+    assert (await GurobiSolver(dict(problem, warm_start_from=cached["result_id"])))["objective_value"] == pytest.approx(193)
+
+@pytest.mark.asyncio
+async def testSolveProblemFileFormats(tmp_path, monkeypatch):
+    """JSON, JSON Lines and MPS files of the same problem solve to the objective of the problem sent as a dict."""
+    monkeypatch.setattr(main.config, "GUROBI_MCP_PROBLEM_FILE_DIR", str(tmp_path))
+    expected = (await GurobiSolver(qcp))["objective_value"]
+    constraints = qcp["constraints"]["linear_constraints"] + qcp["constraints"]["quadratic_constraints"]
+    (tmp_path / "qcp.json").write_text(json.dumps(qcp, indent=2))
+    (tmp_path / "qcp.jsonl").write_text("\n".join(json.dumps(line) for line in [{k: v for k, v in qcp.items() if k != "constraints"}] + constraints))
+    (tmp_path / "qcp.mps").write_text(writeMPS(qcp))
+    for name in ("qcp.json", "qcp.jsonl", "qcp.mps"):
+        result = await SolveProblemFile(str(tmp_path / name))
+        assert result["objective_value"] == pytest.approx(expected), name
+    assert (await SolveProblemFile(str(tmp_path / "missing.json"))).startswith("Error: No such file")
+    #file_format overrides the extension, also for the formats Gurobi reads
+    (tmp_path / "qcp.txt").write_text(writeLP(qcp))
+    assert (await SolveProblemFile(str(tmp_path / "qcp.txt"), "lp"))["objective_value"] == pytest.approx(expected)
+    with gzip.open(tmp_path / "qcp.txt.gz", "wt") as f:
+        f.write(writeMPS(qcp))
+    assert (await SolveProblemFile(str(tmp_path / "qcp.txt.gz"), "mps"))["objective_value"] == pytest.approx(expected)
+    #Files outside the problem file directory are refused unless any path is allowed with *
+    outside = tmp_path.parent / f"{tmp_path.name}-outside.mps"
+    outside.write_text(writeMPS(qcp))
+    for path in (str(outside), str(tmp_path / ".." / outside.name), "/etc/hostname"):
+        assert (await SolveProblemFile(path, "lp")).startswith("Error: Problem files must be inside"), path
+    monkeypatch.setattr(main.config, "GUROBI_MCP_PROBLEM_FILE_DIR", "*")
+    assert (await SolveProblemFile(str(outside)))["objective_value"] == pytest.approx(expected)
+    outside.unlink()
+
+    #Values that straddle the read chunks are decoded whole
+    stream = JsonStream(io.StringIO('{"a": [1.25, {"b": "text"}, 123456], "c": true}'), chunk_size=4)
+    read = {}
+    for key in stream.members():
+        read[key] = [stream.value() for _ in stream.elements()] if key == "a" else stream.value()
+    assert read == {"a": [1.25, {"b": "text"}, 123456], "c": True} and stream.peek() == ""
+
+@pytest.mark.parametrize("fixture", ["MILP1.json", "MILP1Indexed.json", "MILP1 relaxed"])
+def testBackendsAgreeOnFixtures(fixture):
+    """Gurobi and SciPy solve the LP and MILP fixtures to the same objective, duals and reduced costs."""
+    problem = json.loads(json.dumps(milp)) if fixture == "MILP1 relaxed" else getJson(os.path.join("TestProblems", fixture))
+    if fixture == "MILP1 relaxed":
+        problem["problem"]["type"] = "LP"
+        for variable in problem["variables"].values():
+            variable["type"] = "continuous"
+        problem["output"] = {"duals": True, "reduced_costs": True, "slacks": True}
+    gurobi = solveProblem(None, dict(problem, backend="gurobi"))
+    scipy = solveProblem(None, dict(problem, backend="scipy"))
+    assert scipy["backend"] == "scipy" and "backend" not in gurobi
+    assert scipy["status"] == gurobi["status"] == gp.GRB.OPTIMAL
+    assert scipy["objective_value"] == pytest.approx(gurobi["objective_value"])
+    for key in ("duals", "reduced_costs", "slacks"):
+        if key in gurobi:
+            assert scipy[key] == pytest.approx(gurobi[key]), key
+
+def testAutoBackendFallsBackToSciPy(monkeypatch):
+    """auto sends LP problems over the size limit to SciPy, QP problems stay on Gurobi, and scipy rejects a QP."""
+    monkeypatch.setattr(Solve, "GUROBI_SIZE_LIMIT", 1)
+    result = solveProblem(None, milp)
+    assert result["backend"] == "scipy" and result["objective_value"] == pytest.approx(193)
+    assert "backend" not in solveProblem(None, qp)
+    assert solveProblem(None, dict(qp, backend="scipy")).startswith("Error: The scipy backend cannot solve this problem")
+    assert compileProblem(dict(milp, backend="scipy")).backend == "scipy"
+    assert solveProblem(None, dict(milp, backend="scipy", parameters={"NodeLimit": 1e100}))["objective_value"] == pytest.approx(193)
+    with pytest.raises(ProblemValidationError, match="Unknown backend"):
+        compileProblem(dict(milp, backend="cplex"))
+
+@pytest.mark.asyncio
+async def testGurobiSolverFallsBackWithoutLicense(monkeypatch):
+    """Without a Gurobi license the server still loads, and GurobiSolver solves an auto MILP with SciPy and says why."""
+    def noLicense():
+        raise gp.GurobiError(gp.GRB.Error.NO_LICENSE, "No Gurobi license found")
+    monkeypatch.setattr(sys.modules["Problem.EnvPool"], "createQuietEnv", noLicense)
+    monkeypatch.setattr(OptimizationProblem, "env_pool", EnvPool(size=2, prestart=True))
+    result = await GurobiSolver(dict(milp, problem={"name": "unlicensed", "type": "MILP"}))
+    assert result["backend"] == "scipy" and result["objective_value"] == pytest.approx(193)
+    assert any("No Gurobi license found" in note for note in result["notes"])
+
+@pytest.mark.asyncio
+async def testProblemClassIsDetected():
+    """Mislabeled problems are built with the model class of their content and the result reports both labels."""
+    linear = json.loads(json.dumps(milp))
+    linear["problem"]["type"] = "MIQCP"
+    problem = createProblem(linear)
+    assert isinstance(problem, LP)
+    problem.dispose()
+    result = await GurobiSolver(linear)
+    assert result["problem_class"] == {"declared": "MIQCP", "detected": "MILP", "convex": True}
+
+    quadratic = json.loads(json.dumps(qp))
+    quadratic["problem"]["type"] = "LP"
+    quadratic["objective"]["function_type"] = "linear"
+    problem = createProblem(quadratic)
+    assert isinstance(problem, QP)
+    problem.dispose()
+    assert (await GurobiSolver(quadratic))["objective_value"] == pytest.approx((await GurobiSolver(qp))["objective_value"])
+
+def testConvexityCheckSetsNonConvex():
+    """A maximized convex form or an indefinite block makes the problem nonconvex, and NonConvex is set unless the problem sets it."""
+    concave = json.loads(json.dumps(qp))
+    concave["objective"]["type"] = "maximize" if qp["objective"]["type"] == "minimize" else "minimize"
+    compiled = compileProblem(concave)
+    assert compiled.analysis.convex is False and compiled.parameters["NonConvex"] == 2
+    assert compileProblem(dict(concave, parameters={"NonConvex": 0})).parameters["NonConvex"] == 0
+    #x0*x1 is indefinite, the x2 and x3 squares form a separate positive block
+    assert quadraticCurvature(np.array([0, 2, 3]), np.array([1, 2, 3]), np.array([1.0, 1.0, 2.0])) == "indefinite"
+    assert quadraticCurvature(np.array([0, 0, 1]), np.array([0, 1, 1]), np.array([1.0, 2.0, 1.0])) == "psd"
+    assert quadraticCurvature(np.array([0, 2]), np.array([0, 2]), np.array([-1.0, -3.0])) == "nsd"
+
+def testReductionsKeepTheOriginalSolution(monkeypatch):
+    """Reducing a cluttered LP removes rows and columns but reports the same objective and every original variable and constraint."""
+    problem = generateSloppyLP(60, 40, density=0.1)
+    problem["output"] = {"slacks": True}
+    reduced, reduction = reduceProblem(compileProblem(problem))
+    assert reduction is not None and reduction.stats["columns"] > 0 and reduction.stats["rows"] >= reduction.stats["bounds"] > 0
+    assert reduced.num_vars < reduction.original.num_vars and reduced.A.nnz == np.count_nonzero(reduced.A.data)
+    result = solveProblem(None, problem)
+    monkeypatch.setattr(Solve, "REDUCE_PROBLEMS", 0)
+    unreduced = solveProblem(None, problem)
+    assert result["objective_value"] == pytest.approx(unreduced["objective_value"])
+    assert result["solution"].keys() == unreduced["solution"].keys() and result["slacks"].keys() == unreduced["slacks"].keys()
+
+def testReductionsSkipProblemsAskingForDuals():
+    """Rows and columns are kept when the result needs duals or reduced costs, only explicit zeros are dropped."""
+    problem = generateSloppyLP(60, 40, density=0.1)
+    problem["output"] = {"duals": True}
+    compiled = compileProblem(problem)
+    reduced, reduction = reduceProblem(compiled)
+    assert reduction is None and reduced is compiled and compiled.A.nnz == np.count_nonzero(compiled.A.data)
+
+def productionPlan(**sections) -> dict:
+    """max 3x + 5y with x <= 4, 2y <= 12 and 3x + 2y <= 18, optimal at x = 2, y = 6."""
+    problem = {
+        "problem": {"name": "plan", "type": "LP"},
+        "objective": {"type": "maximize", "function_type": "linear", "linear_terms": {"x": 3, "y": 5}},
+        "variables": {"x": {"type": "continuous"}, "y": {"type": "continuous"}},
+        "constraints": {"linear_constraints": [
+            {"name": "cap_x", "lhs": {"x": 1}, "rhs": 4, "sign": "<="},
+            {"name": "cap_y", "lhs": {"y": 2}, "rhs": 12, "sign": "<="},
+            {"name": "capacity", "lhs": {"x": 3, "y": 2}, "rhs": 18, "sign": "<="},
+        ]},
+    }
+    problem.update(sections)
+    return problem
+
+@pytest.mark.asyncio
+async def testScenariosSolveInOneModel():
+    """Scenarios change rhs, objective and bounds, are solved with the problem and reported after its own solution."""
+    problem = productionPlan(scenarios=[{"name": "more", "rhs": {"capacity": 24}}, {"name": "cheap_y", "objective": {"y": 1}},
+                                        {"name": "infeasible", "lb": {"x": 5}}])
+    result = await GurobiSolver(problem)
+    assert result["objective_value"] == pytest.approx(36) and result["solution"] == pytest.approx({"x": 2, "y": 6})
+    scenarios = {scenario["name"]: scenario for scenario in result["scenarios"]}
+    assert list(scenarios) == ["more", "cheap_y", "infeasible"]
+    assert scenarios["more"]["objective_value"] == pytest.approx(42) and scenarios["more"]["solution"] == pytest.approx({"x": 4, "y": 6})
+    assert scenarios["cheap_y"]["objective_value"] == pytest.approx(15)
+    assert scenarios["infeasible"]["objective_value"] is None and "solution" not in scenarios["infeasible"]
+    assert "Scenario cheap_y" in await ProblemToLP(problem)
+    with pytest.raises(ProblemValidationError) as error:
+        compileProblem(productionPlan(scenarios=[{"name": "base", "rhs": {"missing": 1}, "bounds": {}}], objectives=[{"linear_terms": {"x": 1}}]))
+    assert len(error.value.errors) == 4
+
+def testObjectivesAreHierarchicalOrBlended():
+    """Higher priorities are optimized first, equal priorities are blended by weight, and quadratic objectives are rejected."""
+    objective = {"type": "maximize", "function_type": "linear", "linear_terms": {"x": 1}, "priority": 2}
+    result = solveProblem(None, productionPlan(objective=objective, objectives=[{"name": "y", "linear_terms": {"y": 1}, "priority": 1}]))
+    assert result["solution"] == pytest.approx({"x": 4, "y": 3})
+    assert [(entry["name"], entry["objective_value"]) for entry in result["objectives"]] == [("Objective_0", 4), ("y", 3)]
+    blended = dict(objective, linear_terms={"x": 1, "y": 1}, priority=0)
+    result = solveProblem(None, productionPlan(objective=blended, objectives=[{"linear_terms": {"y": 1}, "weight": 2}]))
+    assert result["solution"] == pytest.approx({"x": 2, "y": 6})
+    with pytest.raises(ProblemValidationError, match="quadratic"):
+        compileProblem(dict(qp, objectives=[{"linear_terms": {}}]))
+
+def testBlocksDecompositionMatchesOneModel():
+    """Independent blocks are solved in worker processes and merged into the solution, duals and slacks of the whole problem."""
+    problem = generateBlockMILP(4, 30, 15, integer=False, seed=5)
+    problem["output"] = {"duals": True, "slacks": True}
+    single = solveProblem(None, problem)
+    try:
+        result = solveProblem(None, dict(problem, decomposition={"mode": "blocks"}))
+    finally:
+        Solve.BLOCK_SOLVER.shutdown()
+    assert result["decomposition"]["mode"] == "blocks" and result["decomposition"]["blocks"] >= 2
+    assert result["objective_value"] == pytest.approx(single["objective_value"])
+    assert result["slacks"] == pytest.approx(single["slacks"], abs=1e-6)
+    assert sorted(result["duals"]) == sorted(single["duals"]) and sorted(result["solution"]) == sorted(single["solution"])
+
+def testLagrangianRelaxesCouplingConstraints():
+    """Linking constraints are relaxed into the block objectives, the result satisfies them and is within the reported bound."""
+    problem = generateBlockMILP(3, 30, 15, coupling=1, seed=6)
+    single = solveProblem(None, problem)
+    try:
+        result = solveProblem(None, dict(problem, decomposition={"mode": "lagrangian", "coupling": ["link*"], "max_iterations": 15}))
+    finally:
+        Solve.BLOCK_SOLVER.shutdown()
+    report = result["decomposition"]
+    assert report["mode"] == "lagrangian" and report["coupling_constraints"] == 1
+    if "fallback" in report:
+        assert result["objective_value"] == pytest.approx(single["objective_value"])
+    else:
+        assert report["bound"] >= single["objective_value"] - 1e-6 >= result["objective_value"] - 1e-6
+        link = problem["constraints"]["linear_constraints"][-1]
+        assert sum(coef * result["solution"].get(name, 0) for name, coef in link["lhs"].items()) <= link["rhs"] + 1e-6
+    with pytest.raises(ProblemValidationError) as error:
+        compileProblem(productionPlan(decomposition={"mode": "split", "coupling": "cap*", "max_iterations": 0}))
+    assert len(error.value.errors) == 3
+    with pytest.raises(ProblemValidationError, match="decomposed"):
+        compileProblem(productionPlan(decomposition={"mode": "blocks"}, scenarios=[{"rhs": {"capacity": 20}}]))
+
+def testDecomposedSolvesCanBeStopped():
+    """StopSolve ends the Lagrangian loop with its best solution, cancellation drops the result, both without waiting for the budget."""
+    problem = generateBlockMILP(4, 100, 60, coupling=2, seed=3)
+    problem["decomposition"] = {"mode": "lagrangian", "coupling": ["link*"], "max_iterations": 1000, "time_limit": 120}
+    try:
+        for interrupt in ("stop", "cancel"):
+            task = SolveTask(threads=1)
+            threading.Timer(1.5, getattr(task, interrupt)).start()
+            start = time.perf_counter()
+            result = solveProblem(task, problem)
+            assert time.perf_counter() - start < 10
+            if interrupt == "cancel" or isinstance(result, str):
+                assert result == "Error: Optimization was cancelled."
+            else:
+                assert result["status"] == gp.GRB.INTERRUPTED and result["decomposition"]["iterations"] < 1000
+    finally:
+        Solve.BLOCK_SOLVER.shutdown()
+
+def testServerImportDefersSolverPackages():
+    """Importing main registers every tool without loading numpy, scipy or the solver state, and tools share one problem format."""
+    code = ("import sys, asyncio, main; print(json.dumps({'loaded': sorted(m for m in ('numpy', 'scipy', 'Problem', 'Solver') if m in sys.modules), "
+            "'tools': {t.name: t.description for t in asyncio.run(main.mcp.list_tools())}}))")
+    output = subprocess.run([sys.executable, "-c", "import json; " + code], capture_output=True, text=True, check=True).stdout
+    report = json.loads(output)
+    assert report["loaded"] == []
+    assert "SubmitSolve" in report["tools"] and "input_schema" in report["tools"]["GurobiSolver"]
+    assert report["tools"]["ProblemToLP"].startswith("Retuns the content") and "warm_start_from" in report["tools"]["ProblemToLP"]